@@ -12,6 +12,10 @@ import assist
 from settings import *
 from helpers import *
 from bottle_monitor import bottle_monitor
+from availability import get_availability_matrix
+from party_planner import plan_party_now
+from depletion import format_duration
+from persistence import read_json, write_json
 
 # Import your controller module
 import controller
@@ -29,12 +33,8 @@ def _send_interface_refresh_signal():
     """Tell the pygame interface to reload assets immediately."""
     try:
         refresh_signal = {"action": "refresh_cocktails", "timestamp": time.time()}
-        with open("interface_signal.json", "w", encoding="utf-8") as f:
-            json.dump(refresh_signal, f)
-        
-        # Force immediate file system sync
-        os.sync()
-        
+        # write_json schreibt atomar und mit fsync, die Oberfläche sieht nie eine halbe Datei
+        write_json("interface_signal.json", refresh_signal, indent=None)
         return True
     except Exception as e:
         st.warning(f"Could not send refresh signal: {e}")
@@ -74,24 +74,20 @@ def _force_image_reload():
     st.rerun()
 
 def _load_cocktails():
-    if os.path.exists(COCKTAILS_FILE):
-        try:
-            with open(COCKTAILS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if not isinstance(data, dict):
-                return {"cocktails": []}
-            if "cocktails" not in data or not isinstance(data["cocktails"], list):
-                data["cocktails"] = []
-            return data
-        except Exception as e:
-            st.error(f"Error loading cocktails: {e}")
+    try:
+        data = read_json(COCKTAILS_FILE)
+        if not isinstance(data, dict):
             return {"cocktails": []}
-    return {"cocktails": []}
+        if "cocktails" not in data or not isinstance(data["cocktails"], list):
+            data["cocktails"] = []
+        return data
+    except Exception as e:
+        st.error(f"Error loading cocktails: {e}")
+        return {"cocktails": []}
 
 def _write_cocktails(data: dict):
     try:
-        with open(COCKTAILS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        write_json(COCKTAILS_FILE, data)
         return True
     except Exception as e:
         st.error(f"Error saving cocktails: {e}")
@@ -128,12 +124,17 @@ def _filter_available_cocktails(cocktails: list) -> tuple:
     available_cocktails = []
     unavailable_cocktails = []
     
+    matrix = get_availability_matrix()
+    bottles = bottle_monitor.get_all_bottles()
+    available = matrix.available(bottles)[:, matrix.sizes.index('single')]
     for cocktail in cocktails:
-        ingredients = cocktail.get("ingredients", {})
-        can_make, missing_ingredients = bottle_monitor.can_make_cocktail(
-            [(ingredient.lower(), float(amount.split()[0])) 
-             for ingredient, amount in ingredients.items()]
-        )
+        index = matrix.index_of(cocktail)
+        if index is None:
+            # Nicht (so) in cocktails.json gespeichert -> einzeln prüfen
+            can_make, missing_ingredients = bottle_monitor.can_make_cocktail(get_ingredient_requirements(cocktail))
+        else:
+            can_make = bool(available[index])
+            missing_ingredients = [] if can_make else matrix.missing_ingredients(index, bottles)
         
         if can_make:
             available_cocktails.append(cocktail)
@@ -319,13 +320,6 @@ if "image_update_timestamp" not in st.session_state:
 from helpers import migrate_pump_config_to_extended
 migrate_pump_config_to_extended()
 
-# Normalisiere alle Flaschen-IDs beim Start
-try:
-    from controller import normalize_all_bottle_ids
-    normalize_all_bottle_ids()
-except Exception as e:
-    st.warning(f"Warnung: Flaschen-ID-Normalisierung fehlgeschlagen: {e}")
-
 saved_config = load_saved_config()
 cocktail_data = _load_cocktails()
 
@@ -591,7 +585,7 @@ with tabs[1]:
                 st.error(f"❌ Fehler beim Speichern: {e}")
 
     if st.button("Prime Pumps", use_container_width=True):
-        st.info("Priming all pumps for 10 seconds each...")
+        st.info("Priming all assigned pumps for 10 seconds, several in parallel...")
         try:
             controller.prime_pumps(duration=10)
             st.success("Pumps primed successfully!")
@@ -652,10 +646,19 @@ with tabs[1]:
             st.error(f"❌ Fehler beim Speichern: {e}")
 
     st.subheader("Clean Pumps")
+    clean_only_assigned = st.checkbox("Nur Pumpen mit zugeordneter Zutat", value=False, key="clean_only_assigned")
     if st.button("Clean Pumps", use_container_width=True):
-        st.info("Flushing all pumps forward for 10 seconds each (cleaning mode)...")
+        st.info("Flushing pumps forward for 10 seconds each, several in parallel (cleaning mode)...")
+        clean_progress = st.progress(0.0)
         try:
-            controller.clean_pumps(duration=10)
+            controller.clean_pumps(
+                duration=10,
+                only_assigned=clean_only_assigned,
+                on_progress=lambda progress: clean_progress.progress(
+                    sum(progress.values()) / (100.0 * len(progress)) if progress else 1.0,
+                    text=" · ".join(f"{pump}: {percent:.0f}%" for pump, percent in progress.items())
+                )
+            )
             st.success("All pumps flushed (cleaned).")
         except Exception as e:
             st.error(f"Error cleaning pumps: {e}")
@@ -699,10 +702,7 @@ with tabs[2]:
 
             # Überprüfe, ob der Cocktail zubereitet werden kann
             ingredients = selected.get("ingredients", {})
-            can_make, missing_ingredients = bottle_monitor.can_make_cocktail(
-                [(ingredient.lower(), float(amount.split()[0])) 
-                 for ingredient, amount in ingredients.items()]
-            )
+            can_make, missing_ingredients = bottle_monitor.can_make_cocktail(get_ingredient_requirements(selected))
             
             if not can_make:
                 st.error(f"❌ **Cocktail kann nicht zubereitet werden:**")
@@ -721,15 +721,14 @@ with tabs[2]:
                 recipe_data = []
                 total_volume = 0
                 
-                for ingredient, amount in ingredients.items():
-                    # Prüfe, ob die Zutat verfügbar ist
-                    ingredient_key = ingredient.lower().strip()
-                    amount_ml = float(amount.split()[0])
+                for item in controller.get_pour_plan(selected).ingredients:
+                    # Prüfe, ob die Zutat verfügbar ist (Mengen und Flaschen-ID aus dem Pour-Plan)
+                    ingredient = item.ingredient_name
+                    amount = ingredients[ingredient]
+                    amount_ml = item.recipe_ml
                     total_volume += amount_ml
                     
-                    ingredient_mapping = bottle_monitor._get_ingredient_mapping()
-                    bottle_id = ingredient_mapping.get(ingredient_key, ingredient_key.replace(' ', '_'))
-                    bottle = bottle_monitor.get_bottle_status(bottle_id)
+                    bottle = bottle_monitor.get_bottle_status(item.bottle_id)
                     
                     if bottle and bottle["current_ml"] >= amount_ml:
                         status = "✅"
@@ -956,6 +955,7 @@ with tabs[2]:
             # Verfügbare Cocktails anzeigen
             if available_cocktails:
                 st.subheader("🍹 Verfügbare Cocktails")
+                servings_remaining = bottle_monitor.get_servings_remaining()
                 for c in available_cocktails:
                     fun = c.get("fun_name", "Cocktail")
                     norm = c.get("normal_name", "cocktail")
@@ -964,6 +964,9 @@ with tabs[2]:
                     col1, col2 = st.columns([3, 1])
                     with col1:
                         st.write(f"**{fun}** ({norm})")
+                        servings = servings_remaining.get(norm, {})
+                        if servings.get("single") is not None:
+                            st.caption(f"Noch {servings['single']}× single / {servings['double']}× double")
                     with col2:
                         st.success("✅ Verfügbar")
                     
@@ -1012,8 +1015,7 @@ with tabs[2]:
                                     st.error("❌ make_drink() hat None zurückgegeben - Rezept konnte nicht verarbeitet werden")
                                     st.stop()
                                 
-                                while not executor_watcher.done():
-                                    pass
+                                executor_watcher.wait()
                                 
                                 # Nach dem Cocktail-Zubereiten: Flaschen-Status synchronisieren
                                 # WICHTIG: Nur die Konfiguration neu laden, NICHT refresh_bottles_from_pumps aufrufen
@@ -1188,7 +1190,7 @@ with tabs[3]:
         st.session_state.last_bottle_update = current_time
     
     # Refresh-Button für Flaschen aus Pumpen-Konfiguration
-    col_refresh, col_sync, col_info = st.columns([1, 1, 2])
+    col_refresh, col_info = st.columns([1, 3])
     with col_refresh:
         if st.button("🔄 Flaschen aktualisieren", use_container_width=True):
             with st.spinner("Aktualisiere Flaschen aus Pumpen-Konfiguration..."):
@@ -1197,14 +1199,6 @@ with tabs[3]:
                 st.success("Flaschen aktualisiert!")
                 st.rerun()
     
-    with col_sync:
-        if st.button("🔗 IDs synchronisieren", use_container_width=True):
-            with st.spinner("Synchronisiere Flaschen-IDs mit Controller..."):
-                bottle_monitor.sync_bottle_ids_with_controller()
-                st.session_state.last_bottle_update = time.time()
-                st.success("Flaschen-IDs synchronisiert!")
-                st.rerun()
-    
     with col_info:
         st.info("💡 Flaschen werden automatisch aus der Pumpen-Konfiguration im 'My Bar' Tab generiert")
     
@@ -1221,6 +1215,25 @@ with tabs[3]:
     with col4:
         st.metric("Gesamt-Füllstand", f"{overall_status['overall_percentage']}%")
     
+    # Party-Planer: bester Drink-Mix bis zum nächsten Auffüllen
+    with st.expander("🎉 Party-Planer"):
+        col_size, col_fav = st.columns(2)
+        with col_size:
+            party_size = st.radio("Größe", ["single", "double"], horizontal=True, key="party_size")
+        with col_fav:
+            weight_favorites = st.checkbox("Favoriten doppelt gewichten", key="party_weight_favorites")
+        weights = None
+        if weight_favorites:
+            weights = {c.get("normal_name", ""): 2.0 for c in load_cocktails().get("cocktails", []) if c.get("favorite", False)}
+        party_plan = plan_party_now(party_size, weights)
+        st.metric("Mögliche Drinks", party_plan.total_drinks)
+        for name, count in sorted(party_plan.drinks.items(), key=lambda item: -item[1]):
+            st.write(f"• {count}× {name}")
+        if party_plan.refills:
+            st.markdown("**Zuerst auffüllen:**")
+            for refill in party_plan.refills:
+                st.write(f"• {refill.name}: +{refill.refill_ml:.0f}ml → {refill.extra_drinks:+.0f} Drinks")
+    
     st.markdown("---")
     
     # Einzelne Flaschen anzeigen
@@ -1233,6 +1246,7 @@ with tabs[3]:
     # Debug-Info für Entwicklung
     if len(bottles) == 0:
         st.warning("⚠️ Keine Flaschen gefunden. Klicke auf '🔄 Flaschen aktualisieren' um sie zu laden.")
+    forecasts = bottle_monitor.get_depletion_forecasts()
     for bottle_id, bottle in bottles.items():
         col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 2])
         
@@ -1245,6 +1259,13 @@ with tabs[3]:
         
         with col3:
             st.write(f"{bottle['current_ml']:.0f}ml")
+            forecast = forecasts.get(bottle_id)
+            if forecast and forecast.seconds_to_critical is not None:
+                text = f"≈ {forecast.rate_ml_per_hour:.0f}ml/h · kritisch in {format_duration(forecast.seconds_to_critical)}"
+                if forecast.seconds_to_critical <= DEPLETION_ALERT_MINUTES * 60:
+                    st.warning(text)
+                else:
+                    st.caption(text)
         
         with col4:
             st.write(f"Kapazität: {bottle['capacity_ml']:.0f}ml")
@@ -1389,25 +1410,27 @@ with tabs[3]:
             warning_notif = st.checkbox("Warnungen", value=telegram_config["notifications"].get("warning", True))
             critical_notif = st.checkbox("Kritische Warnungen", value=telegram_config["notifications"].get("critical", True))
             empty_notif = st.checkbox("Leere Flaschen", value=telegram_config["notifications"].get("empty", True))
+            forecast_notif = st.checkbox("Prognose (bald kritisch)", value=telegram_config["notifications"].get("forecast", True))
         
         col_save_telegram, col_cancel_telegram = st.columns([1.5, 1])
         with col_save_telegram:
             if st.button("💾 Telegram-Einstellungen speichern", use_container_width=True):
                 # Neue Konfiguration speichern
                 new_config = {
+                    **telegram_config,
                     "enabled": enabled,
                     "bot_token": bot_token,
                     "chat_id": chat_id,
                     "notifications": {
                         "warning": warning_notif,
                         "critical": critical_notif,
-                        "empty": empty_notif
+                        "empty": empty_notif,
+                        "forecast": forecast_notif
                     }
                 }
                 
                 try:
-                    with open("telegram_config.json", "w", encoding="utf-8") as f:
-                        json.dump(new_config, f, indent=2, ensure_ascii=False)
+                    write_json("telegram_config.json", new_config)
                     
                     # BottleMonitor neu laden
                     bottle_monitor.telegram_config = new_config
@@ -0,0 +1,308 @@
+# availability.py
+import logging
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+import settings
+from persistence import file_signature
+from pour_planner import _load_json
+
+logger = logging.getLogger(__name__)
+
+SIZES = ('single', 'double')
+
+
+class AvailabilityMatrix:
+    """Bedarfsmatrix Rezept × Größe × Flasche für den ganzen Cocktail-Katalog.
+
+    `requirements[c, s, b]` ist die Menge in ml, die Cocktail `c` in Größe
+    `s` aus Flasche `b` braucht (aus den gecachten Pour-Plänen, also genau
+    das, was beim Zubereiten reserviert wird). Die Matrix wird einmal pro
+    Katalog gebaut; ob ein Cocktail machbar ist, ergibt sich danach für alle
+    Cocktails und Größen aus einem einzigen Vergleich mit dem aktuellen
+    Füllstandsvektor.
+
+    Dazu gibt es einen invertierten Index Flasche -> Cocktails
+    (`cocktails_using`), damit nach einer Buchung nur die betroffenen
+    Zeilen neu bewertet werden müssen.
+    """
+
+    def __init__(self, cocktails: List[Dict], plan_for: Callable, resolve_bottle_id: Callable[[str], str],
+                 sizes: Sequence[str] = SIZES):
+        self.cocktails = list(cocktails)
+        self.sizes = tuple(sizes)
+        self.bottle_ids = []
+        self._columns = {}
+        self._names = {}
+        entries = []
+        for index, cocktail in enumerate(self.cocktails):
+            self._names.setdefault(cocktail.get('normal_name', ''), index)
+            entries.append(self._plan_entries(cocktail, plan_for, resolve_bottle_id))
+
+        shape = (len(self.cocktails), len(self.sizes), len(self.bottle_ids))
+        self.requirements = np.zeros(shape)
+        self.used = np.zeros((shape[0], shape[2]), dtype=bool)
+        self.valid = np.zeros(shape[0], dtype=bool)
+        # Zutatennamen je Cocktail und Flasche, nur für die Fehlermeldungen
+        self._ingredient_names = []
+        for index, cocktail_entries in enumerate(entries):
+            names = {}
+            if cocktail_entries:
+                self.valid[index] = True
+                for size_index, column, ingredient_name, ml in cocktail_entries:
+                    self.requirements[index, size_index, column] += ml
+                    self.used[index, column] = True
+                    names.setdefault(column, ingredient_name)
+            self._ingredient_names.append(names)
+        self._users = {bottle_id: np.flatnonzero(self.used[:, column]) for bottle_id, column in self._columns.items()}
+        logger.debug(f'Verfügbarkeitsmatrix gebaut: {shape[0]} Cocktails × {shape[1]} Größen × {shape[2]} Flaschen')
+
+    def _column(self, bottle_id: str) -> int:
+        column = self._columns.get(bottle_id)
+        if column is None:
+            column = self._columns[bottle_id] = len(self.bottle_ids)
+            self.bottle_ids.append(bottle_id)
+        return column
+
+    def _plan_entries(self, cocktail, plan_for, resolve_bottle_id):
+        """Gibt [(größe, spalte, zutat, ml)] eines Cocktails zurück; leer, wenn er nicht geprüft werden kann."""
+        if not cocktail.get('ingredients'):
+            return []
+        try:
+            plans = [plan_for(cocktail, size) for size in self.sizes]
+        except Exception as e:
+            # Bei Fehlern gilt der Cocktail sicherheitshalber als nicht verfügbar
+            logger.warning(f"Fehler beim Prüfen der Verfügbarkeit von {cocktail.get('normal_name', 'Unknown')}: {e}")
+            return []
+        return [(size_index, self._column(resolve_bottle_id(item.ingredient_name)), item.ingredient_name, item.ml)
+                for size_index, plan in enumerate(plans) for item in plan.ingredients]
+
+    def index_of(self, cocktail: Dict) -> Optional[int]:
+        """Gibt die Zeile eines Cocktails zurück (None, wenn er nicht in der Matrix steht oder abweicht)."""
+        index = self._names.get(cocktail.get('normal_name', ''))
+        if index is None or self.cocktails[index].get('ingredients') != cocktail.get('ingredients'):
+            return None
+        return index
+
+    def cocktails_using(self, bottle_id: str) -> np.ndarray:
+        """Gibt die Zeilen aller Cocktails zurück, die Flasche `bottle_id` brauchen."""
+        return self._users.get(bottle_id, np.empty(0, dtype=int))
+
+    def level_vector(self, bottles: Dict[str, Dict]) -> np.ndarray:
+        """Füllstände in Spaltenreihenfolge; fehlende Flaschen sind -inf (nie ausreichend)."""
+        return np.array([bottles[bottle_id]['current_ml'] if bottle_id in bottles else -np.inf
+                         for bottle_id in self.bottle_ids], dtype=float)
+
+    def available(self, bottles: Dict[str, Dict], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Gibt ein bool-Array (Cocktails × Größen) zurück: machbar mit den aktuellen Füllständen.
+
+        Mit `rows` werden nur diese Zeilen bewertet (in derselben Reihenfolge).
+        """
+        rows = slice(None) if rows is None else rows
+        enough = (self.requirements[rows] <= self.level_vector(bottles)) | ~self.used[rows, np.newaxis, :]
+        return enough.all(axis=-1) & self.valid[rows, np.newaxis]
+
+    def servings(self, bottles: Dict[str, Dict], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Gibt die Anzahl noch möglicher Drinks (Cocktails × Größen) zurück.
+
+        Minimum über die Zutaten von Füllstand ÷ skalierter Menge, abgerundet.
+        Fehlt eine Flasche, ist es 0; Cocktails ganz ohne Menge sind unbegrenzt (inf).
+        """
+        rows = slice(None) if rows is None else rows
+        levels = self.level_vector(bottles)
+        requirements = self.requirements[rows]
+        needed = requirements > 0
+        ratio = np.divide(np.maximum(levels, 0), requirements, out=np.full(requirements.shape, np.inf), where=needed)
+        ratio = np.where(self.used[rows, np.newaxis, :] & np.isneginf(levels), 0, ratio)
+        servings = np.floor(ratio.min(axis=-1, initial=np.inf))
+        servings[~self.valid[rows]] = 0
+        return servings
+
+    def available_cocktails(self, bottles: Dict[str, Dict], size: str = 'single') -> List[Dict]:
+        """Gibt alle Cocktails zurück, die in `size` gerade gemacht werden können."""
+        mask = self.available(bottles)[:, self.sizes.index(size)]
+        return [self.cocktails[index] for index in np.flatnonzero(mask)]
+
+    def missing_ingredients(self, index: int, bottles: Dict[str, Dict], size: str = 'single') -> List[str]:
+        """Beschreibt, welche Zutaten einem Cocktail fehlen (leer, wenn er machbar ist)."""
+        if not self.valid[index]:
+            return ['Rezept kann nicht geprüft werden']
+        size_index = self.sizes.index(size)
+        levels = self.level_vector(bottles)
+        missing = []
+        for column in np.flatnonzero(self.used[index]):
+            ingredient_name = self._ingredient_names[index][column]
+            required = self.requirements[index, size_index, column]
+            bottle_id = self.bottle_ids[column]
+            if bottle_id not in bottles:
+                missing.append(f"{ingredient_name} (Flasche '{bottle_id}' nicht gefunden)")
+            elif levels[column] < required:
+                missing.append(f"{ingredient_name} (nur {bottles[bottle_id]['current_ml']}ml verfügbar, {required:.1f}ml benötigt)")
+        return missing
+
+
+class AvailabilityUpdate(NamedTuple):
+    """Neue Menge machbarer Cocktails nach einer Füllstandsänderung."""
+    cocktails: List[Dict]
+    added: List[Dict]
+    removed: List[Dict]
+
+
+class AvailabilityTracker:
+    """Hält die machbaren Cocktails einer Größe aktuell, ohne den Katalog neu zu scannen.
+
+    Der Tracker hört auf die Füllstandsänderungen des BottleMonitor. Wird
+    Flasche X verbraucht oder aufgefüllt, werden über den invertierten Index
+    nur die Cocktails mit Flasche X neu bewertet. Ändert sich dadurch die
+    Menge machbarer Cocktails, bekommen alle Abonnenten ein AvailabilityUpdate.
+    Ändert sich der Katalog (neue Matrix) oder sind die geänderten Flaschen
+    unbekannt, wird einmal komplett neu bewertet.
+
+    Nebenbei hält er für alle Cocktails und Größen die Anzahl noch
+    möglicher Drinks (`servings`), ebenfalls nur für die betroffenen Zeilen
+    neu berechnet. `servings_of` und `servings_by_name` lesen nur diesen
+    Speicherstand (plus ein stat() auf Katalog und Pumpen-Konfiguration) -
+    billig genug für jedes Frame.
+
+    Die Abonnenten werden im Thread aufgerufen, der gebucht hat (z.B. dem
+    Pour-Thread), und sollten das Update nur weiterreichen.
+    """
+
+    def __init__(self, monitor, size: str = 'single', matrix_source: Callable[[], AvailabilityMatrix] = None):
+        self.monitor = monitor
+        self.size = size
+        self._matrix_source = matrix_source or get_availability_matrix
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self.matrix = None
+        self.state = None
+        self.servings = None
+        self._unsubscribe = monitor.add_level_listener(self.on_levels_changed)
+
+    def close(self):
+        """Meldet den Tracker beim BottleMonitor ab."""
+        self._unsubscribe()
+
+    def subscribe(self, callback: Callable[[AvailabilityUpdate], None]) -> Callable[[], None]:
+        """Registriert `callback(update)`. Gibt eine Abmelde-Funktion zurück."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _cocktails(self, state) -> List[Dict]:
+        return [self.matrix.cocktails[index] for index in np.flatnonzero(state)]
+
+    def _ensure_state(self, refresh: bool = False):
+        """Bewertet beim ersten Aufruf den ganzen Katalog; mit refresh=True auch, wenn sich die Matrix geändert hat."""
+        if self.state is not None and not refresh:
+            return
+        # Füllstände vor dem eigenen Lock lesen (Lock-Reihenfolge: Monitor vor Tracker).
+        # get_all_bottles lädt Buchungen anderer Prozesse nach und meldet sie an on_levels_changed.
+        bottles = self.monitor.get_all_bottles()
+        with self._lock:
+            if self.state is None:
+                self._rebuild(bottles)
+                return
+            catalog_changed = self._matrix_source() is not self.matrix
+        if catalog_changed:
+            # Geänderter Katalog oder Pumpen: komplett neu bewerten und die Abonnenten benachrichtigen
+            self.on_levels_changed(None, bottles)
+
+    def available_cocktails(self) -> List[Dict]:
+        """Gibt die aktuell machbaren Cocktails zurück (bewertet beim ersten Aufruf den ganzen Katalog)."""
+        self._ensure_state(refresh=True)
+        with self._lock:
+            return self._cocktails(self.state)
+
+    def _servings_dict(self, index) -> Dict[str, Optional[int]]:
+        return {size: None if np.isinf(count) else int(count) for size, count in zip(self.matrix.sizes, self.servings[index])}
+
+    def servings_of(self, cocktail: Dict) -> Dict[str, Optional[int]]:
+        """Gibt {größe: anzahl} für einen Cocktail zurück (None = unbegrenzt, {} = nicht im Katalog)."""
+        self._ensure_state(refresh=True)
+        with self._lock:
+            index = self.matrix.index_of(cocktail)
+            return {} if index is None else self._servings_dict(index)
+
+    def servings_by_name(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """Gibt {normal_name: {größe: anzahl}} für das ganze Menü zurück."""
+        self._ensure_state(refresh=True)
+        with self._lock:
+            return {cocktail.get('normal_name', ''): self._servings_dict(index)
+                    for index, cocktail in enumerate(self.matrix.cocktails)}
+
+    def _rebuild(self, bottles):
+        self.matrix = self._matrix_source()
+        self.servings = self.matrix.servings(bottles)
+        self.state = self.servings[:, self.matrix.sizes.index(self.size)] >= 1
+
+    def on_levels_changed(self, bottle_ids, bottles):
+        """Listener für BottleMonitor.add_level_listener."""
+        with self._lock:
+            if self.state is None:
+                # Noch niemand hat gefragt -> beim ersten Zugriff komplett bewerten
+                return
+            old_cocktails = self._cocktails(self.state)
+            matrix = self._matrix_source()
+            if bottle_ids is None or matrix is not self.matrix:
+                self._rebuild(bottles)
+                new_cocktails = self._cocktails(self.state)
+                old_names = {cocktail.get('normal_name') for cocktail in old_cocktails}
+                new_names = {cocktail.get('normal_name') for cocktail in new_cocktails}
+                added = [cocktail for cocktail in new_cocktails if cocktail.get('normal_name') not in old_names]
+                removed = [cocktail for cocktail in old_cocktails if cocktail.get('normal_name') not in new_names]
+            else:
+                if not bottle_ids:
+                    return
+                rows = np.unique(np.concatenate([matrix.cocktails_using(bottle_id) for bottle_id in bottle_ids]))
+                if not len(rows):
+                    return
+                servings = matrix.servings(bottles, rows)
+                self.servings[rows] = servings
+                new_state = servings[:, matrix.sizes.index(self.size)] >= 1
+                changed = rows[new_state != self.state[rows]]
+                self.state[rows] = new_state
+                added = [matrix.cocktails[index] for index in changed if self.state[index]]
+                removed = [matrix.cocktails[index] for index in changed if not self.state[index]]
+                new_cocktails = self._cocktails(self.state) if len(changed) else old_cocktails
+            if not added and not removed:
+                return
+            update = AvailabilityUpdate(new_cocktails, added, removed)
+            subscribers = list(self._subscribers)
+        logger.info(f"Verfügbarkeit geändert: +{[c.get('normal_name') for c in added]} -{[c.get('normal_name') for c in removed]}")
+        for callback in subscribers:
+            try:
+                callback(update)
+            except Exception:
+                logger.exception("Fehler in einem Verfügbarkeits-Abonnenten")
+
+
+_lock = threading.Lock()
+_cached = (None, None)
+
+
+def get_availability_matrix() -> AvailabilityMatrix:
+    """Gibt die Matrix für cocktails.json zurück und baut sie nur neu, wenn sich Katalog, Pumpen oder Kalibrierung ändern."""
+    global _cached
+    from controller import get_pour_plan
+    from bottle_monitor import bottle_monitor
+
+    signature = tuple(file_signature(path) for path in (settings.COCKTAILS_FILE, settings.CONFIG_FILE, settings.__file__))
+    with _lock:
+        if _cached[0] != signature or _cached[1] is None:
+            cocktails = _load_json(settings.COCKTAILS_FILE, {}).get('cocktails', [])
+            _cached = (signature, AvailabilityMatrix(cocktails, get_pour_plan, bottle_monitor.resolve_bottle_id))
+        return _cached[1]
+
+
+def get_availability_tracker() -> AvailabilityTracker:
+    """Gibt den Tracker des globalen bottle_monitor zurück."""
+    from bottle_monitor import bottle_monitor
+    return bottle_monitor.availability
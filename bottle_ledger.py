@@ -0,0 +1,210 @@
+# bottle_ledger.py
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BOTTLE_FIELDS = ("name", "capacity_ml", "current_ml", "warning_threshold_ml", "critical_threshold_ml")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bottles (
+    bottle_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    capacity_ml REAL NOT NULL,
+    current_ml REAL NOT NULL,
+    warning_threshold_ml REAL NOT NULL,
+    critical_threshold_ml REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    bottle_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    delta_ml REAL NOT NULL,
+    level_ml REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS journal_bottle ON journal (bottle_id, id);
+"""
+
+
+class InsufficientLiquid(Exception):
+    """Mindestens eine Flasche hat nicht genug Flüssigkeit; es wurde nichts abgezogen."""
+
+    def __init__(self, missing: List[str]):
+        super().__init__(", ".join(missing))
+        self.missing = missing
+
+
+class BottleLedger:
+    """Flaschenstände in SQLite (WAL) mit fortlaufendem Verbrauchs-Journal.
+
+    Die Tabelle `bottles` hält die aktuellen Füllstände, `journal` jede
+    Änderung (consume, rollback, refill, set_level, import, ...) nur
+    anhängend. Jede Änderung läuft in einer eigenen `BEGIN IMMEDIATE`
+    Transaktion, dadurch können App und Interface gleichzeitig buchen,
+    ohne sich gegenseitig Updates zu überschreiben. Mit `data_version()`
+    lässt sich billig erkennen, ob ein anderer Prozess etwas geändert hat.
+    """
+
+    def __init__(self, db_path, timeout: float = 10.0):
+        self.db_path = str(db_path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, work):
+        """Führt `work(conn)` in einer schreibenden Transaktion aus."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _journal(conn, bottle_id: str, kind: str, delta_ml: float, level_ml: float):
+        conn.execute("INSERT INTO journal (timestamp, bottle_id, kind, delta_ml, level_ml) VALUES (?, ?, ?, ?, ?)",
+                     (time.time(), bottle_id, kind, delta_ml, level_ml))
+
+    def data_version(self) -> int:
+        """Ändert sich, sobald eine andere Verbindung (z.B. ein anderer Prozess) etwas geschrieben hat."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM bottles").fetchone()[0] == 0
+
+    def get_bottles(self) -> Dict[str, Dict]:
+        """Gibt alle Flaschen im Format von bottle_config.json zurück."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT bottle_id, {', '.join(BOTTLE_FIELDS)} FROM bottles ORDER BY rowid").fetchall()
+        return {row["bottle_id"]: {field: row[field] for field in BOTTLE_FIELDS} for row in rows}
+
+    def consume(self, amounts: Dict[str, float], kind: str = "consume") -> Dict[str, float]:
+        """Zieht alle Mengen gemeinsam ab oder gar keine.
+
+        Wirft InsufficientLiquid, wenn eine Flasche fehlt oder nicht genug
+        enthält. Gibt die neuen Füllstände {bottle_id: ml} zurück.
+        """
+        def work(conn):
+            levels, missing = {}, []
+            for bottle_id, amount_ml in amounts.items():
+                row = conn.execute("SELECT current_ml FROM bottles WHERE bottle_id = ?", (bottle_id,)).fetchone()
+                if row is None:
+                    missing.append(f"Flasche {bottle_id} nicht gefunden")
+                elif row["current_ml"] < amount_ml:
+                    missing.append(f"Flasche {bottle_id} hat nicht genug Flüssigkeit: {row['current_ml']}ml < {amount_ml}ml")
+                else:
+                    levels[bottle_id] = max(0, row["current_ml"] - amount_ml)
+            if missing:
+                raise InsufficientLiquid(missing)
+            for bottle_id, level_ml in levels.items():
+                conn.execute("UPDATE bottles SET current_ml = ? WHERE bottle_id = ?", (level_ml, bottle_id))
+                self._journal(conn, bottle_id, kind, -amounts[bottle_id], level_ml)
+            return levels
+        return self._transaction(work)
+
+    def add(self, amounts: Dict[str, float], kind: str = "refill") -> Dict[str, float]:
+        """Bucht Mengen zurück bzw. füllt auf (höchstens bis zur Kapazität). Unbekannte Flaschen werden ignoriert."""
+        def work(conn):
+            levels = {}
+            for bottle_id, amount_ml in amounts.items():
+                row = conn.execute("SELECT current_ml, capacity_ml FROM bottles WHERE bottle_id = ?", (bottle_id,)).fetchone()
+                if row is None:
+                    continue
+                level_ml = min(row["capacity_ml"], row["current_ml"] + amount_ml)
+                conn.execute("UPDATE bottles SET current_ml = ? WHERE bottle_id = ?", (level_ml, bottle_id))
+                self._journal(conn, bottle_id, kind, level_ml - row["current_ml"], level_ml)
+                levels[bottle_id] = level_ml
+            return levels
+        return self._transaction(work)
+
+    def update_bottle(self, bottle_id: str, kind: str = "update", **fields) -> Optional[Dict]:
+        """Ändert einzelne Felder einer Flasche atomar und gibt die Flasche zurück (None, wenn unbekannt)."""
+        fields = {field: value for field, value in fields.items() if field in BOTTLE_FIELDS}
+
+        def work(conn):
+            row = conn.execute(f"SELECT {', '.join(BOTTLE_FIELDS)} FROM bottles WHERE bottle_id = ?", (bottle_id,)).fetchone()
+            if row is None:
+                return None
+            bottle = {field: row[field] for field in BOTTLE_FIELDS}
+            bottle.update(fields)
+            conn.execute(f"UPDATE bottles SET {', '.join(f'{field} = ?' for field in BOTTLE_FIELDS)} WHERE bottle_id = ?",
+                         [bottle[field] for field in BOTTLE_FIELDS] + [bottle_id])
+            if bottle["current_ml"] != row["current_ml"]:
+                self._journal(conn, bottle_id, kind, bottle["current_ml"] - row["current_ml"], bottle["current_ml"])
+            return bottle
+        return self._transaction(work)
+
+    def replace_bottles(self, bottles: Dict[str, Dict], kind: str = "import"):
+        """Übernimmt einen kompletten Flaschensatz (z.B. aus bottle_config.json oder nach Pumpenänderungen).
+
+        Fehlende Flaschen werden entfernt, Füllstandsänderungen im Journal vermerkt.
+        """
+        def work(conn):
+            existing = {row["bottle_id"]: row["current_ml"] for row in conn.execute("SELECT bottle_id, current_ml FROM bottles")}
+            for bottle_id in existing.keys() - bottles.keys():
+                conn.execute("DELETE FROM bottles WHERE bottle_id = ?", (bottle_id,))
+            for bottle_id, bottle in bottles.items():
+                values = [bottle.get("name", bottle_id)] + [bottle.get(field, 0) for field in BOTTLE_FIELDS[1:]]
+                conn.execute(f"INSERT OR REPLACE INTO bottles (bottle_id, {', '.join(BOTTLE_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                             [bottle_id] + values)
+                old_level = existing.get(bottle_id, 0)
+                if bottle_id not in existing or bottle.get("current_ml", 0) != old_level:
+                    self._journal(conn, bottle_id, kind, bottle.get("current_ml", 0) - old_level, bottle.get("current_ml", 0))
+        self._transaction(work)
+
+    def rename_bottles(self, renames: Dict[str, str]) -> Dict[str, str]:
+        """Benennt Flaschen samt Journal um ({alte_id: neue_id}) und gibt die durchgeführten Umbenennungen zurück.
+
+        Gibt es die neue ID schon, bleibt diese Flasche erhalten und die alte
+        wird entfernt (ihr Journal wird trotzdem übernommen).
+        """
+        def work(conn):
+            done = {}
+            for old_id, new_id in renames.items():
+                if old_id == new_id or conn.execute("SELECT 1 FROM bottles WHERE bottle_id = ?", (old_id,)).fetchone() is None:
+                    continue
+                if conn.execute("SELECT 1 FROM bottles WHERE bottle_id = ?", (new_id,)).fetchone() is not None:
+                    logger.warning(f"Flasche '{new_id}' existiert bereits - '{old_id}' wird entfernt")
+                    conn.execute("DELETE FROM bottles WHERE bottle_id = ?", (old_id,))
+                else:
+                    conn.execute("UPDATE bottles SET bottle_id = ? WHERE bottle_id = ?", (new_id, old_id))
+                conn.execute("UPDATE journal SET bottle_id = ? WHERE bottle_id = ?", (new_id, old_id))
+                done[old_id] = new_id
+            return done
+        return self._transaction(work)
+
+    def journal(self, bottle_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Gibt die letzten Journal-Einträge (neueste zuerst) zurück."""
+        query = "SELECT id, timestamp, bottle_id, kind, delta_ml, level_ml FROM journal"
+        params: Tuple = ()
+        if bottle_id is not None:
+            query += " WHERE bottle_id = ?"
+            params = (bottle_id,)
+        query += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def consumption_since(self, since: float) -> List[Tuple[float, str, float]]:
+        """Gibt alle Verbräuche (und zurückgebuchte Reservierungen) seit `since` als (zeitstempel, bottle_id, ml) zurück."""
+        with self._lock:
+            rows = self._conn.execute("SELECT timestamp, bottle_id, delta_ml FROM journal "
+                                      "WHERE kind IN ('consume', 'rollback') AND timestamp >= ? ORDER BY id", (since,)).fetchall()
+        # Verbrauch positiv, Rückbuchungen negativ
+        return [(row["timestamp"], row["bottle_id"], -row["delta_ml"]) for row in rows]
@@ -1,67 +1,67 @@
-import json
 import time
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-import requests
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import settings
+from bottle_ledger import BottleLedger, InsufficientLiquid
+from depletion import DepletionForecast, ewma_rates, forecast_bottle
+from ingredients import canonical_id
+from notifier import TelegramNotifier
+from persistence import read_json, write_json
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def canonical_bottles(bottles: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Gibt die Flaschen unter ihren kanonischen IDs zurück (bei Dubletten gewinnt die erste)."""
+    result = {}
+    for bottle_id, bottle in bottles.items():
+        new_id = canonical_id(bottle_id) or bottle_id
+        if new_id in result:
+            logger.warning(f"Flasche '{bottle_id}' doppelt als '{new_id}' - wird ignoriert")
+            continue
+        result[new_id] = bottle
+    return result
+
+
 class BottleMonitor:
-    """Überwacht den Füllstand aller Flaschen und sendet Warnungen"""
+    """Überwacht den Füllstand aller Flaschen und sendet Warnungen
+
+    Maßgeblich sind die Füllstände im BottleLedger (SQLite neben der
+    JSON-Datei, z.B. bottle_config.db). bottle_config.json wird nach jeder
+    Änderung als Export für bestehende Werkzeuge geschrieben und nur beim
+    ersten Start (oder über import_json) übernommen.
+    """
     
     def __init__(self, config_file: str = "bottle_config.json"):
         self.config_file = Path(config_file)
+        self._lock = threading.RLock()
+        self._level_listeners = []
+        self.ledger = BottleLedger(self.config_file.with_suffix('.db'))
         self.bottles = self._load_bottle_config()
+        self._data_version = self.ledger.data_version()
         self.telegram_config = self._load_telegram_config()
-        
-    def _get_ingredient_mapping(self) -> Dict[str, str]:
-        """Zentrale Ingredient Mapping Funktion für konsistente Flaschen-IDs"""
-        # Importiere die normalize_bottle_id Funktion
-        try:
-            from controller import normalize_bottle_id
-        except ImportError:
-            # Fallback falls controller nicht verfügbar
-            def normalize_bottle_id(name):
-                return name.lower().strip().replace(' ', '_').replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue').replace('ß', 'ss')
-        
-        # Erstelle Mapping mit normalisierten IDs
-        raw_mappings = {
-            "rum (weiß)": "rum (weiß)",
-            "rum (weiss)": "rum (weiß)",  # Alternative Schreibweise
-            "wodka": "wodka",
-            "gin": "gin",
-            "tequila": "tequila",
-            "pfirsichlikör": "pfirsichlikör",
-            "pfirsichlikoer": "pfirsichlikör",  # Alternative Schreibweise ohne Umlaut
-            "grenadinensirup": "grenadinensirup",
-            "limettensaft": "limettensaft",
-            "orangensaft": "orangensaft",
-            "tonic water": "tonic water",
-            "sprite": "sprite",
-            "triple sec": "triple sec",
-            "cranberrysaft": "cranberrysaft",
-            "cranberry juice": "cranberrysaft",
-            "lime juice": "limettensaft",
-            "lemon juice": "limettensaft",
-            "orange juice": "orangensaft"
-        }
-        
-        # Normalisiere alle Werte
-        normalized_mappings = {}
-        for key, value in raw_mappings.items():
-            normalized_mappings[key] = normalize_bottle_id(value)
-        
-        return normalized_mappings
+        self._availability = None
+        # Telegram läuft im Hintergrund und liest immer die aktuelle telegram_config
+        self.notifier = TelegramNotifier(lambda: self.telegram_config)
         
     def _load_bottle_config(self) -> Dict:
         """Lädt die Flaschen-Konfiguration basierend auf der Pumpen-Konfiguration"""
+        if not self.ledger.is_empty():
+            self._canonicalize_ledger_ids()
+            return {"bottles": self.ledger.get_bottles()}
+
+        # Erster Start mit Ledger: bestehende bottle_config.json übernehmen
         if self.config_file.exists():
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                config = read_json(self.config_file)
+                self.ledger.replace_bottles(canonical_bottles(config.get("bottles", {})), kind="import")
+                logger.info(f"Flaschen aus {self.config_file} in den Ledger übernommen")
+                return {"bottles": self.ledger.get_bottles()}
             except Exception as e:
                 logger.error(f"Fehler beim Laden der Flaschen-Konfiguration: {e}")
         
@@ -77,8 +77,7 @@ class BottleMonitor:
             else:
                 ingredient = entry
             if ingredient and str(ingredient).strip():
-                # Konvertiere ingredient zu bottle_id (kleinbuchstaben, keine Leerzeichen)
-                bottle_id = str(ingredient).strip().lower().replace(' ', '_')
+                bottle_id = canonical_id(str(ingredient))
                 bottles_config[bottle_id] = {
                     "name": str(ingredient).strip(),
                     "capacity_ml": 1000,  # Standard 1L Flasche
@@ -111,37 +110,12 @@ class BottleMonitor:
         return config
     
     def _save_bottle_config(self, config: Dict):
-        """Speichert die Flaschen-Konfiguration"""
+        """Speichert die Flaschen-Konfiguration im Ledger und exportiert sie nach bottle_config.json"""
         try:
-            # Erstelle Backup der alten Konfiguration
-            if self.config_file.exists():
-                backup_file = self.config_file.with_suffix('.backup')
-                import shutil
-                shutil.copy2(self.config_file, backup_file)
-                logger.debug(f"Backup der alten Konfiguration erstellt: {backup_file}")
-            
-            # Speichere neue Konfiguration
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-            
-            # Überprüfe, ob die Datei korrekt gespeichert wurde
-            if self.config_file.exists():
-                file_size = self.config_file.stat().st_size
-                logger.info(f"Konfiguration erfolgreich gespeichert: {self.config_file} ({file_size} Bytes)")
-                
-                # Lade die gespeicherte Konfiguration zur Überprüfung
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    saved_config = json.load(f)
-                
-                if saved_config == config:
-                    logger.info("Konfiguration erfolgreich verifiziert")
-                else:
-                    logger.error("Konfiguration wurde nicht korrekt gespeichert!")
-                    return False
-            else:
-                logger.error("Konfigurationsdatei wurde nicht erstellt!")
-                return False
-                
+            with self._lock:
+                self.ledger.replace_bottles(config.get("bottles", {}), kind="save")
+                self._export_json(config)
+                self._notify_level_listeners(None)
         except Exception as e:
             logger.error(f"Fehler beim Speichern der Flaschen-Konfiguration: {e}")
             return False
@@ -153,8 +127,7 @@ class BottleMonitor:
         telegram_file = Path("telegram_config.json")
         if telegram_file.exists():
             try:
-                with open(telegram_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return read_json(telegram_file)
             except Exception as e:
                 logger.error(f"Fehler beim Laden der Telegram-Konfiguration: {e}")
         
@@ -166,14 +139,14 @@ class BottleMonitor:
             "notifications": {
                 "warning": True,
                 "critical": True,
-                "empty": True
+                "empty": True,
+                "forecast": True
             }
         }
         
         # Speichere Standard-Telegram-Konfiguration
         try:
-            with open(telegram_file, 'w', encoding='utf-8') as f:
-                json.dump(default_telegram, f, indent=2, ensure_ascii=False)
+            write_json(telegram_file, default_telegram)
         except Exception as e:
             logger.error(f"Fehler beim Speichern der Telegram-Konfiguration: {e}")
         
@@ -184,8 +157,7 @@ class BottleMonitor:
         pump_config_file = Path("pump_config.json")
         if pump_config_file.exists():
             try:
-                with open(pump_config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return read_json(pump_config_file)
             except Exception as e:
                 logger.error(f"Fehler beim Laden der Pumpen-Konfiguration: {e}")
         
@@ -195,7 +167,6 @@ class BottleMonitor:
     def refresh_bottles_from_pumps(self):
         """Aktualisiert die Flaschen-Konfiguration basierend auf der aktuellen Pumpen-Konfiguration"""
         pump_config = self._load_pump_config()
-        ingredient_mapping = self._get_ingredient_mapping()
         
         # Neue Flaschen-Konfiguration generieren
         bottles_config = {}
@@ -206,16 +177,7 @@ class BottleMonitor:
             else:
                 ingredient = entry
             if ingredient and str(ingredient).strip():
-                # Verwende das zentrale Ingredient Mapping mit Normalisierung
-                try:
-                    from controller import normalize_bottle_id
-                except ImportError:
-                    # Fallback falls controller nicht verfügbar
-                    def normalize_bottle_id(name):
-                        return name.lower().strip().replace(' ', '_').replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue').replace('ß', 'ss')
-                
-                ingredient_key = str(ingredient).strip().lower()
-                bottle_id = ingredient_mapping.get(ingredient_key, normalize_bottle_id(ingredient))
+                bottle_id = canonical_id(str(ingredient))
                 
                 # Prüfe, ob die Flasche bereits existiert
                 existing_bottle = self.bottles.get("bottles", {}).get(bottle_id)
@@ -247,52 +209,137 @@ class BottleMonitor:
     
     def get_all_bottles(self) -> Dict:
         """Gibt alle Flaschen-Informationen zurück"""
-        # WICHTIG: Lade immer die neueste Konfiguration vor der Rückgabe
+        # Neu geparst wird nur, wenn die Datei von außen geändert wurde
         self.reload_config_from_file()
         return self.bottles.get("bottles", {})
     
     def consume_liquid(self, bottle_id: str, amount_ml: float) -> bool:
         """Verbraucht Flüssigkeit aus einer Flasche"""
-        # WICHTIG: Lade immer die neueste Konfiguration vor dem Verbrauch
-        self.reload_config_from_file()
-        
-        logger.info(f"consume_liquid aufgerufen: bottle_id='{bottle_id}', amount_ml={amount_ml}")
-        logger.info(f"Verfügbare Flaschen: {list(self.bottles.get('bottles', {}).keys())}")
-        
-        if bottle_id not in self.bottles.get("bottles", {}):
-            logger.warning(f"Flasche {bottle_id} nicht gefunden")
+        reservation = self.reserve([(bottle_id, amount_ml)])
+        if reservation is None:
             return False
-        
-        bottle = self.bottles["bottles"][bottle_id]
-        current_ml = bottle["current_ml"]
-        
-        logger.info(f"Flasche {bottle_id}: Aktueller Füllstand: {current_ml}ml, wird verbraucht: {amount_ml}ml")
-        
-        if current_ml < amount_ml:
-            logger.warning(f"Flasche {bottle_id} hat nicht genug Flüssigkeit: {current_ml}ml < {amount_ml}ml")
-            return False
-        
-        # Flüssigkeit verbrauchen
-        old_ml = current_ml
-        bottle["current_ml"] = max(0, current_ml - amount_ml)
-        
-        logger.info(f"Flasche {bottle_id}: Füllstand von {old_ml}ml auf {bottle['current_ml']}ml reduziert")
-        
-        # Status überprüfen und Warnungen senden
-        self._check_bottle_status(bottle_id, bottle)
-        
-        # Konfiguration sofort speichern
+        reservation.commit()
+        return True
+
+    def reserve(self, requirements: List[Tuple[str, float]]) -> Optional["BottleReservation"]:
+        """Reserviert die Flüssigkeit für einen ganzen Drink in einem Schritt.
+
+        `requirements` ist eine Liste von (bottle_id, ml). Alle Flaschen werden in
+        einer Ledger-Transaktion geprüft und nur wenn alle genug enthalten,
+        gemeinsam abgezogen - auch wenn ein anderer Prozess gleichzeitig bucht.
+        Gibt eine BottleReservation zurück, die mit commit() abgeschlossen oder
+        mit rollback() zurückgenommen wird, oder None, wenn etwas fehlt.
+        """
+        amounts = {}
+        for bottle_id, amount_ml in requirements:
+            amounts[bottle_id] = amounts.get(bottle_id, 0) + amount_ml
+
+        with self._lock:
+            try:
+                levels = self.ledger.consume(amounts)
+            except InsufficientLiquid as e:
+                for message in e.missing:
+                    logger.warning(message)
+                return None
+            except Exception as e:
+                logger.error(f"Fehler beim Speichern der Konfiguration: {e}")
+                return None
+            self._apply_levels(levels)
+
+        logger.info("Reserviert: " + ", ".join(f"{bottle_id} {amount_ml:.1f}ml" for bottle_id, amount_ml in amounts.items()))
+        return BottleReservation(self, amounts)
+
+    def _commit_reservation(self, reservation: "BottleReservation"):
+        with self._lock:
+            bottles = self.bottles.get("bottles", {})
+            for bottle_id in reservation.amounts:
+                if bottle_id in bottles:
+                    # Status überprüfen und Warnungen senden
+                    self._check_bottle_status(bottle_id, bottles[bottle_id])
+            if self.telegram_config.get("enabled", False):
+                # Vor dem Leerlaufen warnen, nicht erst danach
+                forecasts = self.get_depletion_forecasts()
+                alert_seconds = settings.DEPLETION_ALERT_MINUTES * 60
+                for bottle_id in reservation.amounts:
+                    if bottle_id in bottles and bottle_id in forecasts:
+                        self.notifier.report_forecast(bottle_id, bottles[bottle_id],
+                                                      forecasts[bottle_id].seconds_to_critical, alert_seconds)
+
+    def _rollback_reservation(self, reservation: "BottleReservation"):
+        with self._lock:
+            self._apply_levels(self.ledger.add(reservation.amounts, kind="rollback"))
+        logger.info("Reservierung zurückgenommen: " + ", ".join(reservation.amounts))
+
+    def _apply_levels(self, levels: Dict[str, float]):
+        """Übernimmt neue Füllstände aus dem Ledger in den Speicher und exportiert die JSON-Datei."""
+        with self._lock:
+            # Hat ein anderer Prozess inzwischen gebucht, alles frisch aus dem Ledger lesen
+            self.reload_config_from_file()
+            bottles = self.bottles.setdefault("bottles", {})
+            for bottle_id, level_ml in levels.items():
+                if bottle_id in bottles:
+                    bottles[bottle_id]["current_ml"] = level_ml
+            self._export_json(self.bottles)
+            self._notify_level_listeners(set(levels))
+
+    def _canonicalize_ledger_ids(self):
+        """Benennt Flaschen mit veralteten IDs (z.B. "rum_weiÃ\\x9f") im Ledger auf die kanonische ID um."""
+        renames = {}
+        for bottle_id in self.ledger.get_bottles():
+            new_id = canonical_id(bottle_id)
+            if new_id and new_id != bottle_id:
+                renames[bottle_id] = new_id
+        if renames:
+            for old_id, new_id in self.ledger.rename_bottles(renames).items():
+                logger.info(f"Flaschen-ID umbenannt: '{old_id}' -> '{new_id}'")
+
+    def _export_json(self, config: Dict):
+        """Exportiert die Konfiguration atomar nach bottle_config.json (temporäre Datei, fsync, dann os.replace)."""
+        write_json(self.config_file, config)
+        logger.debug(f"Konfiguration exportiert: {self.config_file}")
+
+    def _save_bottle(self, bottle_id: str, kind: str):
+        """Speichert eine im Speicher geänderte Flasche im Ledger und exportiert die JSON-Datei."""
+        with self._lock:
+            self.ledger.update_bottle(bottle_id, kind=kind, **self.bottles["bottles"][bottle_id])
+            self._export_json(self.bottles)
+            self._notify_level_listeners({bottle_id})
+
+    def add_level_listener(self, callback) -> Callable[[], None]:
+        """Registriert `callback(bottle_ids, bottles)` für Füllstandsänderungen. Gibt eine Abmelde-Funktion zurück.
+
+        `bottle_ids` ist die Menge der geänderten Flaschen oder None, wenn sich
+        beliebige Flaschen geändert haben können (Import, Neuladen, Pumpenänderung).
+        """
+        with self._lock:
+            self._level_listeners.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._level_listeners:
+                    self._level_listeners.remove(callback)
+        return unsubscribe
+
+    def _notify_level_listeners(self, bottle_ids: Optional[Set[str]]):
+        # Wird unter self._lock aufgerufen, damit die Listener die Änderungen in Reihenfolge sehen
+        bottles = self.bottles.get("bottles", {})
+        for callback in list(self._level_listeners):
+            try:
+                callback(bottle_ids, bottles)
+            except Exception:
+                logger.exception("Fehler in einem Füllstands-Listener")
+
+    def import_json(self) -> bool:
+        """Übernimmt eine (von Hand bearbeitete) bottle_config.json in den Ledger."""
         try:
-            self._save_bottle_config(self.bottles)
-            logger.info(f"Flasche {bottle_id}: Konfiguration erfolgreich gespeichert")
+            config = read_json(self.config_file)
+            with self._lock:
+                self.ledger.replace_bottles(canonical_bottles(config.get("bottles", {})), kind="import")
+                self.reload_config_from_file(force=True)
+            return True
         except Exception as e:
-            logger.error(f"Fehler beim Speichern der Konfiguration: {e}")
-            # Rollback bei Fehler
-            bottle["current_ml"] = old_ml
+            logger.error(f"Fehler beim Importieren von {self.config_file}: {e}")
             return False
-        
-        logger.info(f"Flasche {bottle_id}: {amount_ml}ml verbraucht, verbleibend: {bottle['current_ml']}ml")
-        return True
     
     def refill_bottle(self, bottle_id: str, amount_ml: float) -> bool:
         """Füllt eine Flasche auf"""
@@ -301,21 +348,18 @@ class BottleMonitor:
             return False
         
         bottle = self.bottles["bottles"][bottle_id]
-        current_ml = bottle["current_ml"]
-        capacity_ml = bottle["capacity_ml"]
         
-        # Neue Menge berechnen (nicht über die Kapazität hinaus)
-        new_amount = min(capacity_ml, current_ml + amount_ml)
-        bottle["current_ml"] = new_amount
-        
-        # Konfiguration speichern
-        self._save_bottle_config(self.bottles)
+        # Neue Menge im Ledger buchen (nicht über die Kapazität hinaus)
+        self._apply_levels(self.ledger.add({bottle_id: amount_ml}, kind="refill"))
+        bottle = self.bottles["bottles"].get(bottle_id, bottle)
+        new_amount = bottle["current_ml"]
         
         logger.info(f"Flasche {bottle_id}: {amount_ml}ml aufgefüllt, aktuell: {new_amount}ml")
         
-        # Telegram-Benachrichtigung senden
+        # Telegram-Benachrichtigung im Hintergrund senden
         if self.telegram_config.get("enabled", False):
-            self._send_telegram_message(f"🔄 Flasche {bottle['name']} wurde aufgefüllt: {new_amount}ml")
+            self.notifier.notify(f"🔄 Flasche {bottle['name']} wurde aufgefüllt: {new_amount}ml", key=f"{bottle_id}:refill")
+            self.notifier.report_bottle(bottle_id, bottle)
         
         return True
     
@@ -333,10 +377,7 @@ class BottleMonitor:
         bottle["current_ml"] = new_level
         
         # Konfiguration speichern
-        self._save_bottle_config(self.bottles)
-        
-        # WICHTIG: Konfiguration sofort neu laden um Synchronisation zu erzwingen
-        self.reload_config_from_file()
+        self._save_bottle(bottle_id, kind="set_level")
         
         logger.info(f"Flasche {bottle_id}: Füllstand auf {new_level}ml gesetzt und synchronisiert")
         
@@ -372,7 +413,7 @@ class BottleMonitor:
             bottle["critical_threshold_ml"] = max(25, int(capacity_ml * critical_ratio))
         
         # Konfiguration speichern
-        self._save_bottle_config(self.bottles)
+        self._save_bottle(bottle_id, kind="capacity")
         
         logger.info(f"Flasche {bottle_id}: Kapazität von {old_capacity}ml auf {capacity_ml}ml geändert")
         
@@ -404,61 +445,22 @@ class BottleMonitor:
         bottle["critical_threshold_ml"] = critical_threshold_ml
         
         # Konfiguration speichern
-        self._save_bottle_config(self.bottles)
+        self._save_bottle(bottle_id, kind="thresholds")
         
         logger.info(f"Flasche {bottle_id}: Warnschwellen auf {warning_threshold_ml}ml (Warnung) und {critical_threshold_ml}ml (kritisch) gesetzt")
         
         return True
     
     def _check_bottle_status(self, bottle_id: str, bottle: Dict):
-        """Überprüft den Flaschenstatus und sendet Warnungen"""
-        current_ml = bottle["current_ml"]
-        warning_threshold = bottle["warning_threshold_ml"]
-        critical_threshold = bottle["critical_threshold_ml"]
-        
-        # Telegram-Benachrichtigungen senden
+        """Überprüft den Flaschenstatus und sendet Warnungen (asynchron, nur bei Verschlechterung)"""
         if self.telegram_config.get("enabled", False):
-            if current_ml <= 0:
-                if self.telegram_config["notifications"].get("empty", True):
-                    self._send_telegram_message(f"🚨 FLASCHE LEER: {bottle['name']} ist leer!")
-            elif current_ml <= critical_threshold:
-                if self.telegram_config["notifications"].get("critical", True):
-                    self._send_telegram_message(f"⚠️ KRITISCHER FÜLLSTAND: {bottle['name']} hat nur noch {current_ml}ml")
-            elif current_ml <= warning_threshold:
-                if self.telegram_config["notifications"].get("warning", True):
-                    self._send_telegram_message(f"🔶 WARNUNG: {bottle['name']} hat nur noch {current_ml}ml")
+            self.notifier.report_bottle(bottle_id, bottle)
     
     def _send_telegram_message(self, message: str) -> bool:
-        """Sendet eine Nachricht über Telegram"""
+        """Sendet eine Nachricht über Telegram (synchron, z.B. für die Test-Nachricht)"""
         if not self.telegram_config.get("enabled", False):
             return False
-        
-        bot_token = self.telegram_config.get("bot_token")
-        chat_id = self.telegram_config.get("chat_id")
-        
-        if not bot_token or not chat_id:
-            logger.warning("Telegram-Bot-Token oder Chat-ID nicht konfiguriert")
-            return False
-        
-        try:
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-            data = {
-                "chat_id": chat_id,
-                "text": message,
-                "parse_mode": "HTML"
-            }
-            
-            response = requests.post(url, data=data, timeout=10)
-            if response.status_code == 200:
-                logger.info(f"Telegram-Nachricht gesendet: {message}")
-                return True
-            else:
-                logger.error(f"Fehler beim Senden der Telegram-Nachricht: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Fehler beim Senden der Telegram-Nachricht: {e}")
-            return False
+        return self.notifier.send_now(message)
     
     def get_empty_bottles(self) -> List[str]:
         """Gibt eine Liste aller leeren Flaschen zurück"""
@@ -476,24 +478,36 @@ class BottleMonitor:
                 low_bottles.append(bottle_id)
         return low_bottles
     
+    def resolve_bottle_id(self, ingredient_name: str) -> str:
+        """Gibt die Flaschen-ID einer Zutat zurück (siehe ingredients.canonical_id)."""
+        return canonical_id(ingredient_name)
+
+    @property
+    def availability(self):
+        """AvailabilityTracker für diesen Monitor (wird beim ersten Zugriff angelegt)."""
+        with self._lock:
+            if self._availability is None:
+                from availability import AvailabilityTracker
+                self._availability = AvailabilityTracker(self)
+            return self._availability
+
+    def get_servings_remaining(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """Gibt für jeden Cocktail {'single': n, 'double': n} noch möglicher Drinks zurück (None = unbegrenzt).
+
+        Die Werte werden nach jeder Buchung nur für die betroffenen Cocktails
+        neu berechnet, die Abfrage liest nur den Speicherstand.
+        """
+        return self.availability.servings_by_name()
+
     def can_make_cocktail(self, ingredients: List[Tuple[str, float]]) -> Tuple[bool, List[str]]:
         """Überprüft, ob ein Cocktail mit den aktuellen Füllständen zubereitet werden kann"""
-        ingredient_mapping = self._get_ingredient_mapping()
         missing_ingredients = []
         
         for ingredient_name, amount_ml in ingredients:
             # Verwende das Ingredient Mapping, um die korrekte Flaschen-ID zu finden
-            try:
-                from controller import normalize_bottle_id
-            except ImportError:
-                # Fallback falls controller nicht verfügbar
-                def normalize_bottle_id(name):
-                    return name.lower().strip().replace(' ', '_').replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue').replace('ß', 'ss')
+            bottle_id = self.resolve_bottle_id(ingredient_name)
             
-            ingredient_key = ingredient_name.lower().strip()
-            bottle_id = ingredient_mapping.get(ingredient_key, normalize_bottle_id(ingredient_name))
-            
-            logger.debug(f"Checking ingredient: '{ingredient_name}' -> key: '{ingredient_key}' -> bottle_id: '{bottle_id}'")
+            logger.debug(f"Checking ingredient: '{ingredient_name}' -> bottle_id: '{bottle_id}'")
             
             bottle = self.get_bottle_status(bottle_id)
             if not bottle:
@@ -506,6 +520,19 @@ class BottleMonitor:
         can_make = len(missing_ingredients) == 0
         return can_make, missing_ingredients
     
+    def get_depletion_forecasts(self, now: Optional[float] = None) -> Dict[str, DepletionForecast]:
+        """Gibt je Flasche die gleitende Verbrauchsrate und die Restzeit bis kritisch/leer zurück.
+
+        Grundlage ist das Verbrauchs-Journal im Ledger (auch Buchungen anderer
+        Prozesse), gewichtet über DEPLETION_WINDOW_MINUTES.
+        """
+        now = time.time() if now is None else now
+        window_seconds = settings.DEPLETION_WINDOW_MINUTES * 60
+        # Ältere Drinks als fünf Fenster tragen weniger als 1% bei
+        rates = ewma_rates(self.ledger.consumption_since(now - 5 * window_seconds), now, window_seconds)
+        return {bottle_id: forecast_bottle(bottle_id, bottle, rates.get(bottle_id, 0.0))
+                for bottle_id, bottle in self.get_all_bottles().items()}
+
     def get_bottle_usage_percentage(self, bottle_id: str) -> float:
         """Gibt den Füllstand einer Flasche in Prozent zurück"""
         bottle = self.get_bottle_status(bottle_id)
@@ -537,10 +564,9 @@ class BottleMonitor:
     def save_config(self):
         """Speichert die aktuelle Flaschen-Konfiguration in die Datei"""
         try:
-            config_data = {"bottles": self.bottles}
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
-            logger.info(f"Flaschen-Konfiguration gespeichert: {len(self.bottles)} Flaschen")
+            if not self._save_bottle_config(self.bottles):
+                raise IOError(f"{self.config_file} konnte nicht gespeichert werden")
+            logger.info(f"Flaschen-Konfiguration gespeichert: {len(self.bottles['bottles'])} Flaschen")
         except Exception as e:
             logger.error(f"Fehler beim Speichern der Flaschen-Konfiguration: {e}")
             raise
@@ -550,7 +576,9 @@ class BottleMonitor:
         logger.info("Erzwinge Neuladen der Flaschen-Konfiguration")
         
         # Lade Konfiguration neu
-        self.bottles = self._load_bottle_config()
+        with self._lock:
+            self.bottles = self._load_bottle_config()
+            self._data_version = self.ledger.data_version()
         
         # Überprüfe Konsistenz
         bottles = self.get_all_bottles()
@@ -592,72 +620,26 @@ class BottleMonitor:
         
         return issues
 
-    def sync_bottle_ids_with_controller(self):
-        """Synchronisiert die Flaschen-IDs mit dem Controller-Mapping"""
-        # Ingredient Mapping für konsistente Flaschen-IDs (muss mit Controller übereinstimmen)
-        ingredient_mapping = {
-            "rum (weiß)": "rum_(weiß)",
-            "wodka": "wodka",
-            "gin": "gin",
-            "tequila": "tequila",
-            "pfirsichlikör": "pfirsichlikör",
-            "grenadinensirup": "grenadinensirup",
-            "limettensaft": "limettensaft",
-            "orangensaft": "orangensaft",
-            "tonic water": "tonic_water",
-            "sprite": "sprite",
-            "triple sec": "triple_sec",
-            "cranberrysaft": "cranberrysaft",
-            "cranberry juice": "cranberrysaft",
-            "lime juice": "limettensaft",
-            "lemon juice": "limettensaft",
-            "orange juice": "orangensaft"
-        }
-        
-        # Erstelle eine neue Konfiguration mit den korrekten IDs
-        new_bottles = {}
-        existing_bottles = self.bottles.get("bottles", {})
-        
-        for old_id, bottle_data in existing_bottles.items():
-            # Suche nach der korrekten ID basierend auf dem Namen
-            bottle_name = bottle_data.get("name", "").lower().strip()
-            correct_id = None
-            
-            # Suche nach exakter Übereinstimmung
-            for ingredient, bottle_id in ingredient_mapping.items():
-                if ingredient == bottle_name:
-                    correct_id = bottle_id
-                    break
-            
-            # Falls keine exakte Übereinstimmung, verwende den alten Namen
-            if not correct_id:
-                correct_id = bottle_name.replace(' ', '_')
-            
-            # Verwende die korrekte ID
-            new_bottles[correct_id] = bottle_data
-            logger.info(f"Flasche {old_id} -> {correct_id} synchronisiert")
-        
-        # Aktualisiere die Konfiguration
-        self.bottles["bottles"] = new_bottles
-        self._save_bottle_config(self.bottles)
-        
-        logger.info(f"Flaschen-IDs synchronisiert: {len(new_bottles)} Flaschen")
-        return new_bottles
+    def reload_config_from_file(self, force: bool = False):
+        """Lädt die Flaschen aus dem Ledger neu, aber nur wenn sie sich geändert haben.
 
-    def reload_config_from_file(self):
-        """Lädt die Konfiguration aus der Datei neu"""
-        try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    self.bottles = json.load(f)
-                logger.info("Konfiguration aus Datei neu geladen")
+        Der Speicherstand in self.bottles wird bei eigenen Änderungen direkt
+        mitgeführt. Neu gelesen wird nur, wenn ein anderer Prozess in den Ledger
+        geschrieben hat (PRAGMA data_version) oder `force` gesetzt ist.
+        """
+        with self._lock:
+            try:
+                data_version = self.ledger.data_version()
+                if not force and data_version == self._data_version:
+                    return True
+                self.bottles = {"bottles": self.ledger.get_bottles()}
+                self._data_version = data_version
+                self._notify_level_listeners(None)
+                logger.debug("Flaschen aus dem Ledger neu geladen")
                 return True
-            else:
-                logger.warning("Konfigurationsdatei existiert nicht")
+            except Exception as e:
+                logger.error(f"Fehler beim Neuladen der Konfiguration: {e}")
                 return False
-        except Exception as e:
-            logger.error(f"Fehler beim Neuladen der Konfiguration: {e}")
-            return False
 
     def force_global_sync(self):
         """Erzwingt eine globale Synchronisation aller Instanzen"""
@@ -665,10 +647,35 @@ class BottleMonitor:
         self._save_bottle_config(self.bottles)
         
         # Lade sie sofort wieder neu
-        self.reload_config_from_file()
+        self.reload_config_from_file(force=True)
         
         logger.info("Globale Synchronisation erzwungen")
         return True
 
+class BottleReservation:
+    """Für einen Drink reservierte Flüssigkeit (siehe BottleMonitor.reserve).
+
+    Die Mengen sind bereits abgezogen und gespeichert. commit() schließt die
+    Reservierung ab und prüft die Warnschwellen, rollback() bucht alles mit
+    einem Schreibvorgang zurück (z.B. wenn der Drink nicht ausgegeben wurde).
+    """
+
+    def __init__(self, monitor: BottleMonitor, amounts: Dict[str, float]):
+        self.monitor = monitor
+        self.amounts = amounts
+        self.state = "reserved"
+
+    def commit(self):
+        if self.state != "reserved":
+            return
+        self.state = "committed"
+        self.monitor._commit_reservation(self)
+
+    def rollback(self):
+        if self.state != "reserved":
+            return
+        self.state = "rolled_back"
+        self.monitor._rollback_reservation(self)
+
 # Globale Instanz für einfachen Zugriff
 bottle_monitor = BottleMonitor()
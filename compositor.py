@@ -0,0 +1,172 @@
+# compositor.py
+import logging
+from typing import Dict, List, Optional
+
+import pygame
+
+logger = logging.getLogger(__name__)
+
+# Ab diesem Anteil geänderter Fläche wird einfach der ganze Bildschirm neu gezeichnet
+FULL_REDRAW_RATIO = 0.5
+
+
+def _freeze(args) -> tuple:
+    # Rects sind veränderlich: als Tupel merken, damit ein verschobenes Rect als Änderung erkannt wird
+    return tuple(tuple(arg) if isinstance(arg, pygame.Rect) else arg for arg in args)
+
+
+def _same_args(old: tuple, new: tuple) -> bool:
+    if len(old) != len(new):
+        return False
+    # Surfaces nur per Identität vergleichen: eine neue Surface gilt immer als geändert
+    return all(a is b or (not isinstance(a, pygame.Surface) and not isinstance(b, pygame.Surface) and a == b)
+               for a, b in zip(old, new))
+
+
+class Compositor:
+    """Zeichnet das `layers`-Dict der Oberfläche neu, aber nur die Bereiche, die sich geändert haben.
+
+    Jede Layer ist {'function': ..., 'args': ..., 'static': bool}. Beim
+    Zeichnen wird mit dem letzten Stand verglichen; neue, entfernte,
+    veränderte oder umsortierte Layers markieren ihr altes und neues
+    Rechteck als schmutzig. Nur diese Rechtecke werden neu zusammengesetzt
+    und per pygame.display.update() ausgegeben. Die statischen Layers am
+    unteren Ende (z.B. der Hintergrund) liegen fertig zusammengesetzt in
+    einer Basis-Surface. Animierte Layers (z.B. die Single/Double-Buttons)
+    gehören nicht dazu, sonst wird die Basis in jedem Frame neu gebaut.
+    """
+
+    def __init__(self, screen: pygame.Surface):
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self._drawn = {}
+        self._order = []
+        self._base = None
+        self._base_key = None
+        self._full_redraw = True
+
+    def invalidate(self):
+        """Erzwingt beim nächsten draw() ein komplettes Neuzeichnen."""
+        self._full_redraw = True
+
+    def bounds(self, function, args) -> Optional[pygame.Rect]:
+        """Bildschirmbereich einer Layer, None = unbekannt (zählt als ganzer Bildschirm)."""
+        if function == self.screen.blit and len(args) >= 2:
+            surface, dest = args[0], args[1]
+            size = surface.get_size()
+            if len(args) >= 3 and args[2] is not None:
+                size = pygame.Rect(args[2]).size
+            topleft = dest.topleft if isinstance(dest, pygame.Rect) else dest
+            return pygame.Rect(topleft, size).clip(self.screen_rect)
+        return None
+
+    def _dirty_rects(self, layers: Dict) -> Optional[List[pygame.Rect]]:
+        """Vergleicht mit dem zuletzt gezeichneten Stand; None heißt: alles neu zeichnen."""
+        dirty = []
+
+        def mark(rect):
+            if rect is None:
+                return False
+            if rect.width and rect.height:
+                dirty.append(rect)
+            return True
+
+        for key in self._drawn.keys() - layers.keys():
+            if not mark(self._drawn[key][2]):
+                return None
+        for key, layer in layers.items():
+            args = _freeze(layer['args'])
+            old = self._drawn.get(key)
+            if old is not None and old[0] == layer['function'] and _same_args(old[1], args):
+                continue
+            if old is not None and not mark(old[2]):
+                return None
+            if not mark(self.bounds(layer['function'], layer['args'])):
+                return None
+        # Gleiche Layers in anderer Reihenfolge verdecken sich anders
+        old_order = [key for key in self._order if key in layers]
+        new_order = [key for key in layers if key in self._drawn]
+        for index, (old_key, new_key) in enumerate(zip(old_order, new_order)):
+            if old_key != new_key:
+                for key in old_order[index:]:
+                    if not mark(self._drawn[key][2]):
+                        return None
+                break
+        return dirty
+
+    def _merge(self, rects: List[pygame.Rect]) -> Optional[List[pygame.Rect]]:
+        merged = []
+        for rect in rects:
+            # Überlappende Rechtecke zusammenfassen, bis sich nichts mehr überlappt
+            while True:
+                index = rect.collidelist(merged)
+                if index < 0:
+                    break
+                rect = rect.union(merged.pop(index))
+            merged.append(rect)
+        area = sum(rect.width * rect.height for rect in merged)
+        if area >= FULL_REDRAW_RATIO * self.screen_rect.width * self.screen_rect.height:
+            return None
+        return merged
+
+    def _static_prefix(self, layers: Dict) -> int:
+        count = 0
+        for layer in layers.values():
+            function = layer['function']
+            if not layer.get('static') or getattr(function, '__self__', None) is not self.screen:
+                break
+            count += 1
+        return count
+
+    def _update_base(self, layers: Dict, count: int):
+        prefix = list(layers.items())[:count]
+        key = [(name, layer['function'], _freeze(layer['args'])) for name, layer in prefix]
+        if self._base_key is not None and len(key) == len(self._base_key) and all(
+                a[0] == b[0] and a[1] == b[1] and _same_args(a[2], b[2]) for a, b in zip(key, self._base_key)):
+            return
+        self._base = None
+        if count:
+            self._base = pygame.Surface(self.screen_rect.size, 0, self.screen)
+            for _, layer in prefix:
+                # Die Layer-Funktion ist an den Bildschirm gebunden, hier auf die Basis umleiten
+                getattr(self._base, layer['function'].__name__)(*layer['args'])
+        self._base_key = key
+        logger.debug(f'Basis-Surface aus {count} statischen Layers neu zusammengesetzt')
+
+    def _compose(self, layers: Dict, count: int, clip: Optional[pygame.Rect]):
+        self.screen.set_clip(clip)
+        if self._base is not None:
+            if clip is None:
+                self.screen.blit(self._base, (0, 0))
+            else:
+                self.screen.blit(self._base, clip, clip)
+        for layer in list(layers.values())[count:]:
+            if clip is not None:
+                rect = self.bounds(layer['function'], layer['args'])
+                if rect is not None and not rect.colliderect(clip):
+                    continue
+            layer['function'](*layer['args'])
+        self.screen.set_clip(None)
+
+    def draw(self, layers: Dict) -> List[pygame.Rect]:
+        """Zeichnet alle geänderten Bereiche und gibt sie zurück (leer = es gab nichts zu tun)."""
+        rects = None if self._full_redraw else self._dirty_rects(layers)
+        if rects is not None:
+            if not rects:
+                return []
+            rects = self._merge(rects)
+        count = self._static_prefix(layers)
+        self._update_base(layers, count)
+        if rects is None:
+            self._compose(layers, count, None)
+            pygame.display.flip()
+            rects = [self.screen_rect.copy()]
+        else:
+            for rect in rects:
+                self._compose(layers, count, rect)
+            pygame.display.update(rects)
+        self._drawn = {key: (layer['function'], _freeze(layer['args']), self.bounds(layer['function'], layer['args']))
+                       for key, layer in layers.items()}
+        self._order = list(layers)
+        self._full_redraw = False
+        return rects
@@ -5,10 +5,20 @@ logger = logging.getLogger(__name__)
 import time
 import os
 import json
+import heapq
+import atexit
+import asyncio
+import itertools
+import threading
+import collections
 import concurrent.futures
+from typing import NamedTuple, Optional
 
 from settings import *
 from bottle_monitor import bottle_monitor
+from pour_planner import parse_ml, predict_makespan, plan_pour_order, build_pump_lookup, build_pump_groups, compile_recipe, PourPlanCache
+from pump_backend import MonotonicClock, GpiozeroBackend, LoggingBackend
+from ingredients import canonical_id
 
 # GPIO-Initialisierung mit gpiozero
 if not globals().get('DEBUG', False):
@@ -23,81 +33,6 @@ if not globals().get('DEBUG', False):
         logger.error(f'GPIO-Initialisierung fehlgeschlagen: {e}')
         logger.info('Pump control will be disabled')
 
-def normalize_all_bottle_ids():
-    """
-    Normalisiert alle Flaschen-IDs in der bottle_config.json automatisch.
-    Diese Funktion sollte beim Start der Anwendung aufgerufen werden.
-    """
-    try:
-        import json
-        from bottle_monitor import bottle_monitor
-        
-        # Lade aktuelle Konfiguration
-        bottles = bottle_monitor.get_all_bottles()
-        if not bottles:
-            logger.info("Keine Flaschen gefunden - Überspringe Normalisierung")
-            return
-        
-        # Normalisiere alle Flaschen-IDs
-        normalized_bottles = {}
-        changes_made = False
-        
-        for old_bottle_id, bottle_data in bottles.items():
-            # Normalisiere die Flaschen-ID
-            new_bottle_id = normalize_bottle_id(bottle_data.get('name', old_bottle_id))
-            
-            if new_bottle_id != old_bottle_id:
-                logger.info(f"Normalisiere Flaschen-ID: '{old_bottle_id}' -> '{new_bottle_id}'")
-                changes_made = True
-            
-            normalized_bottles[new_bottle_id] = bottle_data
-        
-        # Speichere nur wenn Änderungen gemacht wurden
-        if changes_made:
-            # Aktualisiere die bottle_monitor Konfiguration
-            bottle_monitor.bottles = normalized_bottles
-            bottle_monitor.save_config()
-            logger.info("Flaschen-IDs erfolgreich normalisiert und gespeichert")
-        else:
-            logger.info("Alle Flaschen-IDs sind bereits normalisiert")
-            
-    except Exception as e:
-        logger.error(f"Fehler beim Normalisieren der Flaschen-IDs: {e}")
-
-def normalize_bottle_id(ingredient_name):
-    """
-    Normalisiert einen Zutatennamen zu einer konsistenten Flaschen-ID.
-    Diese Funktion wird überall verwendet, um sicherzustellen, dass alle
-    Flaschen-IDs einheitlich normalisiert sind.
-    """
-    if not ingredient_name:
-        return ""
-        
-    # Normalisiere den Namen für Flaschen-ID
-    bottle_id = ingredient_name.lower().strip()
-    
-    # Konvertiere Unicode-Escapes zu echten Umlauten falls vorhanden
-    try:
-        bottle_id = bottle_id.encode().decode('unicode_escape')
-    except:
-        pass  # Falls es kein Unicode-Escape ist, ignoriere den Fehler
-    
-    # Ersetze Leerzeichen mit Unterstrichen
-    bottle_id = bottle_id.replace(' ', '_')
-    # Entferne Klammern und deren Inhalt
-    bottle_id = bottle_id.replace('(', '').replace(')', '')
-    # Ersetze Umlaute für bessere Kompatibilität
-    bottle_id = bottle_id.replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue').replace('ß', 'ss')
-    
-    return bottle_id
-
-def get_bottle_id_from_ingredient(ingredient_name):
-    """
-    Erstellt automatisch eine Flaschen-ID aus dem Zutatennamen.
-    Verwendet die zentrale normalize_bottle_id Funktion.
-    """
-    return normalize_bottle_id(ingredient_name)
-
 # Define GPIO pins for each motor here (same as your test).
 # Adjust these if needed to match your hardware.
 MOTORS = [
@@ -115,200 +50,780 @@ MOTORS = [
     (15, 14),  # Pump 12
 ]
 
-# Motor-Controller werden erst bei Bedarf erstellt
-motor_controllers_a = None
-motor_controllers_b = None
+class PumpDriver:
+    """Thread-sichere Ansteuerung aller Pumpen über ihren Index (0-basiert).
 
-def _init_motor_controllers():
-    """Initialisiert die Motor-Controller nur wenn nötig"""
-    global motor_controllers_a, motor_controllers_b
-    if motor_controllers_a is None and not DEBUG:
-        motor_controllers_a = [DigitalOutputDevice(ia) for ia, ib in MOTORS]
-        motor_controllers_b = [DigitalOutputDevice(ib) for ia, ib in MOTORS]
+    Die Pins werden über ein austauschbares Backend geschaltet (gpiozero auf
+    dem Pi, Logging im DEBUG-Modus oder `pump_backend.SimulatedBackend` für
+    Tests). Das Backend wird erst beim ersten Zugriff und genau einmal unter
+    einem Lock initialisiert. Gruppenoperationen schalten mehrere Pumpen in
+    einem Aufruf direkt hintereinander, ohne Unterbrechung durch andere
+    Threads, sodass alle Pumpen einer Gruppe praktisch im selben Moment
+    anlaufen bzw. stoppen.
+    """
+
+    def __init__(self, motors, backend=None):
+        self.motors = list(motors)
+        self._index_by_pins = {pins: index for index, pins in enumerate(self.motors)}
+        self._lock = threading.Lock()
+        self._backend = backend
+        self._ready = False
+
+    @staticmethod
+    def _default_backend():
+        return LoggingBackend() if DEBUG else GpiozeroBackend()
+
+    @property
+    def backend(self):
+        with self._lock:
+            if self._backend is None:
+                self._backend = self._default_backend()
+            return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        with self._lock:
+            self._backend = backend
+            self._ready = False
+
+    def index_of(self, ia, ib):
+        """Gibt den Pumpen-Index für ein Pin-Paar zurück (None, wenn unbekannt)."""
+        return self._index_by_pins.get((ia, ib))
+
+    def _ensure_backend(self):
+        # Muss unter self._lock aufgerufen werden
+        if self._backend is None:
+            self._backend = self._default_backend()
+        if not self._ready:
+            self._backend.setup([pin for pins in self.motors for pin in pins])
+            self._ready = True
+        return self._backend
+
+    def setup(self):
+        """Initialisiert alle Motor-Pins (nur beim ersten Aufruf)."""
+        with self._lock:
+            self._ensure_backend()
+
+    def _write(self, pump_indices, a_on, b_on):
+        motors = [self.motors[i] for i in pump_indices]
+        # Erst alle B-Pins, dann alle A-Pins setzen: so ändert sich der Motorzustand
+        # aller Pumpen der Gruppe direkt hintereinander
+        pin_values = [(ib, b_on) for ia, ib in motors] + [(ia, a_on) for ia, ib in motors]
+        with self._lock:
+            self._ensure_backend().write(pin_values)
+
+    def forward(self, pump_indices):
+        """Startet eine oder mehrere Pumpen vorwärts."""
+        self._write(pump_indices, True, False)
+
+    def stop(self, pump_indices):
+        """Stoppt eine oder mehrere Pumpen."""
+        self._write(pump_indices, False, False)
+
+    def reverse(self, pump_indices):
+        """Lässt eine oder mehrere Pumpen rückwärts laufen."""
+        self._write(pump_indices, False, True)
+
+pump_driver = PumpDriver(MOTORS)
+pump_clock = MonotonicClock()
+
+def set_pump_backend(backend, clock=None):
+    """Tauscht das Pumpen-Backend (und die Uhr) prozessweit aus.
+
+    Ohne `clock` wird die Uhr des Backends verwendet, falls es eine hat
+    (z.B. `SimulatedBackend` mit `VirtualClock`), sonst die echte Zeit. Der
+    laufende PourScheduler wird beendet, der nächste verwendet die neue Uhr.
+    """
+    global pump_clock
+    shutdown_pour_scheduler()
+    pump_driver.backend = backend
+    pump_clock = clock or getattr(backend, 'clock', None) or MonotonicClock()
 
 def setup_gpio():
     """Set up all motor pins for OUTPUT."""
-    if DEBUG:
-        logger.debug('setup_gpio() called — Not actually initializing GPIO pins.')
-    else:
-        _init_motor_controllers()
-        logger.debug('GPIO pins initialized with gpiozero')
+    pump_driver.setup()
+    logger.debug(f'GPIO pins initialized with {type(pump_driver.backend).__name__}')
+
+def _pump_index_for_pins(ia, ib):
+    index = pump_driver.index_of(ia, ib)
+    if index is None:
+        logger.warning(f'No pump configured for pins ({ia}, {ib})')
+    return index
 
 def motor_forward(ia, ib):
     """Drive motor forward."""
-    if DEBUG:
-        logger.debug(f'motor_forward({ia}, {ib}) called')
-    else:
-        _init_motor_controllers()
-        for i, (motor_ia, motor_ib) in enumerate(MOTORS):
-            if motor_ia == ia and motor_ib == ib:
-                motor_controllers_a[i].on()
-                motor_controllers_b[i].off()
-                break
+    index = _pump_index_for_pins(ia, ib)
+    if index is not None:
+        pump_driver.forward([index])
 
 def motor_stop(ia, ib):
     """Stop motor."""
-    if DEBUG:
-        logger.debug(f'motor_stop({ia}, {ib}) called')
-    else:
-        _init_motor_controllers()
-        for i, (motor_ia, motor_ib) in enumerate(MOTORS):
-            if motor_ia == ia and motor_ib == ib:
-                motor_controllers_a[i].off()
-                motor_controllers_b[i].off()
-                break
+    index = _pump_index_for_pins(ia, ib)
+    if index is not None:
+        pump_driver.stop([index])
 
 def motor_reverse(ia, ib):
     """Drive motor in reverse."""
-    if DEBUG:
-        logger.debug(f'motor_reverse({ia}, {ib}) called')
-    else:
-        _init_motor_controllers()
-        for i, (motor_ia, motor_ib) in enumerate(MOTORS):
-            if motor_ia == ia and motor_ib == ib:
-                motor_controllers_a[i].off()
-                motor_controllers_b[i].on()
-                break
+    index = _pump_index_for_pins(ia, ib)
+    if index is not None:
+        pump_driver.reverse([index])
+
+class PumpRun:
+    """Ein einzelner, zeitgesteuerter Pumpvorgang mit geplanter und tatsächlicher Laufzeit."""
+
+    def __init__(self, pump_index, planned_seconds, on_done=None):
+        self.pump_index = pump_index
+        self.planned_seconds = planned_seconds
+        self.on_done = on_done
+        self.started_at = None
+        self.stopped_at = None
+        self.finished = threading.Event()
+
+    @property
+    def actual_seconds(self):
+        if self.started_at is None or self.stopped_at is None:
+            return None
+        return self.stopped_at - self.started_at
+
+    @property
+    def error_seconds(self):
+        actual = self.actual_seconds
+        return None if actual is None else actual - self.planned_seconds
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def as_dict(self):
+        return {
+            'pump': self.pump_index + 1,
+            'planned_seconds': self.planned_seconds,
+            'actual_seconds': self.actual_seconds,
+            'error_seconds': self.error_seconds,
+        }
+
+class PumpTimingEngine:
+    """Steuert alle Pumpen-Stoppzeiten aus einem einzigen Thread.
+
+    Die Stopp-Deadlines liegen in einem Min-Heap auf der Uhr `clock`
+    (standardmäßig `pump_clock`, also `time.monotonic()`). Der Thread schläft
+    bis kurz vor die nächste Deadline und wartet die letzten `spin_seconds`
+    aktiv ab, damit Pumpen auf unter eine Millisekunde genau stoppen. Mit einer
+    `VirtualClock` springt die Uhr stattdessen direkt zur nächsten Deadline.
+    Für jede Pumpe wird die tatsächliche gegen die geplante Laufzeit in
+    `history` protokolliert.
+    """
+
+    def __init__(self, driver=None, clock=None, spin_seconds=None, history_size=500):
+        self.driver = driver or pump_driver
+        self.clock = clock or pump_clock
+        self.spin_seconds = self.clock.spin_seconds if spin_seconds is None else spin_seconds
+        self.history = collections.deque(maxlen=history_size)
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.closed = False
+
+    def start(self, pump_index, seconds, on_done=None):
+        """Schaltet eine Pumpe ein und plant ihren Stopp nach `seconds` Sekunden."""
+        return self.start_many([(pump_index, seconds, on_done)])[0]
+
+    def start_many(self, jobs):
+        """Schaltet mehrere Pumpen im selben Moment ein.
+
+        `jobs` ist eine Liste von (pump_index, seconds, on_done) Tupeln.
+        """
+        runs = [PumpRun(pump_index, max(0.0, float(seconds)), on_done) for pump_index, seconds, on_done in jobs]
+        if not runs:
+            return runs
+        with self._condition:
+            if self.closed:
+                raise RuntimeError('PumpTimingEngine wurde bereits heruntergefahren')
+            self._ensure_thread()
+            self.driver.forward([run.pump_index for run in runs])
+            started_at = self.clock.now()
+            for run in runs:
+                run.started_at = started_at
+                heapq.heappush(self._heap, (started_at + run.planned_seconds, next(self._sequence), run))
+            self._condition.notify()
+        return runs
+
+    def call_at(self, deadline, callback):
+        """Ruft `callback()` im Timer-Thread auf, sobald die Uhr `deadline` erreicht.
+
+        Damit lassen sich z.B. zeitversetzte Pumpenstarts auf derselben Uhr und im
+        selben Thread wie die Stopps planen.
+        """
+        with self._condition:
+            if self.closed:
+                raise RuntimeError('PumpTimingEngine wurde bereits heruntergefahren')
+            self._ensure_thread()
+            heapq.heappush(self._heap, (deadline, next(self._sequence), callback))
+            self._condition.notify()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name='tipsy-pump-timer', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while self._running and not self._heap:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                deadline = self._heap[0][0]
+                if self.clock.now() < deadline - self.spin_seconds:
+                    # Neue, frühere Deadlines wecken den Thread über notify()
+                    self.clock.wait_until(self._condition, deadline - self.spin_seconds)
+                    continue
+            while self.clock.now() < deadline:
+                pass
+            due = []
+            with self._condition:
+                now = self.clock.now()
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[2])
+            runs = [item for item in due if isinstance(item, PumpRun)]
+            if runs:
+                self._stop(runs)
+            for item in due:
+                if not isinstance(item, PumpRun):
+                    try:
+                        item()
+                    except Exception:
+                        logger.exception('Error in scheduled pump timer callback')
+
+    def _stop(self, runs):
+        try:
+            self.driver.stop([run.pump_index for run in runs])
+        except Exception as e:
+            logger.error(f'Error stopping pumps {[run.pump_index + 1 for run in runs]}: {e}')
+        stopped_at = self.clock.now()
+        for run in runs:
+            run.stopped_at = stopped_at
+            self.history.append(run)
+            run.finished.set()
+            if run.on_done:
+                try:
+                    run.on_done(run)
+                except Exception:
+                    logger.exception(f'Error in on_done callback of pump {run.pump_index + 1}')
+
+    def get_timing_report(self):
+        """Gibt geplante und tatsächliche Laufzeit aller protokollierten Pumpvorgänge zurück."""
+        return [run.as_dict() for run in list(self.history)]
+
+    def shutdown(self):
+        """Stoppt sofort alle laufenden Pumpen und beendet den Timer-Thread."""
+        with self._condition:
+            self.closed = True
+            self._running = False
+            pending = [entry[2] for entry in self._heap if isinstance(entry[2], PumpRun)]
+            self._heap = []
+            self._condition.notify_all()
+        if pending:
+            self._stop(pending)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
 
 class Pour:
     def __str__(self):
         return f'{self.ingredient_name}: {round(self.amount)} ml.'
 
-    def __init__(self, pump_index, amount, ingredient_name):
+    def __init__(self, pump_index, amount, ingredient_name, seconds=None):
         self.pump_index = pump_index
         self.amount = amount  # amount ist jetzt in ml
         self.ingredient_name = ingredient_name
+        self.seconds = seconds  # vorberechnete Pumpzeit aus dem PourPlan
         self.running = False
+        self.pump_run = None
 
-    def run(self):
-        self.running = True
-        ia, ib = MOTORS[self.pump_index]
-
+    @property
+    def pump_coefficient(self):
         # Verwende pumpenspezifischen Kalibrierungskoeffizienten
         pump_number = self.pump_index + 1  # pump_index ist 0-basiert, aber wir brauchen 1-basierte Nummer
         # Nutze ggf. kohlensäure-Koeffizienten
-        carbonated = getattr(self, 'carbonated', False)
-        pump_coefficient = get_pump_coefficient(pump_number, carbonated=carbonated)
+        return get_pump_coefficient(pump_number, carbonated=getattr(self, 'carbonated', False))
 
+    @property
+    def seconds_to_pour(self):
+        if self.seconds is not None:
+            return self.seconds
         # Berechne Pumpzeit basierend auf pumpenspezifischem Koeffizienten
-        seconds_to_pour = self.amount * pump_coefficient
+        return self.amount * self.pump_coefficient
 
-        # Kein Retract mehr: Membranpumpen können nicht rückwärts laufen
+    def _job(self, on_done=None):
+        """Bereitet den Pour für PumpTimingEngine.start_many vor."""
+        pump_coefficient = self.pump_coefficient
+        seconds_to_pour = self.seconds_to_pour
 
-        logger.info(f'Pouring {self.amount} ml of Pump {pump_number} for {seconds_to_pour:.2f} seconds using coefficient {pump_coefficient:.4f} (carbonated={carbonated}).')
-        motor_forward(ia, ib)
-        time.sleep(seconds_to_pour)
+        # Kein Retract mehr: Membranpumpen können nicht rückwärts laufen
 
-        # Retract entfällt vollständig
+        logger.info(f'Pouring {self.amount} ml of Pump {self.pump_index + 1} for {seconds_to_pour:.2f} seconds using coefficient {pump_coefficient:.4f} (carbonated={getattr(self, "carbonated", False)}).')
 
-        motor_stop(ia, ib)
-        self.running = False
+        def finished(run):
+            self.running = False
+            if on_done:
+                on_done(self)
 
-def prime_pumps(duration=2):
-    """
-    Primes all pumps with assigned ingredients simultaneously for `duration` seconds.
-    """
-    import json
-    
-    # Lade Pumpen-Konfiguration
+        self.running = True
+        return self.pump_index, seconds_to_pour, finished
+
+    def start(self, engine, on_done=None):
+        """Startet den Pour über die PumpTimingEngine, ohne zu blockieren."""
+        return Pour.start_all([self], engine, on_done)[0]
+
+    @staticmethod
+    def start_all(pours, engine, on_done=None):
+        """Startet mehrere Pours gleichzeitig als eine Gruppe."""
+        runs = engine.start_many([pour._job(on_done) for pour in pours])
+        for pour, run in zip(pours, runs):
+            pour.pump_run = run
+        return runs
+
+    def run(self, engine=None):
+        """Führt den Pour aus und blockiert, bis die Pumpe gestoppt wurde."""
+        if engine is None:
+            engine = get_pour_scheduler().timing_engine
+        self.start(engine).wait()
+
+def get_assigned_pumps():
+    """Gibt [(pump_index, ingredient)] aller Pumpen mit zugeordneter Zutat zurück."""
     try:
-        with open('pump_config.json', 'r') as f:
+        with open(CONFIG_FILE, 'r') as f:
             pump_config = json.load(f)
     except Exception as e:
         logger.error(f'Could not load pump config: {e}')
-        return
-    
-    setup_gpio()
-    
-    # Sammle alle Pumpen mit zugeordneten Zutaten
-    active_pumps = []
+        return []
+
+    assigned = []
     for pump_label, config in pump_config.items():
-        if isinstance(config, dict) and config.get('ingredient', '').strip():
-            try:
-                pump_num = int(pump_label.replace('Pump', '').strip())
-                pump_index = pump_num - 1
-                if 0 <= pump_index < len(MOTORS):
-                    ia, ib = MOTORS[pump_index]
-                    active_pumps.append((pump_num, ia, ib, config['ingredient']))
-            except (ValueError, IndexError) as e:
-                logger.warning(f'Could not parse pump {pump_label}: {e}')
-    
-    if not active_pumps:
-        logger.info('No pumps with assigned ingredients found for priming')
-        return
-    
-    try:
-        # Starte alle aktiven Pumpen gleichzeitig
-        logger.info(f'Priming {len(active_pumps)} pumps simultaneously for {duration} seconds...')
-        for pump_num, ia, ib, ingredient in active_pumps:
-            logger.info(f'Starting pump {pump_num} ({ingredient})')
-            motor_forward(ia, ib)
-        
-        # Warte die angegebene Zeit
-        time.sleep(duration)
-        
-        # Stoppe alle Pumpen gleichzeitig
-        for pump_num, ia, ib, ingredient in active_pumps:
-            logger.info(f'Stopping pump {pump_num} ({ingredient})')
-            motor_stop(ia, ib)
-            
-        logger.info('Priming complete')
-        
-    finally:
-        # Sicherheitshalber alle Pumpen stoppen
-        for pump_num, ia, ib, ingredient in active_pumps:
-            try:
-                motor_stop(ia, ib)
-            except Exception as e:
-                logger.error(f'Error stopping pump {pump_num}: {e}')
-        
-        if not DEBUG:
-            # GPIO cleanup not needed with gpiozero
-            pass
-        else:
-            logger.debug('prime_pumps() complete — no GPIO cleanup in debug mode.')
+        ingredient = config.get('ingredient', '') if isinstance(config, dict) else config
+        if not str(ingredient or '').strip():
+            continue
+        try:
+            pump_index = int(pump_label.replace('Pump', '').strip()) - 1
+        except ValueError as e:
+            logger.warning(f'Could not parse pump {pump_label}: {e}')
+            continue
+        if 0 <= pump_index < len(MOTORS):
+            assigned.append((pump_index, str(ingredient).strip()))
+    return assigned
+
+class MaintenanceRun:
+    """Lässt mehrere Pumpen für Reinigung oder Priming parallel laufen.
+
+    Höchstens `concurrency` Pumpen laufen gleichzeitig (Standard:
+    MAINTENANCE_CONCURRENCY, sonst PUMP_CONCURRENCY - das Strombudget der
+    Versorgung) und zwei Starts liegen mindestens `stagger_seconds`
+    auseinander, damit sich die Einschaltströme nicht addieren. Die längsten
+    Läufe starten zuerst. Starts und Stopps plant die PumpTimingEngine in
+    ihrem Timer-Thread; der Fortschritt steht über `watcher` (PourEvents) und
+    `pump_progress()` bereit.
+    """
 
-def clean_pumps(duration=10):
+    def __init__(self, durations, labels=None, concurrency=None, stagger_seconds=None, engine=None):
+        labels = labels or {}
+        self.engine = engine or get_pour_scheduler().timing_engine
+        self.concurrency = max(1, int(concurrency or MAINTENANCE_CONCURRENCY or PUMP_CONCURRENCY))
+        self.stagger_seconds = max(0.0, PUMP_STAGGER_SECONDS if stagger_seconds is None else stagger_seconds)
+        ordered = sorted(durations.items(), key=lambda item: (-item[1], item[0]))
+        self.pours = [Pour(pump_index, 0, labels.get(pump_index, f'Pump {pump_index + 1}'), seconds=seconds)
+                      for pump_index, seconds in ordered]
+        self.watcher = ExecutorWatcher()
+        self.watcher.pours = self.pours
+        self.watcher.predicted_seconds = predict_makespan([pour.seconds for pour in self.pours], self.concurrency)
+        self._pending = collections.deque(self.pours)
+        self._running = 0
+        self._finished = 0
+        self._next_start = None
+        self._timer_pending = False
+        self._lock = threading.RLock()
+
+    def percent(self):
+        """Fortschritt aller Pumpen zusammen in Prozent (nach Laufzeit)."""
+        total = sum(pour.seconds for pour in self.pours)
+        if total <= 0:
+            return 100.0 if self.watcher.done() else 0.0
+        return sum(pour.seconds * self._fraction(pour) for pour in self.pours) / total * 100.0
+
+    def pump_progress(self):
+        """Fortschritt je Pumpe: {Pumpennummer (1-basiert): Prozent}."""
+        return {pour.pump_index + 1: self._fraction(pour) * 100.0 for pour in self.pours}
+
+    def _fraction(self, pour):
+        run = pour.pump_run
+        if run is None or run.started_at is None:
+            return 0.0
+        if run.finished.is_set() or run.planned_seconds <= 0:
+            return 1.0
+        return min(1.0, (self.engine.clock.now() - run.started_at) / run.planned_seconds)
+
+    def start(self):
+        """Startet den Lauf, ohne zu blockieren."""
+        self.watcher.publish('accepted', percent=0.0)
+        if not self.pours:
+            self.watcher.publish('done', percent=100.0)
+            return self
+        self.watcher.predicted_completion = self.engine.clock.now() + self.watcher.predicted_seconds
+        # Auch der erste Start läuft im Timer-Thread, so bleibt die Reihenfolge deterministisch
+        self.engine.call_at(self.engine.clock.now(), self._fill_slots)
+        return self
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer_pending = False
+            self._fill_slots()
+
+    def _fill_slots(self):
+        with self._lock:
+            while self._pending and self._running < self.concurrency:
+                now = self.engine.clock.now()
+                if self._next_start is not None and now < self._next_start:
+                    if not self._timer_pending:
+                        self._timer_pending = True
+                        self.engine.call_at(self._next_start, self._on_timer)
+                    return
+                pour = self._pending.popleft()
+                self._running += 1
+                self._next_start = now + self.stagger_seconds
+                self.watcher.publish('pump_started', percent=self.percent(), pour=pour)
+                try:
+                    pour.start(self.engine, on_done=self._pour_done)
+                except Exception as e:
+                    logger.error(f'Error starting pump {pour.pump_index + 1}: {e}')
+                    pour.running = False
+                    self._pour_done(pour, message=f'Fehler: {e}')
+
+    def _pour_done(self, pour, message=None):
+        with self._lock:
+            self._running -= 1
+            self._finished += 1
+            self.watcher.publish('pump_finished', percent=self.percent(), pour=pour, message=message)
+            if self._finished >= len(self.pours):
+                self.watcher.publish('done', percent=100.0)
+                return
+            self._fill_slots()
+
+    def run(self, on_progress=None, interval=0.5):
+        """Startet den Lauf und blockiert bis zum Ende.
+
+        `on_progress(pump_progress)` wird alle `interval` Sekunden und am Ende im
+        aufrufenden Thread aufgerufen.
+        """
+        self.start()
+        while not self.watcher.wait(interval):
+            if self.engine.closed:
+                self.watcher.publish('failed', message='PumpTimingEngine wurde heruntergefahren')
+                break
+            if on_progress:
+                on_progress(self.pump_progress())
+        if on_progress:
+            on_progress(self.pump_progress())
+        return [pour.pump_run for pour in self.pours]
+
+def run_maintenance(mode, duration, durations=None, only_assigned=False, concurrency=None, stagger_seconds=None, on_progress=None):
+    """Gemeinsamer Ablauf von clean_pumps und prime_pumps."""
+    setup_gpio()
+    assigned = dict(get_assigned_pumps())
+    if only_assigned:
+        pump_indices = sorted(assigned)
+    else:
+        pump_indices = list(range(len(MOTORS)))
+    if durations is not None:
+        # Eigene Laufzeiten je Pumpe: {Pumpennummer (1-basiert): Sekunden}
+        durations = {int(pump_number) - 1: seconds for pump_number, seconds in durations.items()
+                     if int(pump_number) - 1 in pump_indices}
+    else:
+        durations = {pump_index: duration for pump_index in pump_indices}
+
+    if not durations:
+        logger.info(f'No pumps found for {mode}')
+        return []
+
+    labels = {pump_index: assigned.get(pump_index, f'Pump {pump_index + 1}') for pump_index in durations}
+    maintenance = MaintenanceRun(durations, labels, concurrency=concurrency, stagger_seconds=stagger_seconds)
+    logger.info(f'{mode}: {len(durations)} pumps, up to {maintenance.concurrency} at once, '
+                f'{maintenance.stagger_seconds:.2f}s stagger, about {maintenance.watcher.predicted_seconds:.1f}s: ' +
+                ', '.join(f'{pump_index + 1} ({labels[pump_index]})' for pump_index in durations))
+    runs = maintenance.run(on_progress=on_progress)
+    logger.info(f'{mode} complete')
+    return runs
+
+def prime_pumps(duration=2, durations=None, concurrency=None, stagger_seconds=None, on_progress=None):
     """
-    Run each pump forward for `duration` seconds (one after another) to flush/clean lines.
+    Primes all pumps with assigned ingredients for `duration` seconds, running them in parallel.
     """
-    setup_gpio()
-    try:
-        for index, (ia, ib) in enumerate(MOTORS, start=1):
-            logger.info(f'Flushing pump {index} forward for {duration} seconds (cleaning)...')
-            motor_forward(ia, ib)
-            time.sleep(duration)
-            motor_stop(ia, ib)
-    finally:
-        if not DEBUG:
-            # GPIO cleanup not needed with gpiozero
-            pass
-        else:
-            logger.debug('clean_pumps() complete — no GPIO cleanup in debug mode.')
+    return run_maintenance('Priming', duration, durations, only_assigned=True, concurrency=concurrency,
+                           stagger_seconds=stagger_seconds, on_progress=on_progress)
+
+def clean_pumps(duration=10, durations=None, only_assigned=False, concurrency=None, stagger_seconds=None, on_progress=None):
+    """
+    Run pumps forward for `duration` seconds to flush/clean lines, in parallel groups
+    capped by MAINTENANCE_CONCURRENCY / PUMP_CONCURRENCY with staggered starts.
+    """
+    return run_maintenance('Cleaning', duration, durations, only_assigned=only_assigned, concurrency=concurrency,
+                           stagger_seconds=stagger_seconds, on_progress=on_progress)
+
+class PourEvent(NamedTuple):
+    """Fortschritts-Ereignis eines Drinks (siehe ExecutorWatcher.subscribe).
+
+    `kind` ist eines von 'accepted', 'pump_started', 'progress',
+    'pump_finished', 'done' oder 'failed'. `percent` ist der Fortschritt des
+    ganzen Drinks (nach ml), `pump_index` und `ingredient_name` sind nur bei
+    Pumpen-Ereignissen gesetzt.
+    """
+    kind: str
+    timestamp: float
+    percent: float
+    pump_index: Optional[int] = None
+    ingredient_name: Optional[str] = None
+    message: Optional[str] = None
 
 class ExecutorWatcher:
+    """Handle eines Drinks, der Fortschritts-Ereignisse veröffentlicht.
+
+    Statt `done()` in einer Schleife abzufragen, können Aufrufer sich mit
+    `subscribe(callback)` für alle PourEvents registrieren, mit `wait(timeout)`
+    blockierend warten oder in asyncio-Code `await watcher` verwenden.
+    Callbacks laufen im Thread, der das Ereignis auslöst, und sollten nicht
+    blockieren. Späte Abonnenten erhalten zuerst alle bisherigen Ereignisse.
+    """
+
+    FINAL_EVENTS = ('done', 'failed')
 
     def __init__(self):
         self.executors = []
         self.pours = []
+        # Vorhergesagte Dauer in Sekunden und Fertigstellung (Zeit der Pumpen-Uhr), sobald geplant
+        self.predicted_seconds = None
+        self.predicted_completion = None
+        self.events = []
+        self.percent = 0.0
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._finished = threading.Event()
 
     def done(self):
-        if any([not executor.done() for executor in self.executors]):
-            return False
-        return True
+        return self._finished.is_set()
+
+    @property
+    def failed(self):
+        return self.done() and self.events[-1].kind == 'failed'
+
+    def wait(self, timeout=None):
+        """Blockiert bis der Drink fertig oder fehlgeschlagen ist. Gibt False bei Timeout zurück."""
+        return self._finished.wait(timeout)
+
+    async def wait_async(self):
+        """Wartet in asyncio-Code auf das Ende und gibt das letzte PourEvent zurück."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(event):
+            if not future.done():
+                future.set_result(event)
+
+        def on_event(event):
+            if event.kind in self.FINAL_EVENTS:
+                loop.call_soon_threadsafe(resolve, event)
+
+        unsubscribe = self.subscribe(on_event)
+        try:
+            return await future
+        finally:
+            unsubscribe()
+
+    def __await__(self):
+        return self.wait_async().__await__()
+
+    def subscribe(self, callback):
+        """Registriert `callback(event)` für alle Ereignisse und gibt eine Abmelde-Funktion zurück."""
+        with self._lock:
+            for event in self.events:
+                self._deliver(callback, event)
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def publish(self, kind, percent=None, pour=None, message=None):
+        """Veröffentlicht ein Ereignis an alle Abonnenten (nach dem Ende werden keine mehr angenommen)."""
+        with self._lock:
+            if self.done():
+                return None
+            if percent is not None:
+                self.percent = percent
+            event = PourEvent(kind, pump_clock.now(), self.percent,
+                              pour.pump_index if pour else None,
+                              pour.ingredient_name if pour else None,
+                              message)
+            self.events.append(event)
+            for callback in list(self._subscribers):
+                self._deliver(callback, event)
+            if kind in self.FINAL_EVENTS:
+                self._finished.set()
+        return event
+
+    def _deliver(self, callback, event):
+        try:
+            callback(event)
+        except Exception:
+            logger.exception(f'Error in pour event subscriber for "{event.kind}"')
+
+    def _executor_done(self, future):
+        # Fallback, falls pour_plan selbst kein Endereignis veröffentlicht hat
+        if future.cancelled():
+            self.publish('failed', message='Auftrag abgebrochen')
+        elif future.exception() is not None:
+            self.publish('failed', message=str(future.exception()))
+        else:
+            self.publish('done', percent=100.0)
+
+class PourScheduler:
+    """Prozessweiter Pour-Scheduler mit festem Thread-Pool.
+
+    Drinks werden über `submit` angenommen und nacheinander von einem einzigen
+    Order-Thread vorbereitet (es steht nur ein Glas unter den Pumpen). Ein- und
+    Ausschalten der Pumpen übernimmt die PumpTimingEngine mit einem einzigen
+    Timer-Thread; höchstens `PUMP_CONCURRENCY` Pumpen laufen gleichzeitig. Die
+    Anzahl der Threads bleibt damit konstant, egal wie viele Drinks ausgegeben
+    werden.
+    """
+
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, pump_workers=None):
+        self.pump_workers = max(1, int(pump_workers or PUMP_CONCURRENCY))
+        self._order_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='tipsy-order')
+        self.timing_engine = PumpTimingEngine()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def submit(self, plan):
+        """Nimmt einen PourPlan an und gibt einen ExecutorWatcher als Handle zurück."""
+        watcher = ExecutorWatcher()
+        with self._lock:
+            if self.closed:
+                raise RuntimeError('PourScheduler wurde bereits heruntergefahren')
+            watcher.publish('accepted', percent=0.0, message=plan.cocktail_name)
+            future = self._order_executor.submit(pour_plan, plan, watcher, self)
+        watcher.executors.append(future)
+        future.add_done_callback(watcher._executor_done)
+        return watcher
+
+    def pour_all(self, pours, watcher=None):
+        """Startet alle Pours mit höchstens `pump_workers` gleichzeitig laufenden Pumpen und wartet auf das Ende.
+
+        Die erste Gruppe startet gleichzeitig. Jeder weitere Pour wird direkt im
+        Stopp-Callback der PumpTimingEngine gestartet, also im selben Moment, in
+        dem ein Slot frei wird - ohne Umweg über den Order-Thread. Mit `watcher`
+        werden pump_started/pump_finished und alle `PROGRESS_INTERVAL` Sekunden
+        ein progress-Ereignis veröffentlicht.
+        """
+        if not pours:
+            return []
+        pending = collections.deque(pours[self.pump_workers:])
+        remaining = [len(pours)]
+        lock = threading.Lock()
+        all_done = threading.Event()
+        clock = self.timing_engine.clock
+        total_ml = sum(pour.amount for pour in pours)
+
+        def percent():
+            poured = 0.0
+            for pour in pours:
+                run = pour.pump_run
+                if run is None or run.started_at is None:
+                    continue
+                if run.finished.is_set() or run.planned_seconds <= 0:
+                    fraction = 1.0
+                else:
+                    fraction = min(1.0, (clock.now() - run.started_at) / run.planned_seconds)
+                poured += fraction * (pour.amount if total_ml > 0 else 1)
+            return 100.0 * poured / (total_ml if total_ml > 0 else len(pours))
+
+        def publish(kind, pour=None, message=None):
+            if watcher is not None:
+                watcher.publish(kind, percent=percent(), pour=pour, message=message)
+
+        def start_next(finished_pour, message=None):
+            publish('pump_finished', finished_pour, message=message)
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] <= 0:
+                    all_done.set()
+                if not pending:
+                    return
+                next_pour = pending.popleft()
+            publish('pump_started', next_pour)
+            try:
+                next_pour.start(self.timing_engine, on_done=start_next)
+            except Exception as e:
+                logger.exception(f'Error starting pump {next_pour.pump_index + 1}')
+                next_pour.running = False
+                start_next(next_pour, message=f'Fehler: {e}')
+
+        first_group = pours[:self.pump_workers]
+        for pour in first_group:
+            publish('pump_started', pour)
+        try:
+            Pour.start_all(first_group, self.timing_engine, on_done=start_next)
+        except Exception:
+            logger.exception('Error starting pumps')
+            for pour in pours:
+                pour.running = False
+            raise
+        while not all_done.wait(self.PROGRESS_INTERVAL):
+            publish('progress')
+        return [pour.pump_run for pour in pours]
+
+    def shutdown(self, wait=True):
+        """Nimmt keine neuen Drinks mehr an, verwirft wartende Aufträge und beendet alle Worker."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        self._order_executor.shutdown(wait=wait, cancel_futures=True)
+        self.timing_engine.shutdown()
+        logger.debug('PourScheduler heruntergefahren')
+
+_pour_scheduler = None
+_pour_scheduler_lock = threading.Lock()
+
+def get_pour_scheduler():
+    """Gibt den prozessweiten PourScheduler zurück und erstellt ihn bei Bedarf."""
+    global _pour_scheduler
+    with _pour_scheduler_lock:
+        if _pour_scheduler is None or _pour_scheduler.closed:
+            _pour_scheduler = PourScheduler()
+        return _pour_scheduler
+
+def shutdown_pour_scheduler(wait=True):
+    """Fährt den prozessweiten PourScheduler herunter (z.B. beim Beenden der Anwendung)."""
+    global _pour_scheduler
+    with _pour_scheduler_lock:
+        scheduler, _pour_scheduler = _pour_scheduler, None
+    if scheduler is not None:
+        scheduler.shutdown(wait=wait)
+
+atexit.register(shutdown_pour_scheduler)
 
 def calculate_volume_scaling(ingredients, target_volume_ml):
     """Berechnet den Skalierungsfaktor basierend auf Zielvolumen"""
     # Berechne aktuelles Gesamtvolumen des Rezepts
     current_total = 0
     for ingredient_name, measurement_str in ingredients.items():
-        parts = measurement_str.split()
-        if parts:
-            try:
-                ml_amount = float(parts[0])
-                current_total += ml_amount
-            except ValueError:
-                continue
+        ml_amount = parse_ml(measurement_str)
+        if ml_amount is not None:
+            current_total += ml_amount
     
     if current_total <= 0:
         return 1.0
@@ -317,120 +832,69 @@ def calculate_volume_scaling(ingredients, target_volume_ml):
     scaling_factor = target_volume_ml / current_total
     return scaling_factor
 
-def pour_ingredients(ingredients, single_or_double, pump_config, parent_watcher):
-    # Importiere Settings für Cocktail-Größen und PUMP_CONCURRENCY
-    from settings import SMALL_COCKTAIL_SIZE_ML, LARGE_COCKTAIL_SIZE_ML, PUMP_CONCURRENCY
-    
-    executor = concurrent.futures.ThreadPoolExecutor(max_workers=PUMP_CONCURRENCY)
-    executor_watcher = ExecutorWatcher()
-    
-    # Bestimme Zielvolumen basierend auf Größe
-    if single_or_double.lower() == 'double':
-        target_volume_ml = LARGE_COCKTAIL_SIZE_ML
-    else:
-        target_volume_ml = SMALL_COCKTAIL_SIZE_ML
-    
-    # Berechne Skalierungsfaktor basierend auf Zielvolumen
-    scaling_factor = calculate_volume_scaling(ingredients, target_volume_ml)
-    
-    logger.info(f'Cocktail-Größe: {single_or_double}, Zielvolumen: {target_volume_ml}ml, Skalierungsfaktor: {scaling_factor:.3f}')
-    
-    index = 1
-
-    # Überprüfe zuerst alle Flaschen-Füllstände
-    ingredients_to_pour = []
-    for ingredient_name, measurement_str in sorted(ingredients.items(), key=lambda x: x[1], reverse=True):
-        parts = measurement_str.split()
-        if not parts:
-            logger.critical(f'Cannot parse measurement for {ingredient_name}. Skipping.')
-            continue
-        try:
-            ml_amount = float(parts[0])  # parse numeric (direkt in ml)
-        except ValueError:
-            logger.critical(f'Cannot parse numeric amount "{parts[0]}" for {ingredient_name}. Skipping.')
-            continue
-
-        ml_needed = ml_amount * scaling_factor
-
-        # Überprüfe Flaschen-Füllstand
-        # Erstelle Flaschen-ID automatisch aus Zutatennamen (normalisiert)
-        bottle_id = normalize_bottle_id(ingredient_name)
-
-        logger.info(f'Überprüfe Flasche: {ingredient_name} -> bottle_id: {bottle_id}, benötigt: {ml_needed:.1f}ml')
-
-        if not bottle_monitor.consume_liquid(bottle_id, ml_needed):
-            logger.error(f'Flasche {ingredient_name} (ID: {bottle_id}) hat nicht genug Flüssigkeit für {ml_needed:.1f}ml')
-            # Stoppe alle Pumpen und gebe Fehler zurück
-            if not DEBUG:
-                # GPIO cleanup not needed with gpiozero
-                pass
-            return None
-        else:
-            logger.info(f'Flasche {ingredient_name} (ID: {bottle_id}) hat genug Flüssigkeit. Verbraucht: {ml_needed:.1f}ml')
-
-        ingredients_to_pour.append((ingredient_name, ml_needed))
+def pour_ingredients(ingredients, single_or_double, pump_config, parent_watcher, scheduler=None):
+    """Kompiliert ein Rezept ad hoc und gibt es aus (für Aufrufer ohne PourPlan)."""
+    pump_lookup = build_pump_lookup(pump_config, len(MOTORS))
+    pump_groups = build_pump_groups(pump_config, len(MOTORS))
+    target_volume_ml = LARGE_COCKTAIL_SIZE_ML if single_or_double.lower() == 'double' else SMALL_COCKTAIL_SIZE_ML
+    plan = compile_recipe('', ingredients, single_or_double.lower(), target_volume_ml, pump_lookup, canonical_id,
+                          pump_groups=pump_groups)
+    return pour_plan(plan, parent_watcher, scheduler)
+
+def pour_plan(plan, parent_watcher, scheduler=None):
+    """Gibt einen vorkompilierten PourPlan aus - ohne Parsen oder Pumpensuche."""
+    if scheduler is None:
+        scheduler = get_pour_scheduler()
+
+    logger.info(f'Cocktail-Größe: {plan.size}, Zielvolumen: {plan.target_volume_ml}ml, Skalierungsfaktor: {plan.scaling_factor:.3f}')
+
+    # Alle Flaschen in einem Schritt prüfen und reservieren (ein Lesen, ein Schreiben)
+    for item in plan.ingredients:
+        logger.info(f'Überprüfe Flasche: {item.ingredient_name} -> bottle_id: {item.bottle_id}, benötigt: {item.ml:.1f}ml')
+    reservation = bottle_monitor.reserve([(item.bottle_id, item.ml) for item in plan.ingredients])
+    if reservation is None:
+        logger.error('Nicht genug Flüssigkeit für alle Zutaten - es wurde nichts abgezogen')
+        parent_watcher.publish('failed', message='Nicht genug Flüssigkeit')
+        return None
 
     # Jetzt alle Zutaten ausgeben
-    for ingredient_name, ml_needed in ingredients_to_pour:
-        # find a matching pump label in pump_config (supports legacy and extended formats)
-        chosen_pump = None
-        for pump_label, config_entry in pump_config.items():
-            # extended format: { "ingredient": "gin", "carbonated": true }
-            if isinstance(config_entry, dict):
-                config_ing_name = config_entry.get('ingredient', '')
-                is_carbonated = bool(config_entry.get('carbonated', False))
-            else:
-                config_ing_name = config_entry
-                is_carbonated = False
-
-            if str(config_ing_name).strip().lower() == ingredient_name.strip().lower():
-                chosen_pump = (pump_label, is_carbonated)
-                break
-
-        if not chosen_pump:
-            logger.critical(f'No pump mapped to ingredient "{ingredient_name}". Skipping.')
-            continue
-
-        # parse 'Pump 1' -> index=0
-        try:
-            pump_label = chosen_pump[0] if isinstance(chosen_pump, tuple) else chosen_pump
-            pump_num_str = pump_label.replace('Pump', '').strip()
-            pump_index = int(pump_num_str) - 1
-        except ValueError:
-            logger.critical(f'Could not parse pump label "{chosen_pump}". Skipping.')
+    pours = []
+    for item in plan.ingredients:
+        if not item.stripes:
+            logger.critical(f'No pump mapped to ingredient "{item.ingredient_name}". Skipping.')
             continue
+        # Eine Zutat auf mehreren Pumpen wird von allen gleichzeitig ausgegeben
+        for stripe in item.stripes:
+            pour = Pour(stripe.pump_index, stripe.ml, item.ingredient_name, seconds=stripe.seconds)
+            pour.carbonated = stripe.carbonated
+            pours.append(pour)
+
+    # Längste Pumpzeiten zuerst, damit der Drink unter dem Concurrency-Limit möglichst schnell fertig ist
+    pours, predicted_seconds = plan_pour_order(pours, scheduler.pump_workers)
+    parent_watcher.pours.extend(pours)
+    parent_watcher.predicted_seconds = predicted_seconds
+    parent_watcher.predicted_completion = scheduler.timing_engine.clock.now() + predicted_seconds
+    logger.info(f'Voraussichtliche Zubereitungszeit: {predicted_seconds:.1f}s')
+
+    # Alle Pours starten und warten bis sie fertig sind (ohne Busy-Wait)
+    try:
+        scheduler.pour_all(pours, parent_watcher)
+    except Exception:
+        reservation.rollback()
+        raise
+    reservation.commit()
 
-        if pump_index < 0 or pump_index >= len(MOTORS):
-            logger.critical(f'Pump index {pump_index} out of range for "{ingredient_name}". Skipping.')
-            continue
-
-        # Carbonation-Flag ermitteln
-        carbonated_flag = False
-        if isinstance(chosen_pump, tuple):
-            carbonated_flag = bool(chosen_pump[1])
-
-        pour = Pour(pump_index, ml_needed, ingredient_name)
-        pour.carbonated = carbonated_flag
-        parent_watcher.pours.append(pour)
-        executor_watcher.executors.append(executor.submit(pour.run))
-
-        index += 1
+    logger.info("Cocktail-Zubereitung abgeschlossen")
+    parent_watcher.publish('done', percent=100.0)
 
-    # Warten bis alle gestarteten Pours fertig sind (ohne Busy-Wait)
-    concurrent.futures.wait(executor_watcher.executors)
+    if DEBUG:
+        logger.debug('pour_plan() complete — no GPIO cleanup in debug mode.')
 
-    # Nach dem Cocktail-Zubereiten: Flaschen-Status synchronisieren
-    logger.info("Cocktail-Zubereitung abgeschlossen - synchronisiere Flaschen-Status")
-    try:
-        logger.info("Alle Flaschen sind nach Cocktail-Zubereitung konsistent")
-    except Exception as e:
-        logger.error(f"Fehler beim Synchronisieren der Flaschen-Status: {e}")
+pour_plan_cache = PourPlanCache(canonical_id, len(MOTORS))
 
-    if not DEBUG:
-        # GPIO cleanup not needed with gpiozero
-        pass
-    else:
-        logger.debug('pour_ingredients() complete — no GPIO cleanup in debug mode.')
+def get_pour_plan(recipe, single_or_double='single'):
+    """Gibt den (gecachten) PourPlan eines Rezepts für 'single' oder 'double' zurück."""
+    return pour_plan_cache.get_plan(recipe, single_or_double)
 
 def make_drink(recipe, single_or_double="single"):
     """
@@ -440,27 +904,18 @@ def make_drink(recipe, single_or_double="single"):
 
     In debug mode, only prints messages instead of driving motors.
     """
-    # 1) Load the pump config dictionary, e.g. {"Pump 1": "vodka", "Pump 2": "gin", ...}
+    # 1) The pump config must exist, e.g. {"Pump 1": "vodka", "Pump 2": "gin", ...}
     if not os.path.exists(CONFIG_FILE):
         logger.critical(f'pump_config file not found: {CONFIG_FILE}')
         return
 
-    try:
-        with open(CONFIG_FILE, 'r') as f:
-            pump_config = json.load(f)
-    except Exception as e:
-        logger.critical(f'Error reading {CONFIG_FILE}: {e}')
-        return
-
     # 2) Extract the recipe's ingredients
-    ingredients = recipe.get('ingredients', {})
-    if not ingredients:
+    if not recipe.get('ingredients', {}):
         logger.critical('No ingredients found in recipe.')
         return
 
-    setup_gpio()
-    executor = concurrent.futures.ThreadPoolExecutor()
-    executor_watcher = ExecutorWatcher()
-    executor_watcher.executors.append(executor.submit(pour_ingredients, ingredients, single_or_double, pump_config, executor_watcher))
+    # 3) Look up the precompiled plan (recompiled only when the configs change)
+    plan = get_pour_plan(recipe, single_or_double)
 
-    return executor_watcher
\ No newline at end of file
+    setup_gpio()
+    return get_pour_scheduler().submit(plan)
\ No newline at end of file
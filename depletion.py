@@ -0,0 +1,54 @@
+# depletion.py
+import math
+import logging
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DepletionForecast(NamedTuple):
+    """Verbrauchsrate einer Flasche und wann sie voraussichtlich kritisch bzw. leer ist (None = kein Verbrauch)."""
+    bottle_id: str
+    rate_ml_per_hour: float
+    seconds_to_critical: Optional[float]
+    seconds_to_empty: Optional[float]
+
+
+def ewma_rates(events: Iterable[Tuple[float, str, float]], now: float, window_seconds: float) -> Dict[str, float]:
+    """Berechnet je Flasche die exponentiell gewichtete Verbrauchsrate in ml/s.
+
+    `events` sind (zeitstempel, bottle_id, ml). Jeder Verbrauch zählt mit
+    exp(-alter / window_seconds), die Summe geteilt durch window_seconds ist
+    der gleitende Mittelwert der Rate: jüngere Drinks zählen stärker, ein
+    Verbrauch vor drei Fenstern fast nicht mehr.
+    """
+    rates = {}
+    for timestamp, bottle_id, ml in events:
+        weight = math.exp(-max(0.0, now - timestamp) / window_seconds)
+        rates[bottle_id] = rates.get(bottle_id, 0.0) + ml * weight
+    return {bottle_id: max(0.0, total) / window_seconds for bottle_id, total in rates.items()}
+
+
+def forecast_bottle(bottle_id: str, bottle: Dict, rate_ml_per_second: float) -> DepletionForecast:
+    """Sagt aus Füllstand und Rate voraus, wann die Flasche die kritische Schwelle bzw. 0 ml erreicht."""
+    if rate_ml_per_second <= 0:
+        return DepletionForecast(bottle_id, 0.0, None, None)
+    current_ml = bottle["current_ml"]
+    to_critical = max(0.0, current_ml - bottle["critical_threshold_ml"]) / rate_ml_per_second
+    to_empty = max(0.0, current_ml) / rate_ml_per_second
+    return DepletionForecast(bottle_id, rate_ml_per_second * 3600, to_critical, to_empty)
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Formatiert eine Restzeit kurz, z.B. "ca. 2 h 10 min"."""
+    if seconds is None:
+        return "–"
+    minutes = int(round(seconds / 60))
+    if minutes < 1:
+        return "jetzt"
+    if minutes < 60:
+        return f"ca. {minutes} min"
+    hours, minutes = divmod(minutes, 60)
+    if hours >= 48:
+        return f"ca. {round(hours / 24)} Tage"
+    return f"ca. {hours} h {minutes} min" if minutes else f"ca. {hours} h"
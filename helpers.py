@@ -1,9 +1,9 @@
 import base64
 import os
-import json
 import streamlit as st
 import settings
 import assist
+from persistence import file_lock, read_json, write_json
 from rembg import remove
 from PIL import Image
 
@@ -12,20 +12,16 @@ logger = logging.getLogger(__name__)
 
 
 def load_saved_config():
-    if os.path.exists(settings.CONFIG_FILE):
-        try:
-            with open(settings.CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.exception(f'Error loading pump configuration')
-            raise e
-    return {}
+    try:
+        return read_json(settings.CONFIG_FILE, {})
+    except Exception as e:
+        logger.exception(f'Error loading pump configuration')
+        raise e
 
 
 def save_config(data):
     try:
-        with open(settings.CONFIG_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        write_json(settings.CONFIG_FILE, data)
     except Exception as e:
         logger.exception('Error saving pump configuration')
 
@@ -49,8 +45,7 @@ def save_config_with_carbonation(data, carbonation_map):
                 "ingredient": ingredient,
                 "carbonated": bool(carbonation_map.get(pump, False))
             }
-        with open(settings.CONFIG_FILE, 'w') as f:
-            json.dump(extended, f, indent=2)
+        write_json(settings.CONFIG_FILE, extended)
     except Exception:
         logger.exception('Error saving extended pump configuration')
 
@@ -64,32 +59,30 @@ def migrate_pump_config_to_extended():
     Gibt True zurück, wenn eine Änderung geschrieben wurde, sonst False.
     """
     try:
-        if not os.path.exists(settings.CONFIG_FILE):
-            return False
-        with open(settings.CONFIG_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        if not isinstance(data, dict):
-            return False
-        changed = False
-        migrated = {}
-        for pump, val in data.items():
-            if isinstance(val, dict):
-                ingredient = val.get('ingredient')
-                carbonated = val.get('carbonated')
-                if ingredient is None and isinstance(val.get('name'), str):
-                    # sehr alter Schlüsselname -> angleichen
-                    ingredient = val.get('name')
-                if carbonated is None:
-                    val['carbonated'] = False
+        # Exklusiv sperren, damit zwischen Lesen und Schreiben niemand anderes speichert
+        with file_lock(settings.CONFIG_FILE):
+            data = read_json(settings.CONFIG_FILE)
+            if not isinstance(data, dict):
+                return False
+            changed = False
+            migrated = {}
+            for pump, val in data.items():
+                if isinstance(val, dict):
+                    ingredient = val.get('ingredient')
+                    carbonated = val.get('carbonated')
+                    if ingredient is None and isinstance(val.get('name'), str):
+                        # sehr alter Schlüsselname -> angleichen
+                        ingredient = val.get('name')
+                    if carbonated is None:
+                        val['carbonated'] = False
+                        changed = True
+                    migrated[pump] = {'ingredient': ingredient or '', 'carbonated': bool(val.get('carbonated', False))}
+                else:
+                    # String-Format -> migrieren
+                    migrated[pump] = {'ingredient': str(val), 'carbonated': False}
                     changed = True
-                migrated[pump] = {'ingredient': ingredient or '', 'carbonated': bool(val.get('carbonated', False))}
-            else:
-                # String-Format -> migrieren
-                migrated[pump] = {'ingredient': str(val), 'carbonated': False}
-                changed = True
-        if changed:
-            with open(settings.CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(migrated, f, indent=2, ensure_ascii=False)
+            if changed:
+                write_json(settings.CONFIG_FILE, migrated)
         return changed
     except Exception:
         logger.exception('Error migrating pump configuration to extended format')
@@ -97,26 +90,24 @@ def migrate_pump_config_to_extended():
 
 
 def load_cocktails():
-    if os.path.exists(settings.COCKTAILS_FILE):
-        try:
-            with open(settings.COCKTAILS_FILE, 'r') as f:
-                return json.load(f)
-        except Exception:
-            logger.exception('Error loading cocktails')
+    try:
+        return read_json(settings.COCKTAILS_FILE, {})
+    except Exception:
+        logger.exception('Error loading cocktails')
     return {}
 
 
 def save_cocktails(data, append=True):
     """Save the given list of cocktails to the cocktails file."""
     try:
-        cocktails = load_cocktails()
-        with open(settings.COCKTAILS_FILE, 'w') as f:
+        with file_lock(settings.COCKTAILS_FILE):
+            cocktails = load_cocktails()
             if append:
                 cocktails['cocktails'] += data['cocktails']
             else:
                 cocktails = data
             cocktails['cocktails'] = sorted(cocktails['cocktails'], key=lambda cocktail: not cocktail.get('favorite', False))
-            json.dump(cocktails, f, indent=2)
+            write_json(settings.COCKTAILS_FILE, cocktails)
     except Exception as e:
         st.error(f'Error saving cocktails: {e}')
 
@@ -143,50 +134,31 @@ def get_valid_cocktails():
             cocktails.append(cocktail)
     return cocktails
 
+def get_ingredient_requirements(cocktail):
+    """Gibt die (zutat, ml) Paare eines Cocktails aus dem vorkompilierten Pour-Plan zurück.
+
+    Die Mengen sind auf die Glasgröße skaliert, also genau das, was beim
+    Ausschank reserviert wird (wie in der AvailabilityMatrix).
+    """
+    from controller import get_pour_plan
+    plan = get_pour_plan(cocktail, 'single')
+    return [(item.ingredient_name.lower(), item.ml) for item in plan.ingredients]
+
+
+def filter_cocktails_with_images(cocktails):
+    """Keep only the cocktails that have an image."""
+    return [cocktail for cocktail in cocktails if os.path.exists(get_cocktail_image_path(cocktail))]
+
+
 def get_available_cocktails():
     """Get the list of cocktails that have images AND can be made with current bottle levels."""
-    from bottle_monitor import bottle_monitor
-    
-    cocktail_data = load_cocktails().get('cocktails', [])
-    available_cocktails = []
+    from availability import get_availability_tracker
     
-    for cocktail in cocktail_data:
-        # Prüfe zuerst, ob ein Bild existiert
-        if not os.path.exists(get_cocktail_image_path(cocktail)):
-            continue
-            
-        # Prüfe dann, ob alle Zutaten verfügbar sind
-        ingredients = cocktail.get("ingredients", {})
-        if not ingredients:
-            continue
-            
-        try:
-            # Konvertiere Zutaten in das Format für can_make_cocktail
-            ingredient_list = []
-            for ingredient_name, measurement_str in ingredients.items():
-                parts = measurement_str.split()
-                if parts:
-                    try:
-                        ml_amount = float(parts[0])
-                        ingredient_list.append((ingredient_name.lower(), ml_amount))
-                    except ValueError:
-                        # Überspringe Zutaten mit ungültigen Mengenangaben
-                        continue
-            
-            # Prüfe Verfügbarkeit mit Bottle-Monitor
-            can_make, missing_ingredients = bottle_monitor.can_make_cocktail(ingredient_list)
-            
-            if can_make:
-                available_cocktails.append(cocktail)
-                
-        except Exception as e:
-            # Bei Fehlern überspringe den Cocktail sicherheitshalber
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Fehler beim Prüfen der Verfügbarkeit von {cocktail.get('normal_name', 'Unknown')}: {e}")
-            continue
+    # Der Tracker hält die machbaren Cocktails nach jeder Buchung aktuell (kein Katalog-Scan)
+    available_cocktails = get_availability_tracker().available_cocktails()
     
-    return available_cocktails
+    # Bilder nur noch für die machbaren Cocktails prüfen
+    return filter_cocktails_with_images(available_cocktails)
 
 
 def favorite_cocktail(cocktail_index):
@@ -0,0 +1,111 @@
+# image_prefetch.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+import logo_cache
+from helpers import get_cocktail_image_path
+
+logger = logging.getLogger(__name__)
+
+
+def _load_scaled(path: str, size: Tuple[float, float]) -> pygame.Surface:
+    # Läuft im Worker-Thread: vorskalierte Rohdatei mappen, notfalls PNG dekodieren und skalieren
+    try:
+        return logo_cache.load_scaled(path, size)
+    except FileNotFoundError:
+        raise
+    except Exception:
+        logger.exception(f'Logo-Cache für {path} nicht nutzbar, lade das PNG direkt')
+    image = pygame.image.load(path)
+    return pygame.transform.scale(image, size)
+
+
+class ImagePrefetcher:
+    """Hält die Cocktailbilder rund um den aktuellen Index fertig dekodiert und skaliert bereit.
+
+    `prefetch()` gibt die Bilder im Abstand bis `radius` (im Kreis, wie
+    beim Wischen) an einen Thread-Pool und verwirft alle weiter entfernten.
+    `get()` gibt ein fertiges Bild sofort zurück; convert_alpha() passiert
+    beim ersten Abruf im UI-Thread. Nur wenn schneller gewischt wird, als
+    dekodiert werden kann, wartet `get()` auf das noch laufende Bild.
+    """
+
+    def __init__(self, size: Tuple[float, float], radius: int = 2, workers: int = 2):
+        self.size = size
+        self.radius = radius
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-prefetch')
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ready: Dict[str, Optional[pygame.Surface]] = {}
+
+    def _wanted_paths(self, cocktails: List[Dict], index: int) -> List[str]:
+        # Nach Abstand sortiert: aktuelles Bild zuerst, dann die direkten Nachbarn
+        count = len(cocktails)
+        offsets = [0]
+        for distance in range(1, self.radius + 1):
+            offsets += [distance, -distance]
+        paths = []
+        for offset in offsets[:count]:
+            path = get_cocktail_image_path(cocktails[(index + offset) % count])
+            if path not in paths:
+                paths.append(path)
+        return paths
+
+    def prefetch(self, cocktails: List[Dict], index: int):
+        """Lädt den Ring um `index` im Hintergrund und verwirft Bilder außerhalb davon."""
+        if not cocktails:
+            return
+        wanted = self._wanted_paths(cocktails, index)
+        with self._lock:
+            for path in list(self._pending):
+                if path not in wanted:
+                    self._pending.pop(path).cancel()
+            for path in list(self._ready):
+                if path not in wanted:
+                    del self._ready[path]
+            for path in wanted:
+                if path not in self._pending and path not in self._ready:
+                    self._pending[path] = self._executor.submit(_load_scaled, path, self.size)
+
+    def get(self, cocktail: Dict) -> Optional[pygame.Surface]:
+        """Gibt das Bild eines Cocktails zurück (None, wenn es nicht geladen werden kann)."""
+        path = get_cocktail_image_path(cocktail)
+        with self._lock:
+            if path in self._ready:
+                return self._ready[path]
+            future = self._pending.get(path)
+            if future is None:
+                # Nicht im Ring (z.B. direkt nach einem Reload): jetzt laden
+                future = self._pending[path] = self._executor.submit(_load_scaled, path, self.size)
+        try:
+            image = future.result()
+            image = image.convert_alpha() if pygame.display.get_surface() else image
+        except Exception:
+            logger.exception(f'Error loading {path}')
+            image = None
+        with self._lock:
+            if self._pending.get(path) is future:
+                del self._pending[path]
+                self._ready[path] = image
+        return image
+
+    def warm(self, cocktails: List[Dict]):
+        """Erzeugt im Hintergrund die vorskalierten Rohdateien aller Logos (und löscht veraltete)."""
+        paths = [get_cocktail_image_path(cocktail) for cocktail in cocktails]
+        self._executor.submit(logo_cache.build_all, paths, self.size)
+
+    def clear(self):
+        """Verwirft alle Bilder, z.B. wenn die App neue Bilder erzeugt hat."""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._ready.clear()
+
+    def close(self):
+        self.clear()
+        self._executor.shutdown(wait=False)
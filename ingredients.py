@@ -0,0 +1,73 @@
+# ingredients.py
+import re
+import logging
+import unicodedata
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Andere Schreibweisen -> kanonischer Zutatname. Umlaut-Varianten (z.B.
+# "pfirsichlikoer") brauchen keinen Eintrag, sie ergeben ohnehin dieselbe ID.
+ALIASES = {
+    "cranberry juice": "cranberrysaft",
+    "lime juice": "limettensaft",
+    "lemon juice": "limettensaft",
+    "orange juice": "orangensaft",
+}
+
+UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+UNICODE_ESCAPE = re.compile(r'\\u([0-9a-fA-F]{4})')
+WHITESPACE = re.compile(r'\s+')
+
+
+def fix_mojibake(text: str) -> str:
+    """Repariert UTF-8, das als Latin-1/cp1252 gelesen wurde (z.B. "weiÃ\\x9f" -> "weiß")."""
+    if 'Ã' not in text and 'Â' not in text:
+        return text
+    for encoding in ('latin-1', 'cp1252'):
+        try:
+            return text.encode(encoding).decode('utf-8')
+        except UnicodeError:
+            continue
+    return text
+
+
+def fold(name: str) -> str:
+    """Bringt einen Zutatnamen in eine Vergleichsform: repariert, NFKC, klein, einfache Leerzeichen."""
+    text = fix_mojibake(str(name))
+    # Wörtliche \u00e4-Escapes aus alten Dateien
+    text = UNICODE_ESCAPE.sub(lambda match: chr(int(match.group(1), 16)), text)
+    text = unicodedata.normalize('NFKC', text).lower().replace('_', ' ')
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def _to_id(folded: str) -> str:
+    return folded.replace('(', '').replace(')', '').translate(UMLAUTS).strip().replace(' ', '_')
+
+
+ALIAS_IDS = {_to_id(fold(alias)): _to_id(fold(target)) for alias, target in ALIASES.items()}
+
+
+@lru_cache(maxsize=4096)
+def ingredient_key(name: str) -> str:
+    """Gibt die normalisierte ID einer Zutat ohne Aliase zurück, z.B. "Lemon Juice" -> "lemon_juice".
+
+    Damit werden Pumpen zugeordnet und gruppiert: zwei Pumpen gehören nur
+    zusammen, wenn sie wirklich dieselbe Zutat führen. Die Aliase gelten
+    nur für die Flaschen (siehe canonical_id).
+    """
+    if not name:
+        return ""
+    return _to_id(fold(name))
+
+
+@lru_cache(maxsize=4096)
+def canonical_id(name: str) -> str:
+    """Gibt die kanonische Flaschen-ID einer Zutat zurück, z.B. "Rum (weiß)" -> "rum_weiss".
+
+    Funktioniert auch mit bereits erzeugten (auch kaputten) IDs wie
+    "rum_weiÃ\\x9f" oder "pfirsichlikÃ¶r". Wiederholte Aufrufe sind ein
+    einziger Dict-Treffer im LRU-Cache.
+    """
+    bottle_id = ingredient_key(name)
+    return ALIAS_IDS.get(bottle_id, bottle_id)
@@ -1,14 +1,14 @@
 # interface.py
 import pygame
 import time
-import json
 import socket
 import os
+import queue
 
 from settings import (
     DEBUG, COCKTAILS_FILE, LOGO_FOLDER, ML_COEFFICIENT, 
     RETRACTION_TIME, PUMP_CONCURRENCY, INVERT_PUMP_PINS, 
-    FULL_SCREEN, COCKTAIL_IMAGE_SCALE
+    FULL_SCREEN, COCKTAIL_IMAGE_SCALE, IDLE_FPS, PREFETCH_RADIUS
 )
 
 # Configuration flags
@@ -16,7 +16,13 @@ ALLOW_FAVORITES = True  # Enable/disable favorite functionality
 SHOW_RELOAD_COCKTAILS_BUTTON = True  # Show/hide reload cocktails button
 RELOAD_COCKTAILS_TIMEOUT = None  # Auto-reload timeout (None = disabled)
 CONFIG_FILE = "pump_config.json"  # Pump configuration file
-from helpers import get_cocktail_image_path, get_valid_cocktails, get_available_cocktails, wrap_text, favorite_cocktail, unfavorite_cocktail
+from helpers import get_cocktail_image_path, get_valid_cocktails, get_available_cocktails, filter_cocktails_with_images, wrap_text, favorite_cocktail, unfavorite_cocktail
+from availability import get_availability_tracker
+from compositor import Compositor
+from tween import TweenScheduler, there_and_back
+from image_prefetch import ImagePrefetcher
+from text_cache import fit_text, get_font, render_text
+from persistence import file_lock, read_json, update_json, write_json
 from controller import make_drink
 
 import logging
@@ -28,7 +34,7 @@ class CustomDropdown:
         self.rect = pygame.Rect(x, y, width, height)
         self.options = options
         self.current_value = current_value
-        self.font = pygame.font.SysFont(None, font_size)
+        self.font = get_font(None, font_size)
         self.is_open = False
         self.selected_index = 0
         self.scroll_offset = 0
@@ -241,15 +247,16 @@ def check_for_refresh_signal():
     """Check if there's a signal from the app to refresh cocktails"""
     try:
         if os.path.exists('interface_signal.json'):
-            with open('interface_signal.json', 'r') as f:
-                signal = json.load(f)
-            
-            # Check if it's a refresh signal
-            if signal.get('action') == 'refresh_cocktails':
-                # Remove the signal file after reading
-                os.remove('interface_signal.json')
-                logger.info("Received refresh signal from app")
-                return True
+            # Lesen und Löschen unter einer Lock, sonst ginge ein gerade neu geschriebenes Signal verloren
+            with file_lock('interface_signal.json'):
+                signal = read_json('interface_signal.json', {})
+                
+                # Check if it's a refresh signal
+                if signal.get('action') == 'refresh_cocktails':
+                    # Remove the signal file after reading
+                    os.remove('interface_signal.json')
+                    logger.info("Received refresh signal from app")
+                    return True
     except Exception as e:
         logger.error(f"Error checking refresh signal: {e}")
     
@@ -274,10 +281,14 @@ normal_text_size = 48
 small_text_size = int(normal_text_size * 0.6)
 text_position = (screen_width // 2, int(screen_height * 0.82))
 
-def add_layer(*args, function=screen.blit, key=None):
+def add_layer(*args, function=screen.blit, key=None, static=None):
+    """Setzt eine Layer; static=True legt sie (wenn sie ganz unten liegt) in die Basis-Surface des Compositors."""
     if key == None:
         key = len(layers)
-    layers[str(key)] = {'function': function, 'args': args}
+    key = str(key)
+    if static is None:
+        static = layers.get(key, {}).get('static', False)
+    layers[key] = {'function': function, 'args': args, 'static': static}
 
 def remove_layer(key):
     try:
@@ -286,90 +297,48 @@ def remove_layer(key):
         pass
     
 layers = {}
+compositor = Compositor(screen)
+# Alle Animationen laufen über die Hauptschleife (siehe run_interface)
+tweens = TweenScheduler()
 def draw_frame():
-    for layer in layers.values():
-        layer['function'](*layer['args'])
-    pygame.display.flip()
+    """Zeichnet nur die geänderten Bereiche; gibt die aktualisierten Rechtecke zurück (leer = nichts zu tun)"""
+    return compositor.draw(layers)
+
+def add_cocktail_name(drink_name):
+    """Zeigt den Cocktail-Namen an; Schriftgröße und Zeilenumbruch kommen aus dem Text-Cache."""
+    fitted = fit_text(drink_name, screen_width * 0.8, normal_text_size)  # 80% der Bildschirmbreite
+    if not fitted.wrapped:
+        # Normaler Fall: Text passt in eine Zeile
+        add_layer(fitted.lines[0], fitted.lines[0].get_rect(center=text_position), key='cocktail_name')
+        return
+    # Zeichne jede Zeile separat
+    start_y = text_position[1] - len(fitted.lines) * fitted.line_height // 2
+    for i, line_surface in enumerate(fitted.lines):
+        line_rect = line_surface.get_rect(center=(text_position[0], start_y + i * fitted.line_height))
+        add_layer(line_surface, line_rect, key=f'cocktail_name_line_{i}')
 
-def animate_logo_click(logo, rect, base_size, target_size, layer_key, duration=150):
+def animate_logo_click(logo, rect, base_size, target_size, layer_key, duration=150, on_done=None):
     """Animate a logo click (pop effect): grow from base_size to target_size then shrink back."""
-    clock = pygame.time.Clock()
     center = rect.center
-    # Expand
-    start_time = pygame.time.get_ticks()
-    while True:
-        elapsed = pygame.time.get_ticks() - start_time
-        progress = min(elapsed / duration, 1.0)
-        current_size = int(base_size + (target_size - base_size) * progress)
-        scaled_img = pygame.transform.scale(logo, (current_size, current_size))
-        new_rect = scaled_img.get_rect(center=center)
-        add_layer(scaled_img, new_rect, key=layer_key)
-        draw_frame()
-        if progress >= 1.0:
-            break
-        clock.tick(60)
-    # Shrink back
-    start_time = pygame.time.get_ticks()
-    while True:
-        elapsed = pygame.time.get_ticks() - start_time
-        progress = min(elapsed / duration, 1.0)
-        current_size = int(target_size - (target_size - base_size) * progress)
-        scaled_img = pygame.transform.scale(logo, (current_size, current_size))
-        new_rect = scaled_img.get_rect(center=center)
-        add_layer(scaled_img, new_rect, key=layer_key)
-        draw_frame()
-        if progress >= 1.0:
-            break
-        clock.tick(60)
 
-def animate_logo_rotate(logo, rect, layer_key, rotation=180):
+    def update(current_size):
+        scaled_img = pygame.transform.scale(logo, (int(current_size), int(current_size)))
+        add_layer(scaled_img, scaled_img.get_rect(center=center), key=layer_key)
+
+    return tweens.add(layer_key, base_size, target_size, 2 * duration, update, on_done, easing=there_and_back)
+
+def animate_logo_rotate(logo, rect, layer_key, rotation=180, duration=600):
     """Animate a logo click (rotate effect): rotate the amount of rotation provided"""
-    angle = 0
-    while angle < rotation:
-        angle = (angle + 5) % 360
+    def update(angle):
         rotated_loading = pygame.transform.rotate(logo, angle * -1)
-        rotated_rect = rotated_loading.get_rect(center=rect.center)
-        # Draw loading image first (under)
-        add_layer(rotated_loading, rotated_rect, key=layer_key)
-        draw_frame()
+        add_layer(rotated_loading, rotated_loading.get_rect(center=rect.center), key=layer_key)
+
+    return tweens.add(layer_key, 0, rotation, duration, update)
 
 def animate_both_logos_zoom(single_logo, double_logo, single_rect, double_rect, base_size, target_size, duration=300):
     """Animate both logos zooming in together and then shrinking back."""
-    clock = pygame.time.Clock()
-    center_single = single_rect.center
-    center_double = double_rect.center
-    # Expand
-    start_time = pygame.time.get_ticks()
-    while True:
-        elapsed = pygame.time.get_ticks() - start_time
-        progress = min(elapsed / duration, 1.0)
-        current_size = int(base_size + (target_size - base_size) * progress)
-        scaled_single = pygame.transform.scale(single_logo, (current_size, current_size))
-        scaled_double = pygame.transform.scale(double_logo, (current_size, current_size))
-        new_rect_single = scaled_single.get_rect(center=center_single)
-        new_rect_double = scaled_double.get_rect(center=center_double)
-        add_layer(scaled_single, new_rect_single, key='single_logo')
-        add_layer(scaled_double, new_rect_double, key='double_logo')
-        draw_frame()
-        if progress >= 1.0:
-            break
-        clock.tick(60)
-    # Contract
-    start_time = pygame.time.get_ticks()
-    while True:
-        elapsed = pygame.time.get_ticks() - start_time
-        progress = min(elapsed / duration, 1.0)
-        current_size = int(target_size - (target_size - base_size) * progress)
-        scaled_single = pygame.transform.scale(single_logo, (current_size, current_size))
-        scaled_double = pygame.transform.scale(double_logo, (current_size, current_size))
-        new_rect_single = scaled_single.get_rect(center=center_single)
-        new_rect_double = scaled_double.get_rect(center=center_double)
-        add_layer(scaled_single, new_rect_single, key='single_logo')
-        add_layer(scaled_double, new_rect_double, key='double_logo')
-        draw_frame()
-        if progress >= 1.0:
-            break
-        clock.tick(60)
+    for logo, rect, layer_key in ((single_logo, single_rect, 'single_logo'), (double_logo, double_rect, 'double_logo')):
+        animate_logo_click(logo, rect, base_size, target_size, layer_key, duration)
 
 def show_pouring_and_loading(watcher):
     """Overlay pouring_img full screen and a spinning loading_img (720x720) drawn underneath."""
@@ -415,7 +384,7 @@ def show_pouring_and_loading(watcher):
             y_position = (text_position[1] + small_text_size * pouring_line) - 325
 
             if logo_layer_key not in pour_layers:
-                font = pygame.font.SysFont(None, small_text_size)
+                font = get_font(None, small_text_size)
                 for layer_index, line in enumerate(wrap_text(str(pour), font, screen_width * 0.5)):
                     line_key = f'{layer_key}_{layer_index}'
                     text_surface = font.render(line, True, (255, 255, 255))
@@ -446,6 +415,8 @@ def show_pouring_and_loading(watcher):
                     
 
         draw_frame()
+        # Auf das Ende warten statt zu pollen: höchstens 30 Frames pro Sekunde
+        watcher.wait(1 / 30)
 
     for layer in pour_layers:
         remove_layer(layer)
@@ -466,13 +437,13 @@ def create_settings_tray():
     overlay.fill((0, 0, 0))
     
     # Settings title
-    title_font = pygame.font.SysFont(None, 48)
+    title_font = get_font(None, 48)
     title_text = title_font.render("Settings", True, (255, 255, 255))
     title_rect = title_text.get_rect(center=(screen_width // 2, screen_height - tray_height + 30))
     
     # WiFi Status Info
     wifi_status = get_wifi_status()
-    wifi_font = pygame.font.SysFont(None, 24)
+    wifi_font = get_font(None, 24)
     
     if wifi_status['hotspot_active']:
         if wifi_status.get('manual_hotspot_requested', False):
@@ -501,21 +472,21 @@ def create_settings_tray():
     button_height = 45
     ui_restart_rect = pygame.Rect(screen_width // 2 - button_width // 2, 
                                   screen_height - tray_height + 130, button_width, button_height)
-    ui_restart_font = pygame.font.SysFont(None, 24)
+    ui_restart_font = get_font(None, 24)
     ui_restart_text = ui_restart_font.render("UI Neustart", True, (255, 255, 255))
     ui_restart_text_rect = ui_restart_text.get_rect(center=ui_restart_rect.center)
     
     # Pi Reboot Button
     pi_reboot_rect = pygame.Rect(screen_width // 2 - button_width // 2, 
                                 screen_height - tray_height + 185, button_width, button_height)
-    pi_reboot_font = pygame.font.SysFont(None, 24)
+    pi_reboot_font = get_font(None, 24)
     pi_reboot_text = pi_reboot_font.render("Pi Neustart", True, (255, 255, 255))
     pi_reboot_text_rect = pi_reboot_text.get_rect(center=pi_reboot_rect.center)
     
     # Prime pumps button (below reboot button)
     prime_rect = pygame.Rect(screen_width // 2 - button_width // 2, 
                            screen_height - tray_height + 240, button_width, button_height)
-    prime_font = pygame.font.SysFont(None, 26)
+    prime_font = get_font(None, 26)
     prime_text = prime_font.render("Prime Pumps", True, (255, 255, 255))
     prime_text_rect = prime_text.get_rect(center=prime_rect.center)
     
@@ -540,6 +511,28 @@ def create_settings_tray():
         'wifi_status': wifi_status
     }
 
+def _tray_controls(tray_ui, state, draw_controls):
+    """Gibt die Steuerelemente eines Trays als Surface zurück; neu gezeichnet wird nur, wenn sich `state` ändert."""
+    if tray_ui.get('controls_state') != state:
+        surface = pygame.Surface(screen_size, pygame.SRCALPHA)
+        draw_controls(surface, tray_ui)
+        tray_ui['controls_surface'] = surface
+        tray_ui['controls_state'] = state
+    return tray_ui['controls_surface']
+
+def _draw_settings_controls(surface, settings_ui):
+    # Draw UI restart button
+    pygame.draw.rect(surface, (50, 100, 150), settings_ui['ui_restart_rect'])
+    pygame.draw.rect(surface, (200, 200, 200), settings_ui['ui_restart_rect'], 2)
+    
+    # Draw Pi reboot button
+    pygame.draw.rect(surface, (150, 50, 50), settings_ui['pi_reboot_rect'])
+    pygame.draw.rect(surface, (200, 200, 200), settings_ui['pi_reboot_rect'], 2)
+    
+    # Draw prime pumps button
+    pygame.draw.rect(surface, (50, 150, 50), settings_ui['prime_rect'])
+    pygame.draw.rect(surface, (200, 200, 200), settings_ui['prime_rect'], 2)
+
 def draw_settings_tray(settings_ui, is_visible):
     """Draw the settings tray if visible"""
     if not is_visible:
@@ -555,22 +548,9 @@ def draw_settings_tray(settings_ui, is_visible):
     add_layer(settings_ui['wifi_status_surface'], settings_ui['wifi_status_rect'], key='wifi_status')
     add_layer(settings_ui['wifi_ip_surface'], settings_ui['wifi_ip_rect'], key='wifi_ip')
     
-    # Create temporary surface for buttons
-    temp_surface = pygame.Surface(screen_size, pygame.SRCALPHA)
-    
-    # Draw UI restart button
-    pygame.draw.rect(temp_surface, (50, 100, 150), settings_ui['ui_restart_rect'])
-    pygame.draw.rect(temp_surface, (200, 200, 200), settings_ui['ui_restart_rect'], 2)
-    
-    # Draw Pi reboot button
-    pygame.draw.rect(temp_surface, (150, 50, 50), settings_ui['pi_reboot_rect'])
-    pygame.draw.rect(temp_surface, (200, 200, 200), settings_ui['pi_reboot_rect'], 2)
-    
-    # Draw prime pumps button
-    pygame.draw.rect(temp_surface, (50, 150, 50), settings_ui['prime_rect'])
-    pygame.draw.rect(temp_surface, (200, 200, 200), settings_ui['prime_rect'], 2)
-    
-    add_layer(temp_surface, (0, 0), key='settings_controls')
+    # Buttons nur neu zeichnen, wenn sich der Tray bewegt hat
+    controls = _tray_controls(settings_ui, (settings_ui['tray_rect'].y,), _draw_settings_controls)
+    add_layer(controls, (0, 0), key='settings_controls')
     
     # Draw button texts
     add_layer(settings_ui['ui_restart_text'], settings_ui['ui_restart_text_rect'], key='ui_restart_text')
@@ -603,8 +583,6 @@ def create_settings_tab():
 
 def animate_settings_tray(settings_ui, settings_tab, show_tray, duration=300):
     """Animate the settings tray sliding up or down"""
-    clock = pygame.time.Clock()
-    start_time = pygame.time.get_ticks()
     tray_height = settings_ui['tray_rect'].height
     
     if show_tray:
@@ -616,11 +594,7 @@ def animate_settings_tray(settings_ui, settings_tab, show_tray, duration=300):
         start_y = screen_height - tray_height
         end_y = screen_height
     
-    while True:
-        elapsed = pygame.time.get_ticks() - start_time
-        progress = min(elapsed / duration, 1.0)
-        
-        current_y = start_y + (end_y - start_y) * progress
+    def update(current_y):
         settings_ui['tray_rect'].y = current_y
         
         # Update positions
@@ -635,16 +609,12 @@ def animate_settings_tray(settings_ui, settings_tab, show_tray, duration=300):
         settings_ui['prime_text_rect'].center = settings_ui['prime_rect'].center
         
         draw_settings_tray(settings_ui, True)
-        draw_frame()
-        
-        if progress >= 1.0:
-            break
-        clock.tick(60)
+
+    return tweens.add('settings_tray', start_y, end_y, duration, update)
 
 def update_settings_tray_wifi_status(settings_ui):
     """Aktualisiere WiFi-Status im Settings-Tray"""
     wifi_status = get_wifi_status()
-    wifi_font = pygame.font.SysFont(None, 24)
     
     # Update WiFi status text
     if wifi_status['hotspot_active']:
@@ -663,9 +633,9 @@ def update_settings_tray_wifi_status(settings_ui):
         wifi_ip_text = "🌐 IP: Keine Verbindung"
         status_color = (255, 0, 0)  # Red
     
-    # Update surfaces
-    settings_ui['wifi_status_surface'] = wifi_font.render(wifi_status_text, True, status_color)
-    settings_ui['wifi_ip_surface'] = wifi_font.render(wifi_ip_text, True, (200, 200, 200))
+    # Update surfaces (aus dem Text-Cache: bei unverändertem Status bleibt es dieselbe Surface)
+    settings_ui['wifi_status_surface'] = render_text(wifi_status_text, 24, status_color)
+    settings_ui['wifi_ip_surface'] = render_text(wifi_ip_text, 24, (200, 200, 200))
     
     # No hotspot button updates needed anymore
     
@@ -704,7 +674,7 @@ def create_drink_management_tray():
     header_surface.set_alpha(180)
     header_surface.fill((25, 30, 40))
 
-    title_font = pygame.font.SysFont('Arial', 28, bold=True)
+    title_font = get_font('Arial', 28, bold=True)
     title_text = title_font.render("Pumpen-Test", True, (220, 220, 220))
     title_rect = title_text.get_rect(center=(screen_width // 2, header_height // 2))
 
@@ -713,7 +683,7 @@ def create_drink_management_tray():
     section_gap = 80
 
     # Pump selection controls
-    pump_label_font = pygame.font.SysFont('Arial', 22, bold=True)
+    pump_label_font = get_font('Arial', 22, bold=True)
     pump_label = pump_label_font.render("Pumpe", True, (220, 220, 220))
     pump_label_rect = pump_label.get_rect(center=(screen_width // 2, controls_y))
 
@@ -723,7 +693,7 @@ def create_drink_management_tray():
 
     # Duration controls
     dur_y = controls_y + section_gap
-    dur_label_font = pygame.font.SysFont('Arial', 22, bold=True)
+    dur_label_font = get_font('Arial', 22, bold=True)
     dur_label = dur_label_font.render("Dauer (s)", True, (220, 220, 220))
     dur_label_rect = dur_label.get_rect(center=(screen_width // 2, dur_y))
 
@@ -733,7 +703,7 @@ def create_drink_management_tray():
 
     # Test button
     test_button_rect = pygame.Rect(screen_width // 2 - 120, dur_y + section_gap + 60, 240, 55)
-    test_font = pygame.font.SysFont('Arial', 24, bold=True)
+    test_font = get_font('Arial', 24, bold=True)
     test_text = test_font.render("Pumpe testen", True, (255, 255, 255))
     test_text_rect = test_text.get_rect(center=test_button_rect.center)
 
@@ -785,6 +755,49 @@ def create_drink_management_tab():
         'height': tab_height
     }
 
+def _draw_pump_test_controls(surface, drink_ui):
+    # Pump label
+    surface.blit(drink_ui['pump_label'], (int(drink_ui['pump_label_rect'].x),
+                                          int(drink_ui['pump_label_rect'].y)))
+
+    # Pump controls
+    pygame.draw.rect(surface, (70, 70, 70), drink_ui['pump_minus_rect'])
+    pygame.draw.rect(surface, (70, 70, 70), drink_ui['pump_plus_rect'])
+    pygame.draw.rect(surface, (40, 40, 40), drink_ui['pump_value_rect'])
+    pygame.draw.rect(surface, (200, 200, 200), drink_ui['pump_minus_rect'], 2)
+    pygame.draw.rect(surface, (200, 200, 200), drink_ui['pump_plus_rect'], 2)
+    pygame.draw.rect(surface, (200, 200, 200), drink_ui['pump_value_rect'], 2)
+
+    minus_text = render_text('-', 28, (255, 255, 255), 'Arial', bold=True)
+    plus_text = render_text('+', 28, (255, 255, 255), 'Arial', bold=True)
+    pump_val_text = render_text(str(drink_ui['selected_pump']), 26, (255, 255, 255), 'Arial', bold=True)
+
+    surface.blit(minus_text, minus_text.get_rect(center=(int(drink_ui['pump_minus_rect'].centerx), int(drink_ui['pump_minus_rect'].centery))))
+    surface.blit(plus_text, plus_text.get_rect(center=(int(drink_ui['pump_plus_rect'].centerx), int(drink_ui['pump_plus_rect'].centery))))
+    surface.blit(pump_val_text, pump_val_text.get_rect(center=(int(drink_ui['pump_value_rect'].centerx), int(drink_ui['pump_value_rect'].centery))))
+
+    # Duration controls
+    # Duration label centered
+    dur_label_pos = drink_ui['dur_label'].get_rect(center=(int(screen_width // 2), int(drink_ui['dur_label_rect'].y)))
+    surface.blit(drink_ui['dur_label'], dur_label_pos)
+
+    pygame.draw.rect(surface, (70, 70, 70), drink_ui['dur_minus_rect'])
+    pygame.draw.rect(surface, (70, 70, 70), drink_ui['dur_plus_rect'])
+    pygame.draw.rect(surface, (40, 40, 40), drink_ui['dur_value_rect'])
+    pygame.draw.rect(surface, (200, 200, 200), drink_ui['dur_minus_rect'], 2)
+    pygame.draw.rect(surface, (200, 200, 200), drink_ui['dur_plus_rect'], 2)
+    pygame.draw.rect(surface, (200, 200, 200), drink_ui['dur_value_rect'], 2)
+
+    dur_val_text = render_text(f"{drink_ui['duration_sec']:.1f}", 26, (255, 255, 255), 'Arial', bold=True)
+    surface.blit(minus_text, minus_text.get_rect(center=(int(drink_ui['dur_minus_rect'].centerx), int(drink_ui['dur_minus_rect'].centery))))
+    surface.blit(plus_text, plus_text.get_rect(center=(int(drink_ui['dur_plus_rect'].centerx), int(drink_ui['dur_plus_rect'].centery))))
+    surface.blit(dur_val_text, dur_val_text.get_rect(center=(int(drink_ui['dur_value_rect'].centerx), int(drink_ui['dur_value_rect'].centery))))
+
+    # Test button
+    pygame.draw.rect(surface, (50, 150, 50) if not drink_ui['testing'] else (120, 120, 120), drink_ui['test_button_rect'])
+    pygame.draw.rect(surface, (200, 200, 200), drink_ui['test_button_rect'], 2)
+    surface.blit(drink_ui['test_text'], drink_ui['test_text_rect'])
+
 def draw_drink_management_tray(drink_ui, is_visible, events=None):
     """Draw the pump test tray if visible"""
     if not is_visible:
@@ -798,55 +811,10 @@ def draw_drink_management_tray(drink_ui, is_visible, events=None):
     add_layer(drink_ui['title_text'], (int(screen_width // 2 - drink_ui['title_text'].get_width() // 2),
                                        int(drink_ui['tray_rect'].y + 20)), key='drink_title')
 
-    # Temporary surface to draw controls
-    temp_surface = pygame.Surface(screen_size, pygame.SRCALPHA)
-
-    # Pump label
-    temp_surface.blit(drink_ui['pump_label'], (int(drink_ui['pump_label_rect'].x),
-                                               int(drink_ui['pump_label_rect'].y)))
-
-    # Pump controls
-    pygame.draw.rect(temp_surface, (70, 70, 70), drink_ui['pump_minus_rect'])
-    pygame.draw.rect(temp_surface, (70, 70, 70), drink_ui['pump_plus_rect'])
-    pygame.draw.rect(temp_surface, (40, 40, 40), drink_ui['pump_value_rect'])
-    pygame.draw.rect(temp_surface, (200, 200, 200), drink_ui['pump_minus_rect'], 2)
-    pygame.draw.rect(temp_surface, (200, 200, 200), drink_ui['pump_plus_rect'], 2)
-    pygame.draw.rect(temp_surface, (200, 200, 200), drink_ui['pump_value_rect'], 2)
-
-    minus_font = pygame.font.SysFont('Arial', 28, bold=True)
-    plus_font = minus_font
-    val_font = pygame.font.SysFont('Arial', 26, bold=True)
-    minus_text = minus_font.render('-', True, (255, 255, 255))
-    plus_text = plus_font.render('+', True, (255, 255, 255))
-    pump_val_text = val_font.render(str(drink_ui['selected_pump']), True, (255, 255, 255))
-
-    temp_surface.blit(minus_text, minus_text.get_rect(center=(int(drink_ui['pump_minus_rect'].centerx), int(drink_ui['pump_minus_rect'].centery))))
-    temp_surface.blit(plus_text, plus_text.get_rect(center=(int(drink_ui['pump_plus_rect'].centerx), int(drink_ui['pump_plus_rect'].centery))))
-    temp_surface.blit(pump_val_text, pump_val_text.get_rect(center=(int(drink_ui['pump_value_rect'].centerx), int(drink_ui['pump_value_rect'].centery))))
-
-    # Duration controls
-    # Duration label centered
-    dur_label_pos = drink_ui['dur_label'].get_rect(center=(int(screen_width // 2), int(drink_ui['dur_label_rect'].y)))
-    temp_surface.blit(drink_ui['dur_label'], dur_label_pos)
-
-    pygame.draw.rect(temp_surface, (70, 70, 70), drink_ui['dur_minus_rect'])
-    pygame.draw.rect(temp_surface, (70, 70, 70), drink_ui['dur_plus_rect'])
-    pygame.draw.rect(temp_surface, (40, 40, 40), drink_ui['dur_value_rect'])
-    pygame.draw.rect(temp_surface, (200, 200, 200), drink_ui['dur_minus_rect'], 2)
-    pygame.draw.rect(temp_surface, (200, 200, 200), drink_ui['dur_plus_rect'], 2)
-    pygame.draw.rect(temp_surface, (200, 200, 200), drink_ui['dur_value_rect'], 2)
-
-    dur_val_text = val_font.render(f"{drink_ui['duration_sec']:.1f}", True, (255, 255, 255))
-    temp_surface.blit(minus_text, minus_text.get_rect(center=(int(drink_ui['dur_minus_rect'].centerx), int(drink_ui['dur_minus_rect'].centery))))
-    temp_surface.blit(plus_text, plus_text.get_rect(center=(int(drink_ui['dur_plus_rect'].centerx), int(drink_ui['dur_plus_rect'].centery))))
-    temp_surface.blit(dur_val_text, dur_val_text.get_rect(center=(int(drink_ui['dur_value_rect'].centerx), int(drink_ui['dur_value_rect'].centery))))
-
-    # Test button
-    pygame.draw.rect(temp_surface, (50, 150, 50) if not drink_ui['testing'] else (120, 120, 120), drink_ui['test_button_rect'])
-    pygame.draw.rect(temp_surface, (200, 200, 200), drink_ui['test_button_rect'], 2)
-    temp_surface.blit(drink_ui['test_text'], drink_ui['test_text_rect'])
-
-    add_layer(temp_surface, (0, 0), key='pump_test_controls')
+    # Steuerelemente nur neu zeichnen, wenn sich Tray-Position, Pumpe, Dauer oder Teststatus ändern
+    state = (drink_ui['tray_rect'].y, drink_ui['selected_pump'], drink_ui['duration_sec'], drink_ui['testing'])
+    controls = _tray_controls(drink_ui, state, _draw_pump_test_controls)
+    add_layer(controls, (0, 0), key='pump_test_controls')
 
 def _force_remove_pump_labels():
     """Entfernt explizit alle Pump-Labels die als Overlay hängen bleiben könnten"""
@@ -856,8 +824,6 @@ def _force_remove_pump_labels():
 
 def animate_drink_management_tray(drink_ui, drink_tab, show_tray, duration=300):
     """Animate the pump test tray sliding down or up"""
-    clock = pygame.time.Clock()
-    start_time = pygame.time.get_ticks()
     tray_height = drink_ui['tray_rect'].height
     
     if show_tray:
@@ -869,21 +835,10 @@ def animate_drink_management_tray(drink_ui, drink_tab, show_tray, duration=300):
         start_y = 0
         end_y = -tray_height
     
-    while True:
-        elapsed = pygame.time.get_ticks() - start_time
-        progress = min(elapsed / duration, 1.0)
-        
-        current_y = start_y + (end_y - start_y) * progress
+    def update(current_y):
         current_y_int = int(current_y)
         drink_ui['tray_rect'].y = current_y_int
         
-        # No tab to update anymore
-        
-        # Update all related positions
-        # Title position update removed
-        
-        # Dropdown positions are now static - no more flickering
-        
         # Update control positions vertically
         # Pump controls
         dy = current_y_int + 30
@@ -903,14 +858,13 @@ def animate_drink_management_tray(drink_ui, drink_tab, show_tray, duration=300):
         drink_ui['test_button_rect'].y = int(dy2 + 60 + 80)
         drink_ui['test_text_rect'].center = drink_ui['test_button_rect'].center
         
-        # No tab layer to update anymore
-        
         draw_drink_management_tray(drink_ui, True)
-        draw_frame()
-        
-        if progress >= 1.0:
-            break
-        clock.tick(60)
+
+    def done():
+        # Eingefahrener Tray: die Steuerelemente nicht weiter (unsichtbar) mitzeichnen
+        remove_layer('pump_test_controls')
+
+    return tweens.add('drink_tray', start_y, end_y, duration, update, None if show_tray else done)
 
 def handle_drink_management_interaction(drink_ui, event, event_pos):
     """Handle interactions with pump test tray elements"""
@@ -931,17 +885,13 @@ def update_dropdown_selection(dropdown, new_value):
     """Update dropdown selection and save to config"""
     dropdown['current_value'] = new_value
     
-    # Save to pump config
+    # Save to pump config (Lesen und Schreiben unter einer Lock, damit parallele Änderungen nicht verloren gehen)
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
-    except:
-        config = {}
-    
-    config[f"Pump {dropdown['pump_number']}"] = new_value
-    
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+        with update_json(CONFIG_FILE, {}) as config:
+            config[f"Pump {dropdown['pump_number']}"] = new_value
+    except ValueError:
+        # Kaputte Datei: wie bisher mit leerer Konfiguration neu anfangen
+        write_json(CONFIG_FILE, {f"Pump {dropdown['pump_number']}": new_value})
 
 def generate_new_drink_menu():
     """Generate a new drink menu using OpenAI"""
@@ -974,8 +924,7 @@ def generate_new_drink_menu():
         new_drinks = [""] + [line.strip() for line in response.choices[0].message.content.split('\n') if line.strip()]
         
         # Update drink_options.json
-        with open('drink_options.json', 'w') as f:
-            json.dump({"drinks": new_drinks}, f, indent=2)
+        write_json('drink_options.json', {"drinks": new_drinks})
         
         logger.info(f"Generated {len(new_drinks)-1} new drink options")
         return new_drinks
@@ -986,37 +935,30 @@ def generate_new_drink_menu():
 
 def run_interface():
 
-    def load_cocktail_image(cocktail):
-        """Given a Cocktail object, load the image for that cocktail and scale it to the screen size"""
-        # Regular cocktail image loading
-        path = get_cocktail_image_path(cocktail)
-        try:
-            img = pygame.image.load(path)
-            img = pygame.transform.scale(img, (screen_width * COCKTAIL_IMAGE_SCALE, screen_height * COCKTAIL_IMAGE_SCALE))
-            return img
-        except Exception as e:
-            logger.exception(f'Error loading {path}')
-            return None
+    # Bilder rund um den aktuellen Cocktail werden im Hintergrund dekodiert und skaliert
+    image_prefetcher = ImagePrefetcher((screen_width * COCKTAIL_IMAGE_SCALE, screen_height * COCKTAIL_IMAGE_SCALE),
+                                       radius=PREFETCH_RADIUS)
 
     def load_cocktail(index):
-        """Load a cocktail based on a provided index. Also pre-load the images for the previous and next cocktails"""
+        """Load a cocktail based on a provided index. Images for the previous and next cocktails come from the prefetch ring"""
+        image_prefetcher.prefetch(cocktails, index)
         current_cocktail = cocktails[index]
-        current_image = load_cocktail_image(current_cocktail)
+        current_image = image_prefetcher.get(current_cocktail)
         current_cocktail_name = current_cocktail.get('normal_name', '')
         previous_cocktail = cocktails[(index - 1) % len(cocktails)]
-        previous_image = load_cocktail_image(previous_cocktail)
+        previous_image = image_prefetcher.get(previous_cocktail)
         next_cocktail = cocktails[(index + 1) % len(cocktails)]
-        next_image = load_cocktail_image(next_cocktail)
+        next_image = image_prefetcher.get(next_cocktail)
         return current_cocktail, current_image, current_cocktail_name, previous_image, next_image
 
     # Load the static background image (tipsy.png)
     try:
         background = pygame.image.load('./tipsy.jpg')
         background = pygame.transform.scale(background, screen_size)
-        add_layer(background, (0, 0), key='background')
+        add_layer(background, (0, 0), key='background', static=True)
     except Exception as e:
         logger.exception('Error loading background image (tipsy.png)')
-        add_layer((0, 0), function=screen.fill, key='background')
+        add_layer((0, 0), function=screen.fill, key='background', static=True)
     
     cocktails = get_cocktails()
     
@@ -1026,6 +968,12 @@ def run_interface():
         return
     current_index = 0
     current_cocktail, current_image, current_cocktail_name, previous_image, next_image = load_cocktail(current_index)
+    image_prefetcher.warm(get_valid_cocktails())
+
+    # Geänderte Verfügbarkeit nach jedem Drink/Auffüllen vom Tracker übernehmen (kein Katalog-Scan)
+    availability_updates = queue.SimpleQueue()
+    availability_tracker = get_availability_tracker()
+    availability_tracker.subscribe(availability_updates.put)
     reload_time = pygame.time.get_ticks()
 
     margin = 50  # adjust as needed for spacing
@@ -1070,12 +1018,72 @@ def run_interface():
     drag_start_x = 0
     drag_offset = 0
     clock = pygame.time.Clock()
+    pending_pour = None  # (cocktail, size), bis die Klick-Animation fertig ist
+    pour_ready = False  # Klick-Animation fertig, die Hauptschleife startet den Ausschank
+
+    def request_pour(cocktail, size, logo, rect, layer_key):
+        """Startet die Klick-Animation; ausgeschenkt wird, wenn sie fertig ist."""
+        nonlocal pending_pour
+        pending_pour = (cocktail, size)
+        if logo:
+            animate_logo_click(logo, rect, base_size=150, target_size=220, layer_key=layer_key, duration=150,
+                               on_done=mark_pour_ready)
+        else:
+            mark_pour_ready()
+
+    def mark_pour_ready():
+        # Nicht im on_done ausschenken: show_pouring_and_loading blockiert und würde die Tweens anhalten
+        nonlocal pour_ready
+        pour_ready = True
+
+    def pour_pending_drink():
+        nonlocal pending_pour, pour_ready
+        pour_ready = False
+        cocktail, size = pending_pour
+        pending_pour = None
+        executor_watcher = make_drink(cocktail, size)
+        show_pouring_and_loading(executor_watcher)
+
+    def slide_carousel(start_offset, target_offset, new_index):
+        """Wischt zum nächsten bzw. vorherigen Cocktail; danach zoomen beide Logos."""
+        image = current_image
+        if target_offset < 0:
+            neighbour, neighbour_x, neighbour_key = next_image, screen_width, 'next_cocktail'
+        else:
+            neighbour, neighbour_x, neighbour_key = previous_image, -screen_width, 'previous_cocktail'
+
+        def update(offset):
+            add_layer(image, (offset + cocktail_image_offset, cocktail_image_offset), key='current_cocktail')
+            add_layer(neighbour, (neighbour_x + offset + cocktail_image_offset, cocktail_image_offset), key=neighbour_key)
+
+        def done():
+            nonlocal current_index, current_cocktail, current_image, current_cocktail_name, previous_image, next_image
+            current_index = new_index % len(cocktails)
+            current_cocktail, current_image, current_cocktail_name, previous_image, next_image = load_cocktail(current_index)
+
+            # Animate both extra logos zooming together.
+            if single_logo and double_logo:
+                animate_both_logos_zoom(single_logo, double_logo, single_rect, double_rect, base_size=150, target_size=175, duration=300)
+
+        tweens.add('carousel', start_offset, target_offset, 200, update, done)  # Faster animation for smoother feel
+
+    def snap_back_carousel(start_offset):
+        """Schiebt das Bild zurück, wenn zu wenig gewischt wurde."""
+        image = current_image
+
+        def update(offset):
+            add_layer(image, (offset + cocktail_image_offset, cocktail_image_offset), key='current_cocktail')
+            add_cocktail_name(current_cocktail_name)
+
+        tweens.add('carousel', start_offset, 0, 200, update)
 
     running = True
     last_refresh_check = pygame.time.get_ticks()
     last_wifi_update = pygame.time.get_ticks()
     refresh_check_interval = 1000  # Check every 1 second
     wifi_update_interval = 3000  # Update WiFi status every 3 seconds
+    idle_after = 1000  # Nach 1 Sekunde ohne Eingabe/Änderung auf IDLE_FPS drosseln
+    last_activity = pygame.time.get_ticks()
     
     while running:
         # Check for refresh signals periodically
@@ -1083,9 +1091,29 @@ def run_interface():
         if current_time - last_refresh_check > refresh_check_interval:
             if check_for_refresh_signal():
                 logger.info("Refreshing cocktails due to app signal")
+                # Die App hat evtl. neue Bilder erzeugt
+                image_prefetcher.clear()
                 cocktails = get_cocktails()
+                image_prefetcher.warm(get_valid_cocktails())
                 current_cocktail, current_image, current_cocktail_name, previous_image, next_image = load_cocktail(current_index)
             last_refresh_check = current_time
+
+        availability_update = None
+        while not availability_updates.empty():
+            availability_update = availability_updates.get_nowait()
+        if availability_update is not None:
+            updated_cocktails = filter_cocktails_with_images(availability_update.cocktails)
+            if updated_cocktails:
+                # Beim aktuellen Cocktail bleiben, falls er noch machbar ist
+                names = [cocktail.get('normal_name', '') for cocktail in updated_cocktails]
+                if current_cocktail_name in names:
+                    current_index = names.index(current_cocktail_name)
+                else:
+                    current_index = min(current_index, len(updated_cocktails) - 1)
+                cocktails = updated_cocktails
+                current_cocktail, current_image, current_cocktail_name, previous_image, next_image = load_cocktail(current_index)
+            else:
+                logger.warning("Keine Cocktails mehr verfügbar - alle Zutaten sind aufgebraucht oder fehlen!")
         
         # Update WiFi status periodically if settings tray is visible
         if current_time - last_wifi_update > wifi_update_interval:
@@ -1103,6 +1131,9 @@ def run_interface():
                 if event.key == pygame.K_q:
                     running = False
             if event.type == pygame.MOUSEBUTTONDOWN:
+                # Eine laufende Wisch-Animation abschließen, damit der neue Touch auf dem richtigen Cocktail landet
+                tweens.finish('carousel')
+                
                 # Start tracking for potential swipe gestures
                 swipe_start_pos = event.pos
                 swipe_start_time = pygame.time.get_ticks()
@@ -1229,7 +1260,6 @@ def run_interface():
                                 else:
                                     # Close if already open
                                     drink_visible = False
-                                    remove_layer('pump_test_controls')
                                     animate_drink_management_tray(drink_ui, None, drink_visible)
                         elif swipe_distance_y < 0:  # Swipe up (from bottom)
                             # Only open settings if swipe starts in bottom 10% of screen
@@ -1237,7 +1267,6 @@ def run_interface():
                                 # Check if drink management is already open - if so, close it first
                                 if drink_visible:
                                     drink_visible = False
-                                    remove_layer('pump_test_controls')
                                     animate_drink_management_tray(drink_ui, None, drink_visible)
                                 
                                 # Now open settings menu (pull-up)
@@ -1248,6 +1277,9 @@ def run_interface():
                                     # Close if already open
                                     settings_visible = False
                                     animate_settings_tray(settings_ui, None, settings_visible)
+                        # Ein vertikaler Wisch ist kein Karussell-Drag (sonst bleibt die Schleife auf 120 fps)
+                        dragging = False
+                        drag_offset = 0
                         continue
                     
                     # Clean up swipe tracking variables
@@ -1273,23 +1305,16 @@ def run_interface():
                     # If it's a click (minimal drag), check extra logos.
                     if abs(drag_offset) < 10:
                         pos = event.pos
-                        if single_rect.collidepoint(pos):
-                            # Animate single logo click
-                            if single_logo:
-                                animate_logo_click(single_logo, single_rect, base_size=150, target_size=220, layer_key='single_logo', duration=150)
-
-                            executor_watcher = make_drink(current_cocktail, 'single')
-
-                            show_pouring_and_loading(watcher=executor_watcher)
+                        if pending_pour is not None:
+                            # Ein Drink ist schon angefordert, die Klick-Animation läuft noch
+                            pass
+                        elif single_rect.collidepoint(pos):
+                            # Animate single logo click, then pour
+                            request_pour(current_cocktail, 'single', single_logo, single_rect, 'single_logo')
 
                         elif double_rect.collidepoint(pos):
-                            # Animate double logo click
-                            if double_logo:
-                                animate_logo_click(double_logo, double_rect, base_size=150, target_size=220, layer_key='double_logo', duration=150)
-
-                            executor_watcher = make_drink(current_cocktail, 'double')
-
-                            show_pouring_and_loading(executor_watcher)
+                            # Animate double logo click, then pour
+                            request_pour(current_cocktail, 'double', double_logo, double_rect, 'double_logo')
                     
                         # Favoriten- und Reload-Buttons sind jetzt im Drink Management Menü
                             
@@ -1305,90 +1330,34 @@ def run_interface():
                         else:
                             target_offset = screen_width
                             new_index = (current_index - 1) % len(cocktails)
-                        start_offset = drag_offset
-                        duration = 200  # Faster animation for smoother feel
-                        start_time = pygame.time.get_ticks()
-                        while True:
-                            elapsed = pygame.time.get_ticks() - start_time
-                            progress = min(elapsed / duration, 1.0)
-                            current_offset = start_offset + (target_offset - start_offset) * progress
-                            add_layer(current_image, (current_offset + cocktail_image_offset, cocktail_image_offset), key='current_cocktail')
-                            if drag_offset < 0:
-                                add_layer(next_image, (screen_width + current_offset + cocktail_image_offset, cocktail_image_offset), key='next_cocktail')
-                            else:
-                                add_layer(previous_image, (-screen_width + current_offset + cocktail_image_offset, cocktail_image_offset), key='previous_cocktail')
-                            draw_frame()
-                            if progress >= 1.0:
-                                break
-                            clock.tick(120)  # Higher frame rate for smoother animation
-                        current_index = new_index
-                        current_cocktail, current_image, current_cocktail_name, previous_image, next_image = load_cocktail(current_index)
-
-                        # Animate both extra logos zooming together.
-                        if single_logo and double_logo:
-                            animate_both_logos_zoom(single_logo, double_logo, single_rect, double_rect, base_size=150, target_size=175, duration=300)
+                        slide_carousel(drag_offset, target_offset, new_index)
                     else:
                         # Animate snapping back if swipe is insufficient.
-                        start_offset = drag_offset
-                        duration = 200  # Faster animation for smoother feel
-                        start_time = pygame.time.get_ticks()
-                        while True:
-                            elapsed = pygame.time.get_ticks() - start_time
-                            progress = min(elapsed / duration, 1.0)
-                            current_offset = start_offset * (1 - progress)
-                            add_layer(current_image, (current_offset + cocktail_image_offset, cocktail_image_offset), key='current_cocktail')
-                            
-                            # Intelligente Text-Anpassung für Cocktail-Namen
-                            drink_name = current_cocktail_name
-                            
-                            # Prüfe Text-Länge und passe Schriftgröße an
-                            max_text_width = screen_width * 0.8  # 80% der Bildschirmbreite
-                            font_size = normal_text_size
-                            
-                            # Reduziere Schriftgröße schrittweise bis der Text passt
-                            while font_size > 24:  # Minimale Schriftgröße
-                                font = pygame.font.SysFont(None, font_size)
-                                text_surface = font.render(drink_name, True, (255, 255, 255))
-                                if text_surface.get_width() <= max_text_width:
-                                    break
-                                font_size -= 8
-                            
-                            # Wenn der Text immer noch zu lang ist, verwende Text-Wrapping
-                            if text_surface.get_width() > max_text_width:
-                                font = pygame.font.SysFont(None, font_size)
-                                wrapped_lines = wrap_text(drink_name, font, max_text_width)
-                                
-                                # Zeichne jede Zeile separat
-                                line_height = font.get_height() + 5
-                                total_height = len(wrapped_lines) * line_height
-                                start_y = text_position[1] - total_height // 2
-                                
-                                for i, line in enumerate(wrapped_lines):
-                                    line_surface = font.render(line, True, (255, 255, 255))
-                                    line_rect = line_surface.get_rect(center=(text_position[0], start_y + i * line_height))
-                                    add_layer(line_surface, line_rect, key=f'cocktail_name_line_{i}')
-                            else:
-                                # Normaler Fall: Text passt in eine Zeile
-                                text_rect = text_surface.get_rect(center=text_position)
-                                add_layer(text_surface, text_rect, key='cocktail_name')
-                            
-                            draw_frame()
-                            if progress >= 1.0:
-                                break
-                            clock.tick(120)  # Higher frame rate for smoother animation
+                        snap_back_carousel(drag_offset)
                     dragging = False
                     drag_offset = 0
 
         # Main drawing (when not in special animation)
         if RELOAD_COCKTAILS_TIMEOUT and pygame.time.get_ticks() - reload_time > RELOAD_COCKTAILS_TIMEOUT:
             logger.debug('Reloading cocktails due to auto reload timeout')
+            image_prefetcher.clear()
             cocktails = get_cocktails()
             current_cocktail, current_image, current_cocktail_name, previous_image, next_image = load_cocktail(current_index)
             reload_time = pygame.time.get_ticks()
 
-        if dragging:
+        # Laufende Animationen mit festem Zeitschritt weiterführen
+        tweens.update(pygame.time.get_ticks())
+        if pour_ready:
+            pour_pending_drink()
+
+        if tweens.running('carousel'):
+            # Die Wisch-Animation positioniert die Bilder selbst
+            pass
+        elif dragging:
             remove_layer('cocktail_name')
             remove_layer('favorite_logo')
+            remove_layer('single_servings')
+            remove_layer('double_servings')
             add_layer(current_image, (drag_offset + cocktail_image_offset, cocktail_image_offset), key='current_cocktail')
             if drag_offset < 0:
                 add_layer(next_image, (screen_width + drag_offset + cocktail_image_offset, cocktail_image_offset), key='next_cocktail')
@@ -1404,44 +1373,23 @@ def run_interface():
             for i in range(10):  # Entferne bis zu 10 Zeilen
                 remove_layer(f'cocktail_name_line_{i}')
             
-            # Intelligente Text-Anpassung für Cocktail-Namen
-            drink_name = current_cocktail_name
-            
-            # Prüfe Text-Länge und passe Schriftgröße an
-            max_text_width = screen_width * 0.8  # 80% der Bildschirmbreite
-            font_size = normal_text_size
-            
-            # Reduziere Schriftgröße schrittweise bis der Text passt
-            while font_size > 24:  # Minimale Schriftgröße
-                font = pygame.font.SysFont(None, font_size)
-                text_surface = font.render(drink_name, True, (255, 255, 255))
-                if text_surface.get_width() <= max_text_width:
-                    break
-                font_size -= 8
-            
-            # Wenn der Text immer noch zu lang ist, verwende Text-Wrapping
-            if text_surface.get_width() > max_text_width:
-                font = pygame.font.SysFont(None, font_size)
-                wrapped_lines = wrap_text(drink_name, font, max_text_width)
-                
-                # Zeichne jede Zeile separat
-                line_height = font.get_height() + 5
-                total_height = len(wrapped_lines) * line_height
-                start_y = text_position[1] - total_height // 2
-                
-                for i, line in enumerate(wrapped_lines):
-                    line_surface = font.render(line, True, (255, 255, 255))
-                    line_rect = line_surface.get_rect(center=(text_position[0], start_y + i * line_height))
-                    add_layer(line_surface, line_rect, key=f'cocktail_name_line_{i}')
-            else:
-                # Normaler Fall: Text passt in eine Zeile
-                text_rect = text_surface.get_rect(center=text_position)
-                add_layer(text_surface, text_rect, key='cocktail_name')
+            add_cocktail_name(current_cocktail_name)
             if ALLOW_FAVORITES:
                 if current_cocktail.get('favorite', False) and favorite_logo:
                     add_layer(favorite_logo, favorite_rect, key='favorite_logo')
                 elif unfavorite_logo:
                     add_layer(unfavorite_logo, favorite_rect, key='favorite_logo')
+
+            # "3 übrig"-Badges unter den Größen-Buttons (aus dem Speicherstand des Trackers)
+            servings = availability_tracker.servings_of(current_cocktail)
+            for size, logo in (('single', single_logo), ('double', double_logo)):
+                count = servings.get(size)
+                if logo is None or count is None:
+                    remove_layer(f'{size}_servings')
+                    continue
+                rect = single_rect if size == 'single' else double_rect
+                badge = render_text(f'{count} übrig', 36, (255, 255, 255) if count > 0 else (255, 80, 80))
+                add_layer(badge, badge.get_rect(midtop=(rect.centerx, rect.bottom + 10)), key=f'{size}_servings')
         
         # No tab positioning needed anymore
         
@@ -1455,11 +1403,14 @@ def run_interface():
         if settings_visible:
             draw_settings_tray(settings_ui, True)
         
-        draw_frame()
+        if draw_frame() or events or dragging or tweens.active:
+            last_activity = current_time
         
         # No dropdowns in pump test tray
         
-        clock.tick(120)  # Higher frame rate for smoother interface
+        # Higher frame rate for smoother interface, im Leerlauf nur noch IDLE_FPS (spart CPU und Strom)
+        clock.tick(120 if current_time - last_activity < idle_after else IDLE_FPS)
+    image_prefetcher.close()
     pygame.quit()
 
 if __name__ == '__main__':
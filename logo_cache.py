@@ -0,0 +1,115 @@
+# logo_cache.py
+import os
+import mmap
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Iterable, Tuple
+
+import pygame
+
+import settings
+from persistence import copy_file_mode, file_signature
+
+logger = logging.getLogger(__name__)
+
+CACHE_FOLDER_NAME = '.scaled'
+
+_hash_lock = threading.Lock()
+_hashes = {}
+
+
+def cache_folder() -> str:
+    """Ordner der vorskalierten Rohbilder (drink_logos/.scaled)."""
+    return os.path.join(settings.LOGO_FOLDER, CACHE_FOLDER_NAME)
+
+
+def content_hash(path: str) -> str:
+    """SHA-1 des Bildinhalts; pro (mtime, Größe) der Datei nur einmal berechnet."""
+    signature = file_signature(path)
+    if signature is None:
+        raise FileNotFoundError(path)
+    with _hash_lock:
+        cached = _hashes.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    with _hash_lock:
+        _hashes[path] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _target_size(size) -> Tuple[int, int]:
+    return int(size[0]), int(size[1])
+
+
+def cache_path(path: str, size) -> str:
+    """Cache-Datei zu Bildinhalt und Zielgröße, z.B. ".scaled/3f2a…_504x504.rgba"."""
+    width, height = _target_size(size)
+    return os.path.join(cache_folder(), f'{content_hash(path)}_{width}x{height}.rgba')
+
+
+def _write_raw(target: str, data: bytes):
+    # Atomar schreiben, damit ein gleichzeitiger Leser nie eine halbe Datei mappt
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=os.path.dirname(target))
+    try:
+        copy_file_mode(fd, target)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def build(path: str, size) -> str:
+    """Erzeugt die vorskalierte RGBA-Datei zu einem Logo, falls es sie noch nicht gibt."""
+    target = cache_path(path, size)
+    if not os.path.exists(target):
+        image = pygame.transform.scale(pygame.image.load(path), _target_size(size))
+        _write_raw(target, pygame.image.tobytes(image, 'RGBA'))
+        logger.info(f'Vorskaliertes Logo erzeugt: {target}')
+    return target
+
+
+def load_scaled(path: str, size) -> pygame.Surface:
+    """Gibt ein Logo in Zielgröße zurück: aus der gemappten Rohdatei, ohne PNG zu dekodieren.
+
+    Fehlt die Rohdatei (neues oder geändertes Logo), wird sie einmal
+    erzeugt. Die Surface teilt sich den Speicher mit dem mmap.
+    """
+    target = build(path, size)
+    with open(target, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return pygame.image.frombuffer(buffer, _target_size(size), 'RGBA')
+
+
+def build_all(paths: Iterable[str], size, prune: bool = True) -> int:
+    """Erzeugt die Rohdateien für alle Logos (z.B. beim Start) und löscht veraltete.
+
+    Gibt die Anzahl der vorhandenen Rohdateien zurück.
+    """
+    wanted = set()
+    for path in paths:
+        try:
+            wanted.add(os.path.basename(build(path, size)))
+        except Exception:
+            logger.exception(f'Error caching {path}')
+    if prune:
+        try:
+            entries = os.listdir(cache_folder())
+        except FileNotFoundError:
+            entries = []
+        for name in entries:
+            if name.endswith('.rgba') and name not in wanted:
+                os.unlink(os.path.join(cache_folder(), name))
+                logger.debug(f'Veraltetes Logo aus dem Cache gelöscht: {name}')
+    return len(wanted)
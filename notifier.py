@@ -0,0 +1,236 @@
+# notifier.py
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.telegram.org"
+
+# Reihenfolge der Flaschenzustände: höher = schlimmer
+BOTTLE_STATES = {"ok": 0, "warning": 1, "critical": 2, "empty": 3}
+
+
+class TelegramNotifier:
+    """Verschickt Telegram-Nachrichten im Hintergrund, ohne den Pour-Pfad zu blockieren.
+
+    `notify` legt Nachrichten nur in eine begrenzte Warteschlange (volle
+    Warteschlange = Nachricht wird verworfen). Ein Worker-Thread fasst alle
+    Nachrichten, die innerhalb von `batch_seconds` eintreffen, zu einer
+    Telegram-Nachricht zusammen und versucht es bei Fehlern mit
+    exponentiellem Backoff erneut. Gleiche Nachrichten, die noch in der
+    Warteschlange liegen, werden nicht doppelt eingereiht.
+
+    `report_bottle` meldet einen Flaschenzustand nur, wenn er sich
+    verschlechtert. Besser wird ein Zustand erst, wenn der Füllstand die
+    Schwelle um `hysteresis_ml` überschreitet - so erzeugt eine Flasche an
+    der Warnschwelle nicht bei jedem Drink eine neue Warnung.
+
+    Die Konfiguration (enabled, bot_token, chat_id, notifications und
+    optional api_url) wird bei jedem Versand über `get_config()` gelesen.
+    """
+
+    def __init__(self, get_config: Callable[[], Dict], queue_size: int = 100, batch_seconds: float = 2.0,
+                 max_batch: int = 20, max_retries: int = 5, backoff_seconds: float = 1.0,
+                 max_backoff_seconds: float = 60.0, timeout: float = 10.0, hysteresis_ml: float = 25.0):
+        self.get_config = get_config
+        self.batch_seconds = batch_seconds
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout = timeout
+        self.hysteresis_ml = hysteresis_ml
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending_keys = set()
+        self._bottle_states = {}
+        self._forecast_alerts = set()
+        self._unfinished = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._closed = threading.Event()
+        self._thread = None
+
+    def _enabled(self, config: Dict) -> bool:
+        return bool(config.get("enabled", False) and config.get("bot_token") and config.get("chat_id"))
+
+    def notify(self, message: str, key: Optional[str] = None) -> bool:
+        """Reiht eine Nachricht ein, ohne zu blockieren. Gibt False zurück, wenn sie verworfen wurde."""
+        if self._closed.is_set() or not self._enabled(self.get_config()):
+            return False
+        key = key or message
+        with self._lock:
+            if key in self._pending_keys:
+                logger.debug(f"Telegram-Nachricht bereits eingereiht: {key}")
+                return True
+            try:
+                self._queue.put_nowait((key, message))
+            except queue.Full:
+                logger.warning(f"Telegram-Warteschlange voll, Nachricht verworfen: {message}")
+                return False
+            self._pending_keys.add(key)
+            self._unfinished += 1
+            self._ensure_thread()
+        return True
+
+    def report_bottle(self, bottle_id: str, bottle: Dict) -> str:
+        """Bewertet den Füllstand einer Flasche und meldet nur Verschlechterungen. Gibt den Zustand zurück."""
+        current_ml = bottle["current_ml"]
+        state = self._classify(current_ml, bottle)
+        with self._lock:
+            last_state = self._bottle_states.get(bottle_id, "ok")
+            if BOTTLE_STATES[state] < BOTTLE_STATES[last_state]:
+                # Erholung erst deutlich über der Schwelle (Hysterese)
+                recovered = self._classify(current_ml - self.hysteresis_ml, bottle)
+                state = max(state, recovered, key=BOTTLE_STATES.get)
+            self._bottle_states[bottle_id] = state
+        if BOTTLE_STATES[state] <= BOTTLE_STATES[last_state]:
+            return state
+
+        notifications = self.get_config().get("notifications", {})
+        if not notifications.get(state, True):
+            return state
+        name = bottle.get("name", bottle_id)
+        if state == "empty":
+            message = f"🚨 FLASCHE LEER: {name} ist leer!"
+        elif state == "critical":
+            message = f"⚠️ KRITISCHER FÜLLSTAND: {name} hat nur noch {current_ml}ml"
+        else:
+            message = f"🔶 WARNUNG: {name} hat nur noch {current_ml}ml"
+        self.notify(message, key=f"{bottle_id}:{state}")
+        return state
+
+    def report_forecast(self, bottle_id: str, bottle: Dict, seconds_to_critical: Optional[float], alert_seconds: float) -> bool:
+        """Warnt einmal, wenn eine Flasche voraussichtlich innerhalb von `alert_seconds` kritisch wird.
+
+        Erneut gewarnt wird erst, wenn die Prognose zwischendurch wieder über
+        dem doppelten Zeitraum lag (z.B. nach dem Auffüllen). Ist die Flasche
+        schon kritisch, übernimmt `report_bottle`.
+        """
+        soon = seconds_to_critical is not None and 0 < seconds_to_critical <= alert_seconds
+        with self._lock:
+            if not soon:
+                if seconds_to_critical is None or seconds_to_critical > 2 * alert_seconds:
+                    self._forecast_alerts.discard(bottle_id)
+                return False
+            if bottle_id in self._forecast_alerts:
+                return False
+            self._forecast_alerts.add(bottle_id)
+
+        if not self.get_config().get("notifications", {}).get("forecast", True):
+            return False
+        name = bottle.get("name", bottle_id)
+        minutes = max(1, int(round(seconds_to_critical / 60)))
+        return self.notify(f"⏳ PROGNOSE: {name} erreicht in ca. {minutes} min den kritischen Füllstand "
+                           f"(noch {bottle['current_ml']:.0f}ml)", key=f"{bottle_id}:forecast")
+
+    @staticmethod
+    def _classify(current_ml: float, bottle: Dict) -> str:
+        if current_ml <= 0:
+            return "empty"
+        if current_ml <= bottle["critical_threshold_ml"]:
+            return "critical"
+        if current_ml <= bottle["warning_threshold_ml"]:
+            return "warning"
+        return "ok"
+
+    def send_now(self, message: str) -> bool:
+        """Sendet eine Nachricht sofort und synchron (ein Versuch, z.B. für Test-Nachrichten)."""
+        ok, _retry, _retry_after = self._post(message)
+        return ok
+
+    def _post(self, message: str):
+        """Gibt (erfolgreich, erneut versuchen, retry_after) zurück."""
+        config = self.get_config()
+        if not self._enabled(config):
+            logger.warning("Telegram-Bot-Token oder Chat-ID nicht konfiguriert")
+            return False, False, None
+        url = f"{config.get('api_url', DEFAULT_API_URL).rstrip('/')}/bot{config['bot_token']}/sendMessage"
+        data = {"chat_id": config["chat_id"], "text": message, "parse_mode": "HTML"}
+        try:
+            response = requests.post(url, data=data, timeout=self.timeout)
+        except Exception as e:
+            logger.error(f"Fehler beim Senden der Telegram-Nachricht: {e}")
+            return False, True, None
+        if response.status_code == 200:
+            logger.info(f"Telegram-Nachricht gesendet: {message}")
+            return True, False, None
+        logger.error(f"Fehler beim Senden der Telegram-Nachricht: {response.status_code}")
+        retry_after = None
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.json().get("parameters", {}).get("retry_after"))
+            except (ValueError, TypeError, AttributeError, json.JSONDecodeError):
+                retry_after = None
+        # Client-Fehler (falscher Token, Chat-ID, ...) werden nicht wiederholt
+        return False, response.status_code == 429 or response.status_code >= 500, retry_after
+
+    def _deliver(self, message: str) -> bool:
+        for attempt in range(self.max_retries + 1):
+            ok, retry, retry_after = self._post(message)
+            if ok:
+                return True
+            if not retry or attempt == self.max_retries:
+                break
+            delay = retry_after if retry_after is not None else min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+            if self._closed.wait(delay):
+                break
+        logger.error(f"Telegram-Nachricht endgültig verworfen: {message}")
+        return False
+
+    def _ensure_thread(self):
+        # Muss unter self._lock aufgerufen werden
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="tipsy-telegram", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._closed.is_set():
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.batch_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._closed.set()
+                    break
+                batch.append(item)
+            with self._lock:
+                for key, _message in batch:
+                    self._pending_keys.discard(key)
+            try:
+                self._deliver("\n".join(message for _key, message in batch))
+            except Exception:
+                logger.exception("Fehler im Telegram-Notifier")
+            finally:
+                with self._lock:
+                    self._unfinished -= len(batch)
+                    self._idle.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wartet, bis alle eingereihten Nachrichten verarbeitet sind. Gibt False bei Timeout zurück."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def close(self):
+        """Beendet den Worker; noch nicht gesendete Nachrichten werden verworfen."""
+        self._closed.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=1)
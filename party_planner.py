@@ -0,0 +1,147 @@
+# party_planner.py
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-9
+
+
+class RefillSuggestion(NamedTuple):
+    bottle_id: str
+    name: str
+    refill_ml: float
+    extra_drinks: float
+
+
+class PartyPlan(NamedTuple):
+    """Drink-Mix, der mit den aktuellen Füllständen möglichst viele Drinks ergibt."""
+    size: str
+    drinks: Dict[str, int]
+    total_drinks: int
+    weighted_total: float
+    upper_bound: float
+    leftover_ml: Dict[str, float]
+    refills: List[RefillSuggestion]
+
+
+def solve_lp(A: np.ndarray, b: np.ndarray, c: np.ndarray, max_iterations: int = 10000) -> np.ndarray:
+    """Löst max c·x unter A·x <= b, x >= 0 (mit b >= 0) mit dem Simplex-Verfahren.
+
+    Die Schlupfvariablen bilden eine zulässige Startbasis, eine erste Phase
+    ist deshalb nicht nötig. Es gibt nur so viele Zeilen wie Flaschen, eine
+    Iteration kostet also wenig, auch bei Hunderten von Rezepten. Gewählt
+    wird nach Dantzig; nach einem degenerierten Schritt nach Bland, damit
+    das Verfahren nicht zykelt.
+    """
+    m, n = A.shape
+    tableau = np.zeros((m + 1, n + m + 1))
+    tableau[:m, :n] = A
+    tableau[:m, n:n + m] = np.eye(m)
+    tableau[:m, -1] = b
+    tableau[m, :n] = -c
+    basis = np.arange(n, n + m)
+    bland = False
+    for _ in range(max_iterations):
+        reduced = tableau[m, :-1]
+        candidates = np.flatnonzero(reduced < -EPSILON)
+        if not len(candidates):
+            break
+        column = candidates[0] if bland else candidates[np.argmin(reduced[candidates])]
+        pivot_column = tableau[:m, column]
+        positive = pivot_column > EPSILON
+        if not positive.any():
+            raise ValueError('Das LP ist unbeschränkt')
+        ratios = np.full(m, np.inf)
+        ratios[positive] = tableau[:m, -1][positive] / pivot_column[positive]
+        best = ratios.min()
+        ties = np.flatnonzero(ratios <= best + EPSILON)
+        row = ties[np.argmin(basis[ties])]
+        bland = best <= EPSILON
+        pivot_row = tableau[row] / tableau[row, column]
+        tableau -= np.outer(tableau[:, column], pivot_row)
+        tableau[row] = pivot_row
+        basis[row] = column
+    else:
+        logger.warning(f'Simplex nach {max_iterations} Iterationen abgebrochen')
+    solution = np.zeros(n + m)
+    solution[basis] = tableau[:m, -1]
+    return np.maximum(solution[:n], 0)
+
+
+def round_down(A: np.ndarray, b: np.ndarray, c: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Rundet eine LP-Lösung ab und füllt den Rest gierig mit den wertvollsten Drinks auf, die noch passen."""
+    counts = np.floor(x + EPSILON)
+    remaining = b - A @ counts
+    order = np.argsort(-c, kind='stable')
+    while True:
+        fits = np.all(A[:, order] <= remaining[:, np.newaxis] + EPSILON, axis=0)
+        if not fits.any():
+            return counts
+        j = order[np.argmax(fits)]
+        counts[j] += 1
+        remaining -= A[:, j]
+
+
+def plan_party(matrix, bottles: Dict[str, Dict], size: str = 'single', weights: Optional[Dict[str, float]] = None,
+               refill_suggestions: int = 3) -> PartyPlan:
+    """Berechnet aus der Verfügbarkeitsmatrix den Drink-Mix mit den meisten (gewichteten) Drinks.
+
+    `weights` ordnet Cocktailnamen eine Beliebtheit zu (Standard 1). Gelöst
+    wird die LP-Relaxation über Rezept × Flasche, die Lösung wird dann
+    ganzzahlig abgerundet und gierig aufgefüllt. Für jede Flasche wird
+    zusätzlich durchgerechnet, wie viele Drinks ein Auffüllen bis zur
+    Kapazität bringt; die besten `refill_suggestions` werden vorgeschlagen.
+    """
+    weights = weights or {}
+    size_index = matrix.sizes.index(size)
+    levels = matrix.level_vector(bottles)
+    requirements = matrix.requirements[:, size_index, :]
+    # Nur Rezepte, deren Flaschen alle vorhanden sind und die überhaupt etwas verbrauchen
+    missing = (matrix.used & np.isneginf(levels)).any(axis=1)
+    rows = np.flatnonzero(matrix.valid & ~missing & (requirements.sum(axis=1) > 0))
+    A = requirements[rows].T
+    c = np.array([float(weights.get(matrix.cocktails[index].get('normal_name', ''), 1.0)) for index in rows])
+
+    def solve(b):
+        if not len(rows):
+            return np.zeros(0), np.zeros(0)
+        x = solve_lp(A, b, c)
+        return x, round_down(A, b, c, x)
+
+    b = np.maximum(levels, 0)
+    x, counts = solve(b)
+    weighted_total = float(c @ counts) if len(rows) else 0.0
+
+    refills = []
+    if refill_suggestions:
+        for column, bottle_id in enumerate(matrix.bottle_ids):
+            bottle = bottles.get(bottle_id)
+            if bottle is None or bottle['capacity_ml'] <= bottle['current_ml']:
+                continue
+            refilled = b.copy()
+            refilled[column] = bottle['capacity_ml']
+            _, refilled_counts = solve(refilled)
+            extra = float(c @ refilled_counts) - weighted_total if len(rows) else 0.0
+            if extra > EPSILON:
+                refills.append(RefillSuggestion(bottle_id, bottle.get('name', bottle_id),
+                                                bottle['capacity_ml'] - bottle['current_ml'], extra))
+        refills.sort(key=lambda refill: -refill.extra_drinks)
+
+    used_ml = A @ counts if len(rows) else np.zeros(len(b))
+    drinks = {matrix.cocktails[index].get('normal_name', ''): int(count) for index, count in zip(rows, counts) if count > 0}
+    plan = PartyPlan(size, drinks, int(counts.sum()), weighted_total, float(c @ x) if len(rows) else 0.0,
+                     {bottle_id: float(b[column] - used_ml[column]) for column, bottle_id in enumerate(matrix.bottle_ids)
+                      if bottle_id in bottles},
+                     refills[:refill_suggestions])
+    logger.info(f'Party-Plan ({size}): {plan.total_drinks} Drinks aus {len(rows)} Rezepten')
+    return plan
+
+
+def plan_party_now(size: str = 'single', weights: Optional[Dict[str, float]] = None, refill_suggestions: int = 3) -> PartyPlan:
+    """Plant mit cocktails.json und den aktuellen Füllständen des globalen bottle_monitor."""
+    from availability import get_availability_matrix
+    from bottle_monitor import bottle_monitor
+    return plan_party(get_availability_matrix(), bottle_monitor.get_all_bottles(), size, weights, refill_suggestions)
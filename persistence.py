@@ -0,0 +1,168 @@
+# persistence.py
+import os
+import json
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # z.B. Windows: nur Thread-Lock im eigenen Prozess, kein Dateilock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _PathLock:
+    def __init__(self):
+        self.rlock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+        self.exclusive = False
+
+
+_registry_lock = threading.Lock()
+_path_locks = {}
+
+
+def lock_file_for(path) -> str:
+    """Gibt die Lock-Datei zu einer Datei zurück (".<name>.lock" im selben Verzeichnis)."""
+    path = os.path.abspath(os.fspath(path))
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f'.{name}.lock')
+
+
+@contextmanager
+def file_lock(path, shared: bool = False):
+    """Hält eine fcntl-Advisory-Lock auf `path` (über eine eigene Lock-Datei).
+
+    Die Lock-Datei bleibt beim Umbenennen der eigentlichen Datei dieselbe,
+    dadurch sperrt sie zuverlässig über Prozesse hinweg. Im selben Prozess
+    ist die Lock reentrant: ein Lesen innerhalb von `update_json` blockiert
+    nicht. Innerhalb des Prozesses laufen Threads nacheinander.
+    """
+    lock_file = lock_file_for(path)
+    with _registry_lock:
+        entry = _path_locks.setdefault(lock_file, _PathLock())
+    with entry.rlock:
+        if entry.depth == 0:
+            entry.fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None and (entry.depth == 0 or (not shared and not entry.exclusive)):
+                fcntl.flock(entry.fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                entry.exclusive = entry.exclusive or not shared
+        except BaseException:
+            if entry.depth == 0:
+                os.close(entry.fd)
+                entry.fd = None
+            raise
+        entry.depth += 1
+        try:
+            yield
+        finally:
+            entry.depth -= 1
+            if entry.depth == 0:
+                # Schließen gibt die flock frei
+                os.close(entry.fd)
+                entry.fd = None
+                entry.exclusive = False
+
+
+def file_signature(path):
+    """Gibt (mtime_ns, size) einer Datei zurück oder None, wenn es sie nicht gibt."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_json(path, default=None):
+    """Liest eine JSON-Datei unter einer geteilten Lock. Gibt `default` zurück, wenn sie fehlt.
+
+    Da alle Schreiber atomar ersetzen, sieht ein Leser nie eine halb
+    geschriebene Datei; ungültiges JSON wird als Fehler weitergereicht.
+    """
+    with file_lock(path, shared=True):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+
+def _current_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Einmal beim Import lesen: os.umask() lässt sich nur setzend abfragen und wäre zwischendurch für alle Threads 0
+_UMASK = _current_umask()
+
+
+def copy_file_mode(fd, path):
+    """Gibt einer frisch angelegten temporären Datei die Rechte von `path` (neue Datei: 0644 minus umask).
+
+    mkstemp legt Dateien mit 0600 an; ohne das würde jedes os.replace die
+    Rechte der ersetzten Datei stillschweigend verschärfen.
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644 & ~_UMASK
+    if hasattr(os, 'fchmod'):
+        os.fchmod(fd, mode)
+
+
+def write_json(path, data, indent=2, ensure_ascii=False):
+    """Schreibt JSON atomar: temporäre Datei, fsync, os.replace - unter einer exklusiven Lock."""
+    path = os.fspath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    with file_lock(path):
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+        try:
+            copy_file_mode(fd, path)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        _fsync_directory(directory)
+    logger.debug(f'{path} gespeichert')
+
+
+def _fsync_directory(directory):
+    # Damit auch das Umbenennen einen Stromausfall übersteht (nicht überall möglich)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def update_json(path, default=None, **write_options):
+    """Lesen, ändern und schreiben unter einer einzigen exklusiven Lock.
+
+    Gibt die gelesenen Daten (oder `default`) zum Ändern heraus und schreibt
+    sie beim Verlassen des Blocks zurück - aber nicht, wenn der Block eine
+    Exception wirft.
+    """
+    with file_lock(path):
+        data = read_json(path, default)
+        yield data
+        write_json(path, data, **write_options)
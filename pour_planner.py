@@ -0,0 +1,261 @@
+# pour_planner.py
+import heapq
+import logging
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+import settings
+from ingredients import ingredient_key
+from persistence import file_signature, read_json
+
+logger = logging.getLogger(__name__)
+
+
+def parse_ml(measurement_str):
+    """Liest die Menge in ml aus einer Rezeptangabe wie "50 ml". Gibt None zurück, wenn sie nicht lesbar ist."""
+    parts = str(measurement_str).split()
+    if not parts:
+        return None
+    try:
+        return float(parts[0])
+    except ValueError:
+        return None
+
+
+def predict_makespan(durations, concurrency):
+    """Simuliert die Ausgabe in der gegebenen Reihenfolge und gibt die Gesamtdauer in Sekunden zurück.
+
+    Jede Dauer startet, sobald einer der `concurrency` Pumpen-Slots frei wird
+    (genau so arbeitet PourScheduler.pour_all).
+    """
+    concurrency = max(1, int(concurrency))
+    slots = [0.0] * min(concurrency, max(1, len(durations)))
+    for duration in durations:
+        start = heapq.heappop(slots)
+        heapq.heappush(slots, start + duration)
+    return max(slots) if durations else 0.0
+
+
+def plan_pour_order(pours, concurrency, duration=lambda pour: pour.seconds_to_pour):
+    """Sortiert die Pours so, dass der Drink möglichst schnell fertig ist.
+
+    Verwendet Longest-Processing-Time-First: die längsten Pumpzeiten starten
+    zuerst, kürzere füllen die frei werdenden Slots auf. Das Ergebnis liegt
+    höchstens 4/3 über dem Optimum und ist optimal, sobald alle Pours
+    gleichzeitig laufen dürfen.
+
+    Gibt (sortierte Pours, vorhergesagte Gesamtdauer in Sekunden) zurück.
+    """
+    ordered = sorted(pours, key=duration, reverse=True)
+    predicted_seconds = predict_makespan([duration(pour) for pour in ordered], concurrency)
+    return ordered, predicted_seconds
+
+
+class PumpStripe(NamedTuple):
+    """Anteil einer Zutat, den eine einzelne Pumpe ausgibt."""
+    pump_index: int
+    carbonated: bool
+    ml: float
+    seconds: float
+
+
+class CompiledIngredient(NamedTuple):
+    """Eine Zutat eines kompilierten Pour-Plans.
+
+    `pump_index` und `seconds` beschreiben die erste Pumpe bzw. die Dauer der
+    ganzen Zutat. `stripes` enthält je Pumpe den auszugebenden Anteil - mehr
+    als einen, wenn die Zutat auf mehrere Pumpen verteilt wird.
+    """
+    ingredient_name: str
+    bottle_id: str
+    pump_index: Optional[int]  # None, wenn keine Pumpe zugeordnet ist
+    carbonated: bool
+    recipe_ml: float
+    ml: float
+    seconds: Optional[float]
+    stripes: Tuple[PumpStripe, ...] = ()
+
+
+class PourPlan(NamedTuple):
+    """Fertig berechneter Plan für einen Cocktail in einer Größe (single/double)."""
+    cocktail_name: str
+    size: str
+    target_volume_ml: float
+    scaling_factor: float
+    ingredients: Tuple[CompiledIngredient, ...]
+
+
+def build_pump_lookup(pump_config, pump_count):
+    """Erstellt einmalig ein Mapping Zutat-ID (ingredient_key, ohne Aliase) -> (pump_index, carbonated).
+
+    Unterstützt das alte ("Pump 1": "gin") und das erweiterte Format
+    ("Pump 1": {"ingredient": "gin", "carbonated": true}). Wie bisher gewinnt
+    die erste Pumpe, die eine Zutat führt.
+    """
+    lookup = {}
+    for pump_label, config_entry in pump_config.items():
+        if isinstance(config_entry, dict):
+            config_ing_name = config_entry.get('ingredient', '')
+            is_carbonated = bool(config_entry.get('carbonated', False))
+        else:
+            config_ing_name = config_entry
+            is_carbonated = False
+        key = ingredient_key(str(config_ing_name or ''))
+        if not key or key in lookup:
+            continue
+        try:
+            pump_index = int(str(pump_label).replace('Pump', '').strip()) - 1
+        except ValueError:
+            logger.critical(f'Could not parse pump label "{pump_label}". Skipping.')
+            continue
+        if pump_index < 0 or pump_index >= pump_count:
+            logger.critical(f'Pump index {pump_index} out of range for "{config_ing_name}". Skipping.')
+            continue
+        lookup[key] = (pump_index, is_carbonated)
+    return lookup
+
+
+def build_pump_groups(pump_config, pump_count):
+    """Erstellt ein Mapping Zutat-ID (ingredient_key) -> [(pump_index, carbonated), ...] über alle Pumpen einer Zutat."""
+    groups = {}
+    for pump_label, config_entry in pump_config.items():
+        single = build_pump_lookup({pump_label: config_entry}, pump_count)
+        for key, pump in single.items():
+            groups.setdefault(key, []).append(pump)
+    return groups
+
+
+def split_across_pumps(ml, pumps):
+    """Verteilt `ml` so auf `pumps`, dass alle Pumpen gleichzeitig fertig werden.
+
+    Jede Pumpe bekommt einen Anteil proportional zu ihrer kalibrierten
+    Förderrate (1 / Koeffizient). Gibt ein Tupel von PumpStripes zurück.
+    """
+    coefficients = [settings.get_pump_coefficient(pump_index + 1, carbonated=carbonated) for pump_index, carbonated in pumps]
+    if len(pumps) > 1 and all(coefficient > 0 for coefficient in coefficients):
+        total_rate = sum(1 / coefficient for coefficient in coefficients)
+        return tuple(PumpStripe(pump_index, carbonated, ml / coefficient / total_rate, ml / total_rate)
+                     for (pump_index, carbonated), coefficient in zip(pumps, coefficients))
+    pump_index, carbonated = pumps[0]
+    return (PumpStripe(pump_index, carbonated, ml, ml * coefficients[0]),)
+
+
+def compile_recipe(cocktail_name, ingredients, size, target_volume_ml, pump_lookup, bottle_id_for,
+                   pump_groups=None, concurrency=None):
+    """Kompiliert die Zutaten eines Rezepts in einen PourPlan für eine Größe.
+
+    Steht eine Zutat laut `pump_groups` auf mehreren Pumpen, wird sie auf alle
+    verteilt - aber nur, wenn das die vorhergesagte Gesamtdauer unter dem
+    Concurrency-Limit verkürzt (jede weitere Pumpe belegt einen Slot).
+    """
+    parsed = []
+    for ingredient_name, measurement_str in ingredients.items():
+        recipe_ml = parse_ml(measurement_str)
+        if recipe_ml is None:
+            logger.critical(f'Cannot parse measurement "{measurement_str}" for {ingredient_name}. Skipping.')
+            continue
+        parsed.append((ingredient_name, recipe_ml))
+
+    current_total = sum(recipe_ml for _, recipe_ml in parsed)
+    scaling_factor = target_volume_ml / current_total if current_total > 0 else 1.0
+
+    stripes = []
+    for ingredient_name, recipe_ml in parsed:
+        pump = pump_lookup.get(ingredient_key(ingredient_name))
+        stripes.append(split_across_pumps(recipe_ml * scaling_factor, [pump]) if pump else ())
+
+    if pump_groups:
+        concurrency = concurrency or settings.PUMP_CONCURRENCY
+        durations = lambda: [stripe.seconds for item_stripes in stripes for stripe in item_stripes]
+        # Längste Zutaten zuerst aufteilen und nur behalten, was die Gesamtdauer verkürzt
+        candidates = sorted(range(len(parsed)), key=lambda i: -sum(stripe.seconds for stripe in stripes[i]))
+        for i in candidates:
+            pumps = pump_groups.get(ingredient_key(parsed[i][0]), [])
+            if len(pumps) < 2 or not stripes[i]:
+                continue
+            best = predict_makespan(sorted(durations(), reverse=True), concurrency)
+            unsplit = stripes[i]
+            stripes[i] = split_across_pumps(parsed[i][1] * scaling_factor, pumps)
+            if predict_makespan(sorted(durations(), reverse=True), concurrency) < best:
+                logger.debug(f'{parsed[i][0]} wird auf die Pumpen {[pump_index + 1 for pump_index, _ in pumps]} verteilt')
+            else:
+                stripes[i] = unsplit
+
+    compiled = []
+    for (ingredient_name, recipe_ml), item_stripes in zip(parsed, stripes):
+        ml = recipe_ml * scaling_factor
+        pump_index, carbonated, seconds = None, False, None
+        if item_stripes:
+            pump_index, carbonated = item_stripes[0].pump_index, item_stripes[0].carbonated
+            seconds = max(stripe.seconds for stripe in item_stripes)
+        compiled.append(CompiledIngredient(ingredient_name, bottle_id_for(ingredient_name), pump_index, carbonated,
+                                           recipe_ml, ml, seconds, item_stripes))
+    return PourPlan(cocktail_name, size, target_volume_ml, scaling_factor, tuple(compiled))
+
+
+class PourPlanCache:
+    """Hält für jeden Cocktail fertige PourPlans für single und double.
+
+    Die Pläne werden einmal kompiliert und erst neu berechnet, wenn sich
+    cocktails.json, pump_config.json oder die Kalibrierung (settings.py)
+    ändern. Beim Tippen auf "single" muss dadurch nichts mehr geparst oder
+    gesucht werden.
+    """
+
+    def __init__(self, bottle_id_for, pump_count):
+        self.bottle_id_for = bottle_id_for
+        self.pump_count = pump_count
+        self._lock = threading.Lock()
+        self._signature = None
+        self._pump_lookup = {}
+        self._pump_groups = {}
+        self._plans = {}
+
+    def _watched_files(self):
+        return (settings.COCKTAILS_FILE, settings.CONFIG_FILE, settings.__file__)
+
+    def _sizes(self):
+        return {'single': settings.SMALL_COCKTAIL_SIZE_ML, 'double': settings.LARGE_COCKTAIL_SIZE_ML}
+
+    def _refresh(self):
+        signature = tuple(file_signature(path) for path in self._watched_files())
+        if signature == self._signature:
+            return
+        settings._load_calibration_from_file()
+        pump_config = _load_json(settings.CONFIG_FILE, {})
+        cocktails = _load_json(settings.COCKTAILS_FILE, {}).get('cocktails', [])
+        self._pump_lookup = build_pump_lookup(pump_config, self.pump_count)
+        self._pump_groups = build_pump_groups(pump_config, self.pump_count)
+        self._plans = {}
+        for cocktail in cocktails:
+            name = cocktail.get('normal_name', '')
+            ingredients = cocktail.get('ingredients', {}) or {}
+            self._plans[name] = (ingredients, self._compile(name, ingredients))
+        self._signature = signature
+        logger.debug(f'{len(self._plans)} Pour-Pläne kompiliert')
+
+    def _compile(self, name, ingredients):
+        return {size: compile_recipe(name, ingredients, size, volume, self._pump_lookup, self.bottle_id_for,
+                                     pump_groups=self._pump_groups)
+                for size, volume in self._sizes().items()}
+
+    def get_plan(self, recipe, size='single'):
+        """Gibt den PourPlan für ein Rezept (dict aus cocktails.json) und eine Größe zurück."""
+        size = 'double' if str(size).lower() == 'double' else 'single'
+        name = recipe.get('normal_name', '')
+        ingredients = recipe.get('ingredients', {}) or {}
+        with self._lock:
+            self._refresh()
+            cached = self._plans.get(name)
+            if cached and cached[0] == ingredients:
+                return cached[1][size]
+            # Rezept ist (noch) nicht in cocktails.json gespeichert -> einmalig kompilieren
+            return self._compile(name, ingredients)[size]
+
+
+def _load_json(path, default):
+    try:
+        return read_json(path, default)
+    except Exception:
+        logger.exception(f'Error loading {path}')
+        return default
@@ -0,0 +1,132 @@
+# pump_backend.py
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class MonotonicClock:
+    """Echte Zeit auf Basis von `time.monotonic()`.
+
+    `spin_seconds` ist der Rest vor einer Deadline, den die PumpTimingEngine
+    aktiv abwartet statt zu schlafen (für Stopps unter einer Millisekunde).
+    """
+
+    spin_seconds = 0.002
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(max(0.0, seconds))
+
+    def wait_until(self, condition, deadline):
+        """Wartet auf `condition` (muss gehalten werden), höchstens bis `deadline`."""
+        condition.wait(max(0.0, deadline - self.now()))
+
+
+class VirtualClock:
+    """Simulierte Zeit, die sofort vorgespult wird.
+
+    `sleep` und `wait_until` blockieren nicht, sondern setzen die Uhr direkt
+    auf das Ende der Wartezeit. Ein kompletter Drink oder eine Reinigung läuft
+    dadurch in Millisekunden durch, die Zeitstempel entsprechen aber dem echten
+    Ablauf. Mit `advance` kann die Uhr zusätzlich von Hand vorgestellt werden.
+    """
+
+    spin_seconds = 0.0
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+        self._lock = threading.Lock()
+
+    def now(self):
+        with self._lock:
+            return self._now
+
+    def advance(self, seconds):
+        """Stellt die Uhr um `seconds` Sekunden vor und gibt die neue Zeit zurück."""
+        with self._lock:
+            self._now += max(0.0, seconds)
+            return self._now
+
+    def advance_to(self, timestamp):
+        """Stellt die Uhr auf `timestamp`, falls dieser in der Zukunft liegt."""
+        with self._lock:
+            self._now = max(self._now, timestamp)
+            return self._now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def wait_until(self, condition, deadline):
+        self.advance_to(deadline)
+
+
+class GpiozeroBackend:
+    """Schaltet die Pins über gpiozero (Raspberry Pi)."""
+
+    def __init__(self):
+        self._devices = {}
+
+    def setup(self, pins):
+        from gpiozero import DigitalOutputDevice
+        for pin in pins:
+            if pin not in self._devices:
+                self._devices[pin] = DigitalOutputDevice(pin)
+
+    def write(self, pin_values):
+        """Setzt die Pins in der angegebenen Reihenfolge. `pin_values` ist eine Liste von (pin, bool)."""
+        devices = [(self._devices[pin], value) for pin, value in pin_values]
+        for device, value in devices:
+            device.value = value
+
+
+class LoggingBackend:
+    """Debug-Backend: schaltet nichts, sondern loggt nur die Aufrufe."""
+
+    def setup(self, pins):
+        logger.debug(f'setup({len(pins)} pins) called — Not actually initializing GPIO pins.')
+
+    def write(self, pin_values):
+        logger.debug(f'write({pin_values}) called')
+
+
+class SimulatedBackend:
+    """Simulierte Pumpen ohne Hardware.
+
+    Jeder Pinwechsel wird mit dem Zeitstempel der (standardmäßig virtuellen)
+    Uhr in `transitions` protokolliert. Zusammen mit `controller.set_pump_backend`
+    laufen komplette Pour-Abläufe in Millisekunden und lassen sich exakt prüfen.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or VirtualClock()
+        self.pin_states = {}
+        self.transitions = []
+        self._lock = threading.Lock()
+
+    def setup(self, pins):
+        with self._lock:
+            for pin in pins:
+                self.pin_states.setdefault(pin, False)
+
+    def write(self, pin_values):
+        timestamp = self.clock.now()
+        with self._lock:
+            for pin, value in pin_values:
+                value = bool(value)
+                if self.pin_states.get(pin, False) != value:
+                    self.pin_states[pin] = value
+                    self.transitions.append((timestamp, pin, value))
+
+    def pin_history(self, pin):
+        """Gibt alle Wechsel eines Pins als Liste von (zeitstempel, wert) zurück."""
+        with self._lock:
+            return [(timestamp, value) for timestamp, p, value in self.transitions if p == pin]
+
+    def reset(self):
+        """Verwirft das Protokoll (die Pin-Zustände bleiben erhalten)."""
+        with self._lock:
+            self.transitions = []
@@ -40,6 +40,14 @@ settings = {
         'parse_method': int,
         'default': '6'
     }, 
+    'MAINTENANCE_CONCURRENCY': {
+        'parse_method': int,
+        'default': '0'
+    },
+    'PUMP_STAGGER_SECONDS': {
+        'parse_method': float,
+        'default': '0.1'
+    },
     'RELOAD_COCKTAILS_TIMEOUT': {
         'parse_method': int,
         'default': '0'
@@ -79,6 +87,22 @@ settings = {
     'LARGE_COCKTAIL_SIZE_ML': {
         'parse_method': int,
         'default': '350'
+    },
+    'DEPLETION_WINDOW_MINUTES': {
+        'parse_method': float,
+        'default': '60'
+    },
+    'DEPLETION_ALERT_MINUTES': {
+        'parse_method': float,
+        'default': '30'
+    },
+    'IDLE_FPS': {
+        'parse_method': int,
+        'default': '10'
+    },
+    'PREFETCH_RADIUS': {
+        'parse_method': int,
+        'default': '2'
     }
 }
 for name in settings:
@@ -0,0 +1,153 @@
+class TestAvailability:
+    def get_availability(self):
+        """Get availability from parent directory with default settings"""
+        import sys
+        sys.path.append('.')
+        import availability
+        import pour_planner
+        self.availability = availability
+        self.pour_planner = pour_planner
+
+    def bottle(self, current_ml):
+        return {'name': 'Test', 'capacity_ml': 1000, 'current_ml': current_ml,
+                'warning_threshold_ml': 200, 'critical_threshold_ml': 100}
+
+    def get_matrix(self, cocktails):
+        lookup = {'gin': (0, False), 'tonic': (1, False), 'rum': (2, False)}
+        volumes = {'single': 200, 'double': 400}
+
+        def plan_for(cocktail, size):
+            return self.pour_planner.compile_recipe(cocktail['normal_name'], cocktail['ingredients'], size,
+                                                    volumes[size], lookup, str.lower)
+        return self.availability.AvailabilityMatrix(cocktails, plan_for, str.lower)
+
+    def test_available_for_all_cocktails_and_sizes(self):
+        """Test that one comparison gives availability per cocktail and size"""
+        self.get_availability()
+        cocktails = [{'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}},
+                     {'normal_name': 'Rum', 'ingredients': {'Rum': '200 ml'}},
+                     {'normal_name': 'Empty', 'ingredients': {}}]
+        matrix = self.get_matrix(cocktails)
+        assert matrix.requirements.shape == (3, 2, 3)
+
+        bottles = {'gin': self.bottle(99), 'tonic': self.bottle(1000)}
+        assert matrix.available(bottles).tolist() == [[True, False], [False, False], [False, False]]
+        assert matrix.available_cocktails(bottles) == cocktails[:1]
+        assert matrix.available_cocktails(bottles, 'double') == []
+        assert matrix.missing_ingredients(0, bottles) == []
+        assert matrix.missing_ingredients(0, bottles, 'double') == ['Gin (nur 99ml verfügbar, 100.0ml benötigt)']
+        assert matrix.missing_ingredients(1, bottles) == ["Rum (Flasche 'rum' nicht gefunden)"]
+
+        bottles['gin'] = self.bottle(100)
+        assert matrix.available(bottles)[0].tolist() == [True, True]
+
+    def test_index_of_checks_ingredients(self):
+        """Test that a cocktail whose recipe differs from the catalog is not looked up in the matrix"""
+        self.get_availability()
+        cocktail = {'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}}
+        matrix = self.get_matrix([cocktail])
+        assert matrix.index_of(dict(cocktail)) == 0
+        assert matrix.index_of({'normal_name': 'G&T', 'ingredients': {'Gin': '60 ml'}}) is None
+        assert matrix.index_of({'normal_name': 'Other', 'ingredients': {}}) is None
+
+    def test_tracker_pushes_changes_after_consume_and_refill(self, tmp_path):
+        """Test that booking a bottle re-evaluates only its cocktails and pushes the changed set"""
+        self.get_availability()
+        import json
+        from bottle_monitor import BottleMonitor
+        config_file = tmp_path / 'bottle_config.json'
+        config_file.write_text(json.dumps({'bottles': {'gin': self.bottle(150), 'tonic': self.bottle(1000),
+                                                       'rum': self.bottle(1000)}}))
+        monitor = BottleMonitor(str(config_file))
+        monitor.telegram_config = {'enabled': False}
+        cocktails = [{'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}},
+                     {'normal_name': 'Rum', 'ingredients': {'Rum': '200 ml'}}]
+        matrix = self.get_matrix(cocktails)
+        assert matrix.cocktails_using('gin').tolist() == [0]
+        assert matrix.cocktails_using('lime').tolist() == []
+
+        tracker = self.availability.AvailabilityTracker(monitor, matrix_source=lambda: matrix)
+        updates = []
+        tracker.subscribe(updates.append)
+        assert tracker.available_cocktails() == cocktails
+
+        monitor.consume_liquid('rum', 10)
+        assert updates == []
+        monitor.consume_liquid('gin', 101)
+        assert [update.removed for update in updates] == [cocktails[:1]]
+        assert updates[-1].cocktails == cocktails[1:]
+        assert tracker.available_cocktails() == cocktails[1:]
+
+        monitor.refill_bottle('gin', 500)
+        assert updates[-1].added == cocktails[:1]
+        assert updates[-1].cocktails == cocktails
+        tracker.close()
+        monitor.consume_liquid('gin', 500)
+        assert len(updates) == 2
+
+    def test_servings_remaining(self, tmp_path):
+        """Test that servings per cocktail and size follow every booking"""
+        self.get_availability()
+        import json
+        from bottle_monitor import BottleMonitor
+        config_file = tmp_path / 'bottle_config.json'
+        config_file.write_text(json.dumps({'bottles': {'gin': self.bottle(400), 'tonic': self.bottle(1000)}}))
+        monitor = BottleMonitor(str(config_file))
+        monitor.telegram_config = {'enabled': False}
+        cocktails = [{'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}},
+                     {'normal_name': 'Rum', 'ingredients': {'Rum': '200 ml'}}]
+        matrix = self.get_matrix(cocktails)
+        assert matrix.servings(monitor.get_all_bottles()).tolist() == [[6.0, 3.0], [0.0, 0.0]]
+
+        tracker = self.availability.AvailabilityTracker(monitor, matrix_source=lambda: matrix)
+        monitor._availability = tracker
+        assert monitor.get_servings_remaining() == {'G&T': {'single': 6, 'double': 3}, 'Rum': {'single': 0, 'double': 0}}
+        monitor.consume_liquid('gin', 101)
+        assert tracker.servings_of(cocktails[0]) == {'single': 5, 'double': 2}
+        monitor.consume_liquid('tonic', 800)
+        assert tracker.servings_of(cocktails[0]) == {'single': 1, 'double': 0}
+        assert tracker.servings_of({'normal_name': 'Other'}) == {}
+
+    def test_tracker_picks_up_catalog_changes(self, tmp_path):
+        """Test that a changed catalog is re-evaluated on the next read, without any booking"""
+        self.get_availability()
+        import json
+        from bottle_monitor import BottleMonitor
+        config_file = tmp_path / 'bottle_config.json'
+        config_file.write_text(json.dumps({'bottles': {'gin': self.bottle(400), 'tonic': self.bottle(1000),
+                                                       'rum': self.bottle(1000)}}))
+        monitor = BottleMonitor(str(config_file))
+        monitor.telegram_config = {'enabled': False}
+        cocktails = [{'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}}]
+        catalog = {'matrix': self.get_matrix(cocktails)}
+        tracker = self.availability.AvailabilityTracker(monitor, matrix_source=lambda: catalog['matrix'])
+        updates = []
+        tracker.subscribe(updates.append)
+        assert tracker.available_cocktails() == cocktails
+
+        # Neuer Rezept-Eintrag in cocktails.json -> neue Matrix
+        cocktails = cocktails + [{'normal_name': 'Rum', 'ingredients': {'Rum': '200 ml'}}]
+        catalog['matrix'] = self.get_matrix(cocktails)
+        assert tracker.available_cocktails() == cocktails
+        assert [update.added for update in updates] == [cocktails[1:]]
+        tracker.close()
+
+    def test_servings_follow_catalog_changes(self, tmp_path):
+        """Test that servings are recomputed when the catalog changes"""
+        self.get_availability()
+        import json
+        from bottle_monitor import BottleMonitor
+        config_file = tmp_path / 'bottle_config.json'
+        config_file.write_text(json.dumps({'bottles': {'gin': self.bottle(400), 'tonic': self.bottle(1000)}}))
+        monitor = BottleMonitor(str(config_file))
+        monitor.telegram_config = {'enabled': False}
+        cocktails = [{'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}}]
+        catalog = {'matrix': self.get_matrix(cocktails)}
+        tracker = self.availability.AvailabilityTracker(monitor, matrix_source=lambda: catalog['matrix'])
+        assert tracker.servings_of(cocktails[0]) == {'single': 6, 'double': 3}
+
+        stronger = {'normal_name': 'G&T', 'ingredients': {'Gin': '100 ml', 'Tonic': '100 ml'}}
+        catalog['matrix'] = self.get_matrix([stronger])
+        assert tracker.servings_of(stronger) == {'single': 4, 'double': 2}
+        assert tracker.servings_by_name() == {'G&T': {'single': 4, 'double': 2}}
+        tracker.close()
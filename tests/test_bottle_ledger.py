@@ -0,0 +1,37 @@
+import pytest
+
+
+class TestBottleLedger:
+    def get_ledger(self, tmp_path):
+        """Get a BottleLedger on a temporary database"""
+        import sys
+        sys.path.append('.')
+        import bottle_ledger
+        self.bottle_ledger = bottle_ledger
+        return bottle_ledger.BottleLedger(tmp_path / 'bottle_config.db')
+
+    def bottle(self, current_ml):
+        return {'name': 'Test', 'capacity_ml': 1000, 'current_ml': current_ml,
+                'warning_threshold_ml': 200, 'critical_threshold_ml': 100}
+
+    def test_consume_is_all_or_nothing(self, tmp_path):
+        """Test that a short bottle leaves every level and the journal unchanged"""
+        ledger = self.get_ledger(tmp_path)
+        ledger.replace_bottles({'gin': self.bottle(500), 'tonic': self.bottle(100)})
+        with pytest.raises(self.bottle_ledger.InsufficientLiquid) as error:
+            ledger.consume({'gin': 50, 'tonic': 150})
+        assert len(error.value.missing) == 1
+        assert {bottle_id: bottle['current_ml'] for bottle_id, bottle in ledger.get_bottles().items()} == {'gin': 500, 'tonic': 100}
+        assert [entry['kind'] for entry in ledger.journal()] == ['import', 'import']
+
+    def test_second_connection_sees_bookings(self, tmp_path):
+        """Test that two connections (e.g. app and interface) book into the same levels"""
+        ledger = self.get_ledger(tmp_path)
+        ledger.replace_bottles({'gin': self.bottle(500)})
+        other = self.bottle_ledger.BottleLedger(tmp_path / 'bottle_config.db')
+        version = ledger.data_version()
+        assert other.consume({'gin': 100}) == {'gin': 400}
+        assert ledger.data_version() != version
+        assert ledger.consume({'gin': 100}) == {'gin': 300}
+        assert ledger.add({'gin': 900}, kind='refill') == {'gin': 1000}
+        assert other.get_bottles()['gin']['current_ml'] == 1000
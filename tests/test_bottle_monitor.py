@@ -0,0 +1,153 @@
+import json
+
+
+class TestBottleMonitor:
+    def get_monitor(self, tmp_path, bottles):
+        """Get a BottleMonitor on a temporary bottle_config.json"""
+        import sys
+        sys.path.append('.')
+        import bottle_monitor
+        config_file = tmp_path / 'bottle_config.json'
+        config_file.write_text(json.dumps({'bottles': bottles}))
+        self.config_file = config_file
+        self.monitor = bottle_monitor.BottleMonitor(str(config_file))
+        # Niemals echte Telegram-Nachrichten aus den Tests verschicken
+        self.monitor.telegram_config = {'enabled': False}
+
+    def bottle(self, current_ml):
+        return {'name': 'Test', 'capacity_ml': 1000, 'current_ml': current_ml,
+                'warning_threshold_ml': 200, 'critical_threshold_ml': 100}
+
+    def levels(self):
+        bottles = json.loads(self.config_file.read_text())['bottles']
+        return {bottle_id: bottle['current_ml'] for bottle_id, bottle in bottles.items()}
+
+    def test_reserve_and_commit(self, tmp_path):
+        """Test that all ingredients of a drink are deducted together"""
+        self.get_monitor(tmp_path, {'gin': self.bottle(500), 'tonic': self.bottle(800)})
+        reservation = self.monitor.reserve([('gin', 50), ('tonic', 150), ('gin', 10)])
+        assert reservation is not None
+        assert reservation.amounts == {'gin': 60, 'tonic': 150}
+        assert self.levels() == {'gin': 440, 'tonic': 650}
+        reservation.commit()
+        reservation.rollback()
+        assert self.levels() == {'gin': 440, 'tonic': 650}
+
+    def test_reserve_short_bottle_deducts_nothing(self, tmp_path):
+        """Test that a short or missing bottle leaves every level unchanged"""
+        self.get_monitor(tmp_path, {'gin': self.bottle(500), 'tonic': self.bottle(100)})
+        assert self.monitor.reserve([('gin', 50), ('tonic', 150)]) is None
+        assert self.monitor.reserve([('gin', 50), ('rum', 10)]) is None
+        assert self.levels() == {'gin': 500, 'tonic': 100}
+
+    def test_rollback(self, tmp_path):
+        """Test that a rollback puts the reserved liquid back"""
+        self.get_monitor(tmp_path, {'gin': self.bottle(500)})
+        reservation = self.monitor.reserve([('gin', 50)])
+        assert self.levels() == {'gin': 450}
+        reservation.rollback()
+        assert self.levels() == {'gin': 500}
+        assert self.monitor.consume_liquid('gin', 100)
+        assert self.levels() == {'gin': 400}
+
+    def test_reload_only_when_ledger_changes(self, tmp_path):
+        """Test that reads use the in-memory state until another process books into the ledger"""
+        self.get_monitor(tmp_path, {'gin': self.bottle(500)})
+        state = self.monitor.bottles
+        assert self.monitor.get_all_bottles()['gin']['current_ml'] == 500
+        assert self.monitor.bottles is state
+
+        self.monitor.consume_liquid('gin', 100)
+        assert self.monitor.get_all_bottles()['gin']['current_ml'] == 400
+        assert self.monitor.bottles is state
+
+        import bottle_monitor
+        other_process = bottle_monitor.BottleMonitor(str(self.config_file))
+        assert other_process.consume_liquid('gin', 50)
+        assert self.monitor.get_all_bottles()['gin']['current_ml'] == 350
+        assert self.monitor.bottles is not state
+        assert self.levels() == {'gin': 350}
+
+    def test_journal_and_json_import(self, tmp_path):
+        """Test that bookings are journaled and bottle_config.json is only imported on first start"""
+        self.get_monitor(tmp_path, {'gin': self.bottle(500)})
+        reservation = self.monitor.reserve([('gin', 100)])
+        reservation.rollback()
+        self.monitor.refill_bottle('gin', 1000)
+        kinds = [(entry['kind'], entry['delta_ml']) for entry in self.monitor.ledger.journal('gin')]
+        assert kinds == [('refill', 500), ('rollback', 100), ('consume', -100), ('import', 500)]
+
+        self.config_file.write_text(json.dumps({'bottles': {'gin': self.bottle(10)}}))
+        import bottle_monitor
+        assert bottle_monitor.BottleMonitor(str(self.config_file)).get_all_bottles()['gin']['current_ml'] == 1000
+        assert self.monitor.import_json()
+        assert self.monitor.get_all_bottles()['gin']['current_ml'] == 10
+
+    def test_depletion_forecast(self, tmp_path):
+        """Test that recent pours give a rolling rate and a time until the critical threshold"""
+        import time
+        self.get_monitor(tmp_path, {'gin': self.bottle(500), 'tonic': self.bottle(800)})
+        self.monitor.consume_liquid('gin', 100)
+        self.monitor.consume_liquid('gin', 50)
+        reservation = self.monitor.reserve([('gin', 30)])
+        reservation.rollback()
+        forecasts = self.monitor.get_depletion_forecasts(now=time.time())
+        gin = forecasts['gin']
+        assert abs(gin.rate_ml_per_hour * self.monitor_window_hours() - 150) < 1
+        assert abs(gin.seconds_to_critical - (350 - 100) / (gin.rate_ml_per_hour / 3600)) < 1e-6
+        assert gin.seconds_to_empty > gin.seconds_to_critical
+        assert forecasts['tonic'].seconds_to_critical is None
+
+        # Eine Stunde später zählt der Verbrauch nur noch mit exp(-1)
+        later = self.monitor.get_depletion_forecasts(now=time.time() + 3600)['gin']
+        assert abs(later.rate_ml_per_hour / gin.rate_ml_per_hour - 2.718281828 ** -1) < 0.01
+
+    def monitor_window_hours(self):
+        import settings
+        return settings.DEPLETION_WINDOW_MINUTES / 60
+
+    def test_legacy_ids_are_rekeyed_on_load(self, tmp_path):
+        """Test that broken or old bottle IDs get their canonical ID when the monitor starts"""
+        import sys
+        sys.path.append('.')
+        from bottle_ledger import BottleLedger
+        from bottle_monitor import BottleMonitor
+        rum = dict(self.bottle(500), name='Rum (weiß)')
+        self.get_monitor(tmp_path, {'rum_weiÃ\x9f': rum, 'Tonic Water': dict(self.bottle(800), name='Tonic Water')})
+        assert sorted(self.monitor.get_all_bottles()) == ['rum_weiss', 'tonic_water']
+
+        ledger = BottleLedger(tmp_path / 'other.db')
+        ledger.replace_bottles({'pfirsichlikÃ¶r': dict(self.bottle(300), name='Pfirsichlikör')})
+        ledger.close()
+        monitor = BottleMonitor(str(tmp_path / 'other.json'))
+        monitor.telegram_config = {'enabled': False}
+        assert list(monitor.get_all_bottles()) == ['pfirsichlikoer']
+        assert [entry['bottle_id'] for entry in monitor.ledger.journal()] == ['pfirsichlikoer']
+        assert monitor.can_make_cocktail([('Pfirsichlikoer', 100)]) == (True, [])
+
+    def test_save_config_keeps_bottles(self, tmp_path):
+        """Test that saving the configuration writes the current bottles back unchanged"""
+        self.get_monitor(tmp_path, {'gin': self.bottle(500), 'tonic': self.bottle(800)})
+        self.monitor.bottles['bottles']['gin']['current_ml'] = 300
+        self.monitor.save_config()
+        assert sorted(self.monitor.bottles['bottles']) == ['gin', 'tonic']
+        assert {bottle_id: bottle['current_ml'] for bottle_id, bottle in self.monitor.ledger.get_bottles().items()} == {
+            'gin': 300, 'tonic': 800}
+        assert self.levels() == {'gin': 300, 'tonic': 800}
+
+    def test_save_config_round_trip(self, tmp_path):
+        """Test that save_config and loading again keep the flat {bottle_id: bottle} shape"""
+        import bottle_monitor
+        self.get_monitor(tmp_path, {'gin': self.bottle(500), 'tonic': self.bottle(800)})
+        self.monitor.save_config()
+        exported = json.loads(self.config_file.read_text())
+        assert list(exported) == ['bottles']
+        assert sorted(exported['bottles']) == ['gin', 'tonic']
+
+        for monitor in (self.monitor, bottle_monitor.BottleMonitor(str(self.config_file))):
+            monitor.telegram_config = {'enabled': False}
+            assert monitor.reload_config_from_file(force=True)
+            bottles = monitor.get_all_bottles()
+            assert sorted(bottles) == ['gin', 'tonic']
+            assert all(bottle['capacity_ml'] == 1000 for bottle in bottles.values())
+            assert {bottle_id: bottle['current_ml'] for bottle_id, bottle in bottles.items()} == {'gin': 500, 'tonic': 800}
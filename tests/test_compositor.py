@@ -0,0 +1,60 @@
+import os
+
+import pygame
+
+
+class TestCompositor:
+    def get_compositor(self):
+        """Get compositor from parent directory on a hidden 200x200 display"""
+        import sys
+        sys.path.append('.')
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        import compositor
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((200, 200))
+        self.compositor = compositor.Compositor(self.screen)
+
+    def layer(self, surface, dest, static=False):
+        return {'function': self.screen.blit, 'args': (surface, dest), 'static': static}
+
+    def test_only_changed_regions_are_redrawn(self):
+        """Test that an unchanged frame draws nothing and a moved layer only its old and new area"""
+        self.get_compositor()
+        background = pygame.Surface((200, 200))
+        background.fill((0, 0, 255))
+        badge = pygame.Surface((10, 10))
+        badge.fill((255, 0, 0))
+        layers = {'background': self.layer(background, (0, 0), static=True),
+                  'badge': self.layer(badge, (20, 20))}
+
+        assert self.compositor.draw(layers) == [pygame.Rect(0, 0, 200, 200)]
+        assert self.compositor.draw(layers) == []
+
+        layers['badge'] = self.layer(badge, pygame.Rect(25, 20, 10, 10))
+        assert self.compositor.draw(layers) == [pygame.Rect(20, 20, 15, 10)]
+        assert self.screen.get_at((22, 22))[:3] == (0, 0, 255)
+        assert self.screen.get_at((30, 22))[:3] == (255, 0, 0)
+
+        del layers['badge']
+        assert self.compositor.draw(layers) == [pygame.Rect(25, 20, 10, 10)]
+        assert self.screen.get_at((30, 22))[:3] == (0, 0, 255)
+
+    def test_static_layers_share_one_base_surface(self):
+        """Test that the static bottom layers are composited once and rebuilt only when they change"""
+        self.get_compositor()
+        background = pygame.Surface((200, 200))
+        frame = pygame.Surface((50, 50))
+        layers = {'background': self.layer(background, (0, 0), static=True),
+                  'frame': self.layer(frame, (10, 10), static=True),
+                  'current_cocktail': self.layer(pygame.Surface((100, 100)), (50, 50))}
+        self.compositor.draw(layers)
+        base = self.compositor._base
+        assert base is not None
+
+        layers['current_cocktail'] = self.layer(pygame.Surface((100, 100)), (50, 50))
+        self.compositor.draw(layers)
+        assert self.compositor._base is base
+
+        layers['frame'] = self.layer(frame, (20, 10), static=True)
+        assert self.compositor.draw(layers) == [pygame.Rect(10, 10, 60, 50)]
+        assert self.compositor._base is not base
@@ -0,0 +1,199 @@
+import json
+import asyncio
+import threading
+import pytest
+
+
+class TestController:
+    def get_controller(self):
+        """Get controller from parent directory with default settings"""
+        import sys
+        sys.path.append('.')
+        import controller
+        self.controller = controller
+
+    def use_temporary_monitor(self, tmp_path, monkeypatch, bottle_ids=()):
+        """Replace the global bottle_monitor by one on a temporary bottle_config.json and simulate the pumps"""
+        from bottle_monitor import BottleMonitor
+        from pump_backend import SimulatedBackend
+        config_file = tmp_path / 'bottle_config.json'
+        bottle = {'name': 'Test', 'capacity_ml': 1000, 'current_ml': 1000, 'warning_threshold_ml': 200, 'critical_threshold_ml': 100}
+        config_file.write_text(json.dumps({'bottles': {bottle_id: dict(bottle) for bottle_id in bottle_ids}}))
+        monitor = BottleMonitor(str(config_file))
+        # Niemals echte Telegram-Nachrichten aus den Tests verschicken
+        monitor.telegram_config = {'enabled': False}
+        monkeypatch.setattr(self.controller, 'bottle_monitor', monitor)
+        self.controller.set_pump_backend(SimulatedBackend())
+        return monitor
+
+    def test_scheduler_thread_count_stays_flat(self):
+        """Test that pouring many drinks does not create new threads"""
+        self.get_controller()
+        scheduler = self.controller.PourScheduler(pump_workers=2)
+        try:
+            scheduler.pour_all([self.controller.Pour(0, 0.1, 'Test')])
+            thread_count = threading.active_count()
+            for _ in range(10):
+                pours = [self.controller.Pour(index, 0.1, 'Test') for index in range(4)]
+                scheduler.pour_all(pours)
+                assert not any(pour.running for pour in pours)
+            assert threading.active_count() == thread_count
+        finally:
+            scheduler.shutdown()
+
+    def test_timing_engine_reports_actual_on_time(self):
+        """Test that every pump run reports planned and actual on-time"""
+        self.get_controller()
+        engine = self.controller.PumpTimingEngine()
+        try:
+            runs = [engine.start(index, 0.02 * (index + 1)) for index in range(3)]
+            for run in runs:
+                assert run.wait(timeout=5)
+            report = engine.get_timing_report()
+            assert [entry['pump'] for entry in report] == [1, 2, 3]
+            for entry in report:
+                assert entry['actual_seconds'] >= entry['planned_seconds']
+                assert entry['error_seconds'] < 0.05
+        finally:
+            engine.shutdown()
+
+    def test_scheduler_submit_returns_handle(self, tmp_path, monkeypatch):
+        """Test that submitting a drink returns a watcher that finishes"""
+        self.get_controller()
+        from pour_planner import compile_recipe
+        self.use_temporary_monitor(tmp_path, monkeypatch, ['gin'])
+        scheduler = self.controller.PourScheduler(pump_workers=2)
+        try:
+            plan = compile_recipe('Test', {'Not a bottle': '10 ml'}, 'single', 200, {'gin': (0, False)},
+                                  lambda name: name.lower())
+            watcher = scheduler.submit(plan)
+            assert watcher.wait(timeout=5)
+            assert watcher.done() and watcher.failed
+            assert [event.kind for event in watcher.events] == ['accepted', 'failed']
+        finally:
+            scheduler.shutdown()
+            self.controller.set_pump_backend(None, self.controller.MonotonicClock())
+
+    def test_scheduler_shutdown(self, tmp_path, monkeypatch):
+        """Test that a shut down scheduler refuses new drinks and is replaced globally"""
+        self.get_controller()
+        self.use_temporary_monitor(tmp_path, monkeypatch)
+        monkeypatch.setattr(self.controller, '_pour_scheduler', None)
+        try:
+            scheduler = self.controller.get_pour_scheduler()
+            assert self.controller.get_pour_scheduler() is scheduler
+            self.controller.shutdown_pour_scheduler()
+            assert scheduler.closed
+            with pytest.raises(RuntimeError):
+                scheduler.submit(None)
+            assert self.controller.get_pour_scheduler() is not scheduler
+        finally:
+            self.controller.shutdown_pour_scheduler()
+            self.controller.set_pump_backend(None, self.controller.MonotonicClock())
+
+    def test_pump_driver_index_lookup(self):
+        """Test that pin pairs map to pump indices and group calls accept several pumps"""
+        self.get_controller()
+        driver = self.controller.PumpDriver(self.controller.MOTORS)
+        for index, (ia, ib) in enumerate(self.controller.MOTORS):
+            assert driver.index_of(ia, ib) == index
+        assert driver.index_of(1, 2) is None
+        driver.forward([0, 1, 2])
+        driver.stop([0, 1, 2])
+
+    def test_simulated_backend_pours_in_virtual_time(self):
+        """Test that a simulated backend runs pours on the virtual clock with exact pin transitions"""
+        self.get_controller()
+        import time
+        from pump_backend import SimulatedBackend
+        backend = SimulatedBackend()
+        self.controller.set_pump_backend(backend)
+        scheduler = self.controller.PourScheduler(pump_workers=2)
+        try:
+            started = time.monotonic()
+            pours = [self.controller.Pour(0, 0, 'A', seconds=10.0),
+                     self.controller.Pour(1, 0, 'B', seconds=5.0),
+                     self.controller.Pour(2, 0, 'C', seconds=3.0)]
+            scheduler.pour_all(pours)
+            assert time.monotonic() - started < 2
+            ia, ib = self.controller.MOTORS[2]
+            assert backend.pin_history(ia) == [(5.0, True), (8.0, False)]
+            assert [round(pour.pump_run.actual_seconds, 6) for pour in pours] == [10.0, 5.0, 3.0]
+            assert backend.clock.now() == 10.0
+        finally:
+            scheduler.shutdown()
+            self.controller.set_pump_backend(None, self.controller.MonotonicClock())
+
+    def test_pour_events(self, tmp_path, monkeypatch):
+        """Test that a drink publishes progress events to callbacks, wait() and await"""
+        self.get_controller()
+        from pour_planner import compile_recipe
+        self.use_temporary_monitor(tmp_path, monkeypatch, ['gin', 'tonic'])
+        scheduler = self.controller.PourScheduler(pump_workers=1)
+        try:
+            plan = compile_recipe('G&T', {'Gin': '50 ml', 'Tonic': '150 ml'}, 'single', 200,
+                                  {'gin': (0, False), 'tonic': (1, False)}, lambda name: name.lower())
+            received = []
+            watcher = scheduler.submit(plan)
+            watcher.subscribe(received.append)
+            final = asyncio.run(asyncio.wait_for(watcher.wait_async(), timeout=5))
+            assert final.kind == 'done' and final.percent == 100.0
+            assert watcher.wait(timeout=0)
+            kinds = [event.kind for event in received if event.kind != 'progress']
+            assert kinds == ['accepted', 'pump_started', 'pump_finished', 'pump_started', 'pump_finished', 'done']
+            assert [event.ingredient_name for event in received if event.kind == 'pump_started'] == ['Tonic', 'Gin']
+            percents = [event.percent for event in received]
+            assert percents == sorted(percents)
+        finally:
+            scheduler.shutdown()
+            self.controller.set_pump_backend(None, self.controller.MonotonicClock())
+
+    def test_failed_pump_start_finishes_once(self):
+        """Test that a pump that fails to start is reported with exactly one pump_finished"""
+        self.get_controller()
+        from pump_backend import SimulatedBackend
+        broken_pin = self.controller.MOTORS[1][0]
+
+        class BrokenPumpBackend(SimulatedBackend):
+            def write(self, pin_values):
+                if (broken_pin, True) in [(pin, bool(value)) for pin, value in pin_values]:
+                    raise OSError('GPIO defekt')
+                super().write(pin_values)
+
+        self.controller.set_pump_backend(BrokenPumpBackend())
+        scheduler = self.controller.PourScheduler(pump_workers=1)
+        try:
+            pours = [self.controller.Pour(index, 0, 'Test', seconds=1.0) for index in range(3)]
+            watcher = self.controller.ExecutorWatcher()
+            scheduler.pour_all(pours, watcher)
+            finished = [event for event in watcher.events if event.kind == 'pump_finished']
+            assert sorted(event.pump_index for event in finished) == [0, 1, 2]
+            assert [event.message for event in finished if event.pump_index == 1] == ['Fehler: GPIO defekt']
+            assert max(event.percent for event in watcher.events) <= 100.0
+        finally:
+            scheduler.shutdown()
+            self.controller.set_pump_backend(None, self.controller.MonotonicClock())
+
+    def test_clean_pumps_runs_in_staggered_parallel_groups(self):
+        """Test that cleaning runs capped, staggered groups and reports per-pump progress"""
+        self.get_controller()
+        from pump_backend import SimulatedBackend
+        backend = SimulatedBackend()
+        self.controller.set_pump_backend(backend)
+        try:
+            progress = []
+            self.controller.clean_pumps(duration=10, concurrency=6, stagger_seconds=0.1, on_progress=progress.append)
+            starts = sorted(timestamp for timestamp, pin, value in backend.transitions
+                            if value and pin in [ia for ia, ib in self.controller.MOTORS])
+            assert [round(timestamp, 6) for timestamp in starts] == [0.0, 0.1, 0.2, 0.3, 0.4, 0.5,
+                                                                      10.0, 10.1, 10.2, 10.3, 10.4, 10.5]
+            assert round(backend.clock.now(), 6) == 20.5
+            assert progress[-1] == {pump_number: 100.0 for pump_number in range(1, 13)}
+
+            backend.reset()
+            self.controller.clean_pumps(durations={1: 2.0, 12: 5.0}, stagger_seconds=0)
+            ia, ib = self.controller.MOTORS[0]
+            start = backend.transitions[0][0]
+            assert [round(timestamp - start, 6) for timestamp, value in backend.pin_history(ia)] == [0.0, 2.0]
+        finally:
+            self.controller.set_pump_backend(None, self.controller.MonotonicClock())
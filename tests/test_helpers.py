@@ -108,6 +108,19 @@ class TestHelpers:
         finally:
             self.helpers.save_cocktails(old_cocktails, False)
 
+    def test_get_ingredient_requirements_are_scaled(self, monkeypatch):
+        """Test that the requirements are the scaled amounts that are reserved when pouring"""
+        self.get_helpers()
+        import controller
+        import pour_planner
+        lookup = {'gin': (0, False), 'tonic': (1, False)}
+        monkeypatch.setattr(controller, 'get_pour_plan', lambda cocktail, size: pour_planner.compile_recipe(
+            cocktail['normal_name'], cocktail['ingredients'], size, 220, lookup, str.lower))
+        cocktail = {'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}}
+        requirements = self.helpers.get_ingredient_requirements(cocktail)
+        assert [name for name, _ in requirements] == ['gin', 'tonic']
+        assert [round(ml, 6) for _, ml in requirements] == [55.0, 165.0]
+
     def test_save_base64_image(self):
         """Test that b64 image saves and is reloadable"""
         self.get_helpers()
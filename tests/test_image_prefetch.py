@@ -0,0 +1,43 @@
+import pygame
+
+
+class TestImagePrefetch:
+    def get_prefetcher(self, tmp_path, monkeypatch, count=6):
+        """Get an ImagePrefetcher over `count` small cocktail images in a temporary logo folder"""
+        import sys
+        sys.path.append('.')
+        import settings
+        import image_prefetch
+        monkeypatch.setattr(settings, 'LOGO_FOLDER', str(tmp_path))
+        self.cocktails = []
+        for index in range(count):
+            name = f'Cocktail {index}'
+            image = pygame.Surface((8, 8))
+            image.fill((index * 40, 0, 0))
+            pygame.image.save(image, str(tmp_path / f'cocktail_{index}.png'))
+            self.cocktails.append({'normal_name': name})
+        return image_prefetch.ImagePrefetcher((4, 4), radius=1, workers=1)
+
+    def test_ring_follows_the_current_index(self, tmp_path, monkeypatch):
+        """Test that the ring holds the neighbours of the current index and evicts the rest"""
+        prefetcher = self.get_prefetcher(tmp_path, monkeypatch)
+        try:
+            prefetcher.prefetch(self.cocktails, 0)
+            images = [prefetcher.get(self.cocktails[index]) for index in (5, 0, 1)]
+            assert all(image.get_size() == (4, 4) for image in images)
+            assert prefetcher.get(self.cocktails[0]) is images[1]
+
+            prefetcher.prefetch(self.cocktails, 1)
+            assert set(prefetcher._ready) | set(prefetcher._pending) == {
+                str(tmp_path / f'cocktail_{index}.png') for index in (0, 1, 2)}
+            assert prefetcher.get(self.cocktails[1]) is images[2]
+        finally:
+            prefetcher.close()
+
+    def test_missing_image_returns_none(self, tmp_path, monkeypatch):
+        """Test that a cocktail without an image file yields None instead of raising"""
+        prefetcher = self.get_prefetcher(tmp_path, monkeypatch, count=1)
+        try:
+            assert prefetcher.get({'normal_name': 'Ohne Bild'}) is None
+        finally:
+            prefetcher.close()
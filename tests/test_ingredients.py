@@ -0,0 +1,32 @@
+class TestIngredients:
+    def get_ingredients(self):
+        """Get ingredients from parent directory with default settings"""
+        import sys
+        sys.path.append('.')
+        import ingredients
+        self.ingredients = ingredients
+
+    def test_canonical_id(self):
+        """Test that spellings, broken encodings and aliases map to one bottle ID"""
+        self.get_ingredients()
+        canonical_id = self.ingredients.canonical_id
+        assert canonical_id('Rum (weiß)') == 'rum_weiss'
+        assert canonical_id('rum_weiÃ\x9f') == 'rum_weiss'
+        assert canonical_id('rum (weiss)') == 'rum_weiss'
+        assert canonical_id('PfirsichlikÃ¶r') == 'pfirsichlikoer'
+        assert canonical_id('pfirsichlikoer') == 'pfirsichlikoer'
+        assert canonical_id('Pfirsichlik\\u00f6r') == 'pfirsichlikoer'
+        assert canonical_id('  Tonic   Water ') == 'tonic_water'
+        assert canonical_id('tonic_water') == 'tonic_water'
+        assert canonical_id('Ｇｉｎ') == 'gin'
+        assert canonical_id('Lime Juice') == 'limettensaft'
+        assert canonical_id('') == ''
+
+    def test_canonical_id_is_cached(self):
+        """Test that repeated lookups are served from the LRU cache"""
+        self.get_ingredients()
+        canonical_id = self.ingredients.canonical_id
+        canonical_id('Cranberry Juice')
+        hits = canonical_id.cache_info().hits
+        assert canonical_id('Cranberry Juice') == 'cranberrysaft'
+        assert canonical_id.cache_info().hits == hits + 1
@@ -0,0 +1,49 @@
+import os
+
+import pygame
+
+
+class TestLogoCache:
+    def get_logo_cache(self, tmp_path, monkeypatch):
+        """Get logo_cache with a temporary logo folder"""
+        import sys
+        sys.path.append('.')
+        import settings
+        import logo_cache
+        monkeypatch.setattr(settings, 'LOGO_FOLDER', str(tmp_path))
+        self.logo_cache = logo_cache
+
+    def save_logo(self, path, colour):
+        image = pygame.Surface((16, 16), pygame.SRCALPHA)
+        image.fill(colour)
+        pygame.image.save(image, str(path))
+
+    def test_scaled_logo_is_served_from_raw_file(self, tmp_path, monkeypatch):
+        """Test that a logo is scaled once into a raw file and then loaded without decoding the PNG"""
+        self.get_logo_cache(tmp_path, monkeypatch)
+        logo = tmp_path / 'mojito.png'
+        self.save_logo(logo, (10, 200, 30, 255))
+
+        image = self.logo_cache.load_scaled(str(logo), (8.4, 8))
+        assert image.get_size() == (8, 8)
+        assert image.get_at((3, 3)) == (10, 200, 30, 255)
+        raw = self.logo_cache.cache_path(str(logo), (8, 8))
+        assert os.path.getsize(raw) == 8 * 8 * 4
+
+        monkeypatch.setattr(pygame.image, 'load', lambda *args: 1 / 0)
+        assert self.logo_cache.load_scaled(str(logo), (8, 8)).get_at((0, 0)) == (10, 200, 30, 255)
+
+    def test_changed_logo_gets_new_raw_file(self, tmp_path, monkeypatch):
+        """Test that changing a logo builds a new raw file and pruning removes the old one"""
+        self.get_logo_cache(tmp_path, monkeypatch)
+        logo = tmp_path / 'mojito.png'
+        self.save_logo(logo, (10, 200, 30, 255))
+        old = self.logo_cache.build(str(logo), (8, 8))
+
+        self.save_logo(logo, (200, 10, 30, 255))
+        os.utime(logo, ns=(1, 1))
+        new = self.logo_cache.build(str(logo), (8, 8))
+        assert new != old
+
+        assert self.logo_cache.build_all([str(logo)], (8, 8)) == 1
+        assert not os.path.exists(old) and os.path.exists(new)
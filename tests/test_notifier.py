@@ -0,0 +1,116 @@
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+class TelegramStub:
+    """Local HTTP server that answers like the Telegram Bot API"""
+
+    def __init__(self, failures=0):
+        self.messages = []
+        self.failures = failures
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+                if stub.failures > 0:
+                    stub.failures -= 1
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                stub.messages.append((self.path, urllib.parse.parse_qs(body)['text'][0]))
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({'ok': True}).encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestNotifier:
+    def get_notifier(self, stub, **kwargs):
+        """Get a TelegramNotifier that talks to the local stub"""
+        import sys
+        sys.path.append('.')
+        import notifier
+        config = {'enabled': True, 'bot_token': 'TOKEN', 'chat_id': '42', 'api_url': stub.url,
+                  'notifications': {'warning': True, 'critical': True, 'empty': True}}
+        kwargs.setdefault('batch_seconds', 0.05)
+        return notifier.TelegramNotifier(lambda: config, **kwargs)
+
+    def bottle(self, current_ml):
+        return {'name': 'Gin', 'capacity_ml': 1000, 'current_ml': current_ml,
+                'warning_threshold_ml': 200, 'critical_threshold_ml': 100}
+
+    def test_batching_and_deduplication(self):
+        """Test that queued alerts are deduplicated and sent as one message"""
+        stub = TelegramStub()
+        notifier = self.get_notifier(stub, batch_seconds=0.2)
+        try:
+            assert notifier.notify('first')
+            assert notifier.notify('second')
+            assert notifier.notify('first')
+            assert notifier.flush(timeout=5)
+            assert stub.messages == [('/botTOKEN/sendMessage', 'first\nsecond')]
+        finally:
+            notifier.close()
+            stub.close()
+
+    def test_bottle_hysteresis(self):
+        """Test that a bottle alerts once per worse state and recovers only above threshold plus hysteresis"""
+        stub = TelegramStub()
+        notifier = self.get_notifier(stub, hysteresis_ml=25)
+        try:
+            levels = [190, 180, 210, 220, 190, 230, 190, 90, 0]
+            states = []
+            for level in levels:
+                states.append(notifier.report_bottle('gin', self.bottle(level)))
+                assert notifier.flush(timeout=5)
+            assert states == ['warning', 'warning', 'warning', 'warning', 'warning', 'ok', 'warning', 'critical', 'empty']
+            assert notifier.flush(timeout=5)
+            text = '\n'.join(message for _path, message in stub.messages)
+            assert text.count('WARNUNG') == 2
+            assert text.count('KRITISCHER') == 1 and text.count('LEER') == 1
+        finally:
+            notifier.close()
+            stub.close()
+
+    def test_retry_with_backoff(self):
+        """Test that server errors are retried and the caller never waits for the network"""
+        stub = TelegramStub(failures=2)
+        notifier = self.get_notifier(stub, backoff_seconds=0.01)
+        try:
+            assert notifier.notify('retry me')
+            assert notifier.flush(timeout=5)
+            assert [message for _path, message in stub.messages] == ['retry me']
+        finally:
+            notifier.close()
+            stub.close()
+
+    def test_forecast_alerts_once_until_relaxed(self):
+        """Test that a running-dry forecast alerts once and again only after the forecast relaxed"""
+        stub = TelegramStub()
+        notifier = self.get_notifier(stub)
+        try:
+            etas = [3600, 1500, 1200, None, 900, 4000, 1000]
+            sent = []
+            for eta in etas:
+                sent.append(notifier.report_forecast('gin', self.bottle(300), eta, 1800))
+                assert notifier.flush(timeout=5)
+            assert sent == [False, True, False, False, True, False, True]
+            assert len(stub.messages) == 3
+            assert stub.messages[0][1].startswith('⏳ PROGNOSE: Gin erreicht in ca. 25 min')
+        finally:
+            notifier.close()
+            stub.close()
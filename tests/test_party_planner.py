@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+
+
+class TestPartyPlanner:
+    def get_party_planner(self):
+        """Get party_planner from parent directory with default settings"""
+        import sys
+        sys.path.append('.')
+        import party_planner
+        import availability
+        import pour_planner
+        self.party_planner = party_planner
+        self.availability = availability
+        self.pour_planner = pour_planner
+
+    def bottle(self, current_ml, capacity_ml=1000):
+        return {'name': 'Test', 'capacity_ml': capacity_ml, 'current_ml': current_ml,
+                'warning_threshold_ml': 200, 'critical_threshold_ml': 100}
+
+    def get_matrix(self, cocktails):
+        lookup = {'gin': (0, False), 'tonic': (1, False)}
+
+        def plan_for(cocktail, size):
+            return self.pour_planner.compile_recipe(cocktail['normal_name'], cocktail['ingredients'], size,
+                                                    {'single': 200, 'double': 400}[size], lookup, str.lower)
+        return self.availability.AvailabilityMatrix(cocktails, plan_for, str.lower)
+
+    def test_solve_lp(self):
+        """Test the simplex solver on a small LP"""
+        self.get_party_planner()
+        A = np.array([[1.0, 2.0], [3.0, 1.0]])
+        x = self.party_planner.solve_lp(A, np.array([4.0, 6.0]), np.array([1.0, 1.0]))
+        assert np.allclose(x, [1.6, 1.2])
+
+    def test_plan_party_maximizes_drinks(self):
+        """Test that the planner mixes recipes to get the most drinks and honours weights"""
+        self.get_party_planner()
+        cocktails = [{'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}},
+                     {'normal_name': 'Tonic', 'ingredients': {'Tonic': '200 ml'}},
+                     {'normal_name': 'Rum', 'ingredients': {'Rum': '200 ml'}}]
+        matrix = self.get_matrix(cocktails)
+        bottles = {'gin': self.bottle(200), 'tonic': self.bottle(1000)}
+
+        plan = self.party_planner.plan_party(matrix, bottles)
+        assert plan.drinks == {'G&T': 4, 'Tonic': 2}
+        assert plan.total_drinks == 6
+        assert plan.leftover_ml == {'gin': 0.0, 'tonic': 0.0}
+
+        plan = self.party_planner.plan_party(matrix, bottles, weights={'Tonic': 2})
+        assert plan.drinks == {'Tonic': 5}
+        assert plan.weighted_total == 10
+
+    def test_refill_suggestions(self):
+        """Test that only refills which add drinks are suggested, best first"""
+        self.get_party_planner()
+        cocktails = [{'normal_name': 'G&T', 'ingredients': {'Gin': '50 ml', 'Tonic': '150 ml'}},
+                     {'normal_name': 'Tonic', 'ingredients': {'Tonic': '200 ml'}}]
+        matrix = self.get_matrix(cocktails)
+        plan = self.party_planner.plan_party(matrix, {'gin': self.bottle(200), 'tonic': self.bottle(600)})
+        assert plan.total_drinks == 4
+        assert [(refill.bottle_id, refill.refill_ml, refill.extra_drinks) for refill in plan.refills] == [('tonic', 400, 2.0)]
+
+    def test_hundreds_of_recipes_are_fast(self):
+        """Test that a catalog of several hundred recipes is planned well under a second"""
+        self.get_party_planner()
+        rng = np.random.default_rng(1)
+        names = [f'Zutat {index}' for index in range(12)]
+        cocktails = []
+        for index in range(400):
+            chosen = rng.choice(12, size=rng.integers(1, 5), replace=False)
+            cocktails.append({'normal_name': f'Cocktail {index}',
+                              'ingredients': {names[j]: f'{rng.integers(10, 100)} ml' for j in chosen}})
+        matrix = self.get_matrix(cocktails)
+        bottles = {name.lower(): self.bottle(float(rng.integers(0, 1000))) for name in names}
+        started = time.perf_counter()
+        plan = self.party_planner.plan_party(matrix, bottles)
+        assert time.perf_counter() - started < 1
+        assert plan.total_drinks <= plan.upper_bound + 1e-6
+        assert all(level >= -1e-6 for level in plan.leftover_ml.values())
@@ -0,0 +1,66 @@
+import multiprocessing
+
+
+def _increment(path, times):
+    import sys
+    sys.path.append('.')
+    import persistence
+    for _ in range(times):
+        with persistence.update_json(path, {'count': 0}) as data:
+            data['count'] += 1
+
+
+class TestPersistence:
+    def get_persistence(self):
+        """Get persistence from parent directory with default settings"""
+        import sys
+        sys.path.append('.')
+        import persistence
+        self.persistence = persistence
+
+    def test_write_json_replaces_atomically(self, tmp_path):
+        """Test that a write leaves only the finished file and its lock file behind"""
+        self.get_persistence()
+        path = tmp_path / 'pump_config.json'
+        assert self.persistence.read_json(path, {}) == {}
+        self.persistence.write_json(path, {'Pump 1': 'Rum (weiß)'})
+        self.persistence.write_json(path, {'Pump 1': 'Gin'})
+        assert self.persistence.read_json(path) == {'Pump 1': 'Gin'}
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['.pump_config.json.lock', 'pump_config.json']
+
+    def test_write_json_keeps_file_mode(self, tmp_path):
+        """Test that replacing a file keeps its permissions and a new file gets 0644 minus the umask"""
+        import os
+        import stat
+        self.get_persistence()
+        path = tmp_path / 'cocktails.json'
+        self.persistence.write_json(path, {'cocktails': []})
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o644 & ~self.persistence._UMASK
+        os.chmod(path, 0o664)
+        self.persistence.write_json(path, {'cocktails': [{'normal_name': 'Mojito'}]})
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o664
+
+    def test_failed_update_keeps_old_file(self, tmp_path):
+        """Test that an exception inside update_json does not write anything"""
+        self.get_persistence()
+        path = tmp_path / 'cocktails.json'
+        self.persistence.write_json(path, {'cocktails': []})
+        try:
+            with self.persistence.update_json(path) as data:
+                data['cocktails'].append({'normal_name': 'Mojito'})
+                raise RuntimeError('abgebrochen')
+        except RuntimeError:
+            pass
+        assert self.persistence.read_json(path) == {'cocktails': []}
+
+    def test_concurrent_updates_are_not_lost(self, tmp_path):
+        """Test that read-modify-write from several processes keeps every increment"""
+        self.get_persistence()
+        path = str(tmp_path / 'counter.json')
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=_increment, args=(path, 25)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+        assert self.persistence.read_json(path) == {'count': 100}
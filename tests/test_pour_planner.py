@@ -0,0 +1,104 @@
+class TestPourPlanner:
+    def get_pour_planner(self):
+        """Get pour_planner from parent directory with default settings"""
+        import sys
+        sys.path.append('.')
+        import pour_planner
+        self.pour_planner = pour_planner
+
+    def test_parse_ml(self):
+        """Test parsing recipe measurements"""
+        self.get_pour_planner()
+        assert self.pour_planner.parse_ml('50 ml') == 50.0
+        assert self.pour_planner.parse_ml('12.5 ml') == 12.5
+        assert self.pour_planner.parse_ml('') is None
+        assert self.pour_planner.parse_ml('a dash') is None
+
+    def test_predict_makespan(self):
+        """Test the simulated wall-clock time of a pour order"""
+        self.get_pour_planner()
+        assert self.pour_planner.predict_makespan([], 2) == 0.0
+        assert self.pour_planner.predict_makespan([3, 2, 1], 3) == 3
+        assert self.pour_planner.predict_makespan([1, 2, 3], 2) == 4
+        assert self.pour_planner.predict_makespan([3, 2, 1], 2) == 3
+
+    def test_plan_pour_order_longest_first(self):
+        """Test that the longest pours start first, by parsed seconds and not by string"""
+        self.get_pour_planner()
+        durations = {'80 ml': 8.0, '130 ml': 13.0, '20 ml': 2.0, '60 ml': 6.0}
+        ordered, predicted = self.pour_planner.plan_pour_order(list(durations), 2, duration=durations.get)
+        assert ordered == ['130 ml', '80 ml', '60 ml', '20 ml']
+        assert predicted == 15.0
+
+    def test_compile_recipe(self):
+        """Test compiling a recipe into scaled millilitres, pump index and seconds"""
+        self.get_pour_planner()
+        pump_config = {'Pump 1': {'ingredient': 'Gin', 'carbonated': False}, 'Pump 2': 'Tonic', 'Pump 3': 'Gin'}
+        lookup = self.pour_planner.build_pump_lookup(pump_config, 12)
+        assert lookup == {'gin': (0, False), 'tonic': (1, False)}
+        plan = self.pour_planner.compile_recipe('G&T', {'Gin': '50 ml', 'Tonic': '150 ml', 'Lime': 'a dash', 'Ice': '0 ml'},
+                                                'double', 400, lookup, lambda name: name.lower())
+        assert plan.scaling_factor == 2.0
+        assert [item.ingredient_name for item in plan.ingredients] == ['Gin', 'Tonic', 'Ice']
+        gin, tonic, ice = plan.ingredients
+        assert (gin.pump_index, gin.recipe_ml, gin.ml) == (0, 50.0, 100.0)
+        assert tonic.seconds == 300.0 * self.pour_planner.settings.get_pump_coefficient(2)
+        assert ice.pump_index is None and ice.seconds is None
+
+    def test_pour_plan_cache_invalidation(self, tmp_path, monkeypatch):
+        """Test that plans are cached and recompiled when pump_config.json changes"""
+        self.get_pour_planner()
+        import json, os
+        cocktails_file = tmp_path / 'cocktails.json'
+        config_file = tmp_path / 'pump_config.json'
+        config_file.write_text(json.dumps({'Pump 1': 'Gin'}))
+        cocktail = {'normal_name': 'Gin', 'ingredients': {'Gin': '50 ml'}}
+        cocktails_file.write_text(json.dumps({'cocktails': [cocktail]}))
+        monkeypatch.setattr(self.pour_planner.settings, 'COCKTAILS_FILE', str(cocktails_file))
+        monkeypatch.setattr(self.pour_planner.settings, 'CONFIG_FILE', str(config_file))
+
+        cache = self.pour_planner.PourPlanCache(lambda name: name.lower(), 12)
+        plan = cache.get_plan(cocktail, 'single')
+        assert cache.get_plan(cocktail, 'single') is plan
+        assert plan.ingredients[0].pump_index == 0
+
+        config_file.write_text(json.dumps({'Pump 4': 'Gin'}))
+        os.utime(config_file, ns=(1, 1))
+        assert cache.get_plan(cocktail, 'single').ingredients[0].pump_index == 3
+
+    def test_compile_recipe_stripes_across_pumps(self):
+        """Test that an ingredient on several pumps is split by pump rate when it shortens the pour"""
+        self.get_pour_planner()
+        pump_config = {'Pump 1': 'Gin', 'Pump 2': 'Tonic', 'Pump 3': 'Tonic'}
+        lookup = self.pour_planner.build_pump_lookup(pump_config, 12)
+        groups = self.pour_planner.build_pump_groups(pump_config, 12)
+        assert groups == {'gin': [(0, False)], 'tonic': [(1, False), (2, False)]}
+        ingredients = {'Gin': '50 ml', 'Tonic': '150 ml'}
+
+        plan = self.pour_planner.compile_recipe('G&T', ingredients, 'single', 200, lookup, str.lower,
+                                                pump_groups=groups, concurrency=2)
+        gin, tonic = plan.ingredients
+        assert len(gin.stripes) == 1
+        assert [stripe.pump_index for stripe in tonic.stripes] == [1, 2]
+        assert abs(sum(stripe.ml for stripe in tonic.stripes) - 150) < 1e-9
+        coefficient = self.pour_planner.settings.get_pump_coefficient
+        for stripe in tonic.stripes:
+            assert abs(stripe.ml * coefficient(stripe.pump_index + 1) - tonic.seconds) < 1e-9
+        assert tonic.seconds < 150 * coefficient(2)
+
+        # Mit nur einer Pumpe gleichzeitig bringt das Aufteilen nichts
+        plan = self.pour_planner.compile_recipe('G&T', ingredients, 'single', 200, lookup, str.lower,
+                                                pump_groups=groups, concurrency=1)
+        assert [len(item.stripes) for item in plan.ingredients] == [1, 1]
+
+    def test_aliases_do_not_group_pumps(self):
+        """Test that lemon and lime juice pumps stay separate although lemon juice is an alias for lime"""
+        self.get_pour_planner()
+        pump_config = {'Pump 1': 'Lemon Juice', 'Pump 2': 'Lime Juice'}
+        lookup = self.pour_planner.build_pump_lookup(pump_config, 12)
+        groups = self.pour_planner.build_pump_groups(pump_config, 12)
+        assert groups == {'lemon_juice': [(0, False)], 'lime_juice': [(1, False)]}
+
+        plan = self.pour_planner.compile_recipe('Gimlet', {'Lime Juice': '100 ml'}, 'single', 200, lookup, str.lower,
+                                                pump_groups=groups, concurrency=2)
+        assert [stripe.pump_index for stripe in plan.ingredients[0].stripes] == [1]
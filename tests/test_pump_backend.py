@@ -0,0 +1,34 @@
+import threading
+
+
+class TestPumpBackend:
+    def get_pump_backend(self):
+        """Get pump_backend from parent directory"""
+        import sys
+        sys.path.append('.')
+        import pump_backend
+        self.pump_backend = pump_backend
+
+    def test_virtual_clock(self):
+        """Test that the virtual clock fast-forwards instead of blocking"""
+        self.get_pump_backend()
+        clock = self.pump_backend.VirtualClock()
+        clock.sleep(3600)
+        assert clock.now() == 3600
+        condition = threading.Condition()
+        with condition:
+            clock.wait_until(condition, 7200)
+        assert clock.now() == 7200
+        clock.advance_to(10)
+        assert clock.advance(0.5) == 7200.5
+
+    def test_simulated_backend_records_transitions(self):
+        """Test that only actual pin changes are recorded with their timestamp"""
+        self.get_pump_backend()
+        backend = self.pump_backend.SimulatedBackend()
+        backend.setup([4, 17])
+        backend.write([(4, False), (17, True)])
+        backend.clock.advance(2)
+        backend.write([(4, False), (17, False)])
+        assert backend.transitions == [(0.0, 17, True), (2.0, 17, False)]
+        assert backend.pin_history(4) == []
@@ -0,0 +1,36 @@
+import pygame
+
+
+class TestTextCache:
+    def get_text_cache(self):
+        """Get text_cache from parent directory with default settings"""
+        import sys
+        sys.path.append('.')
+        import text_cache
+        pygame.init()
+        text_cache.clear()
+        self.text_cache = text_cache
+
+    def test_fonts_and_surfaces_are_reused(self):
+        """Test that fonts and rendered text are created once per key"""
+        self.get_text_cache()
+        assert self.text_cache.get_font('Arial', 26, True) is self.text_cache.get_font('Arial', 26, True)
+        first = self.text_cache.render_text('3 übrig', 36)
+        assert self.text_cache.render_text('3 übrig', 36) is first
+        assert self.text_cache.render_text('3 übrig', 36, (255, 80, 80)) is not first
+
+    def test_fit_text_shrinks_then_wraps(self):
+        """Test that a name is shrunk until it fits and wrapped at the minimum size"""
+        self.get_text_cache()
+        short = self.text_cache.fit_text('Mojito', 600, 48)
+        assert short.font_size == 48 and not short.wrapped and len(short.lines) == 1
+
+        name = 'Sehr langer Cocktailname mit vielen Wörtern'
+        width = pygame.font.SysFont(None, 40).size(name)[0] + 1
+        shrunk = self.text_cache.fit_text(name, width, 48)
+        assert shrunk.font_size == 40 and not shrunk.wrapped
+
+        wrapped = self.text_cache.fit_text(name, 150, 48)
+        assert wrapped.font_size == 24 and wrapped.wrapped and len(wrapped.lines) > 1
+        assert all(line.get_width() <= 150 for line in wrapped.lines)
+        assert self.text_cache.fit_text(name, 150, 48) is wrapped
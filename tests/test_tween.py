@@ -0,0 +1,42 @@
+class TestTween:
+    def get_tween(self):
+        """Get tween from parent directory with default settings"""
+        import sys
+        sys.path.append('.')
+        import tween
+        self.tween = tween
+
+    def test_tweens_advance_in_fixed_steps(self):
+        """Test that update() interpolates per fixed step, calls on_done once and caps long pauses"""
+        self.get_tween()
+        scheduler = self.tween.TweenScheduler(step_ms=10, max_steps=5)
+        values, done = [], []
+        scheduler.add('tray', 0, 100, 100, values.append, lambda: done.append(True))
+        assert values == [0] and scheduler.running('tray')
+
+        scheduler.update(1000)
+        assert scheduler.update(1005) is False
+        scheduler.update(1025)
+        assert values[-1] == 20
+        # Nach einer langen Pause höchstens max_steps nachholen
+        scheduler.update(5000)
+        assert values[-1] == 70 and not done
+        scheduler.update(5030)
+        assert values[-1] == 100 and done == [True]
+        assert not scheduler.active
+
+    def test_new_tween_finishes_the_old_one(self):
+        """Test that a tween with the same key jumps the old one to its end and runs its on_done"""
+        self.get_tween()
+        scheduler = self.tween.TweenScheduler(step_ms=10, max_steps=20)
+        sizes, done = [], []
+        scheduler.add('single_logo', 150, 220, 300, sizes.append, lambda: done.append('click'),
+                      easing=self.tween.there_and_back)
+        scheduler.update(0)
+        scheduler.update(150)
+        assert sizes[-1] == 220
+
+        scheduler.add('single_logo', 150, 175, 600, sizes.append, easing=self.tween.there_and_back)
+        assert sizes[-2:] == [150, 150] and done == ['click']
+        scheduler.cancel('single_logo')
+        assert not scheduler.active
@@ -0,0 +1,57 @@
+# text_cache.py
+import logging
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import pygame
+
+from helpers import wrap_text
+
+logger = logging.getLogger(__name__)
+
+
+class FittedText(NamedTuple):
+    """Fertig gerenderter Text: Schriftgröße, Zeilenhöhe, eine Surface pro Zeile und ob umgebrochen wurde."""
+    font_size: int
+    line_height: int
+    lines: Tuple[pygame.Surface, ...]
+    wrapped: bool
+
+
+@lru_cache(maxsize=64)
+def get_font(face: Optional[str], size: int, bold: bool = False) -> pygame.font.Font:
+    """Gibt die Schrift (face, size, bold) zurück; SysFont sucht die Systemschriften nur beim ersten Mal."""
+    return pygame.font.SysFont(face, size, bold=bold)
+
+
+@lru_cache(maxsize=512)
+def render_text(text: str, size: int, colour: Tuple[int, ...] = (255, 255, 255), face: Optional[str] = None,
+                bold: bool = False) -> pygame.Surface:
+    """Rendert einen Text einmal und gibt danach dieselbe Surface zurück (nur blitten, nicht verändern)."""
+    return get_font(face, size, bold).render(text, True, colour)
+
+
+@lru_cache(maxsize=256)
+def fit_text(text: str, max_width: float, max_size: int, min_size: int = 24, step: int = 8,
+             colour: Tuple[int, ...] = (255, 255, 255), face: Optional[str] = None) -> FittedText:
+    """Verkleinert die Schrift schrittweise, bis der Text in `max_width` passt, sonst wird umgebrochen.
+
+    Das Ergebnis hängt nur von den Argumenten ab und wird gecacht: der
+    Name eines Cocktails wird so nur beim ersten Anzeigen vermessen.
+    """
+    font_size = max_size
+    while font_size > min_size:
+        surface = render_text(text, font_size, colour, face)
+        if surface.get_width() <= max_width:
+            return FittedText(font_size, surface.get_height(), (surface,), False)
+        font_size -= step
+    font = get_font(face, font_size)
+    lines = tuple(render_text(line, font_size, colour, face) for line in wrap_text(text, font, max_width))
+    return FittedText(font_size, font.get_height() + 5, lines, True)
+
+
+def clear():
+    """Leert alle Caches, z.B. nach pygame.quit(), wenn die Schriften ungültig werden."""
+    fit_text.cache_clear()
+    render_text.cache_clear()
+    get_font.cache_clear()
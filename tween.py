@@ -0,0 +1,118 @@
+# tween.py
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def linear(progress: float) -> float:
+    return progress
+
+
+def there_and_back(progress: float) -> float:
+    """0 -> 1 -> 0, z.B. für einen Klick-Effekt, der wächst und wieder schrumpft."""
+    return 1.0 - abs(2.0 * progress - 1.0)
+
+
+class Tween:
+    """Interpoliert einen Wert von `start` nach `end` über `duration` Millisekunden."""
+
+    __slots__ = ('key', 'start', 'end', 'duration', 'on_update', 'on_done', 'easing', 'elapsed')
+
+    def __init__(self, key: str, start: float, end: float, duration: float, on_update: Callable[[float], None],
+                 on_done: Optional[Callable[[], None]] = None, easing: Callable[[float], float] = linear):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.on_update = on_update
+        self.on_done = on_done
+        self.easing = easing
+        self.elapsed = 0.0
+
+    @property
+    def progress(self) -> float:
+        return min(self.elapsed / self.duration, 1.0) if self.duration > 0 else 1.0
+
+    @property
+    def value(self) -> float:
+        return self.start + (self.end - self.start) * self.easing(self.progress)
+
+
+class TweenScheduler:
+    """Führt alle laufenden Animationen in der Hauptschleife weiter, statt je eine eigene Schleife zu blockieren.
+
+    Jede Animation hat einen Schlüssel (z.B. "single_logo"); eine neue
+    Animation mit demselben Schlüssel schließt die alte sofort ab
+    (Endwert und on_done), damit nie zwei Animationen dasselbe Ziel
+    bewegen. `update()` rückt in festen Zeitschritten vor und ruft
+    on_update höchstens einmal pro Frame auf.
+    """
+
+    def __init__(self, step_ms: float = 1000 / 120, max_steps: int = 12):
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self._tweens: Dict[str, Tween] = {}
+        self._last = None
+        self._accumulator = 0.0
+
+    @property
+    def active(self) -> bool:
+        return bool(self._tweens)
+
+    def running(self, key: str) -> bool:
+        return key in self._tweens
+
+    def add(self, key: str, start: float, end: float, duration: float, on_update: Callable[[float], None],
+            on_done: Optional[Callable[[], None]] = None, easing: Callable[[float], float] = linear) -> Tween:
+        """Startet eine Animation; on_update bekommt sofort den Startwert."""
+        self.finish(key)
+        tween = Tween(key, start, end, duration, on_update, on_done, easing)
+        self._tweens[key] = tween
+        on_update(tween.value)
+        return tween
+
+    def finish(self, key: str):
+        """Springt ans Ende einer laufenden Animation (Endwert setzen, on_done aufrufen)."""
+        tween = self._tweens.pop(key, None)
+        if tween is None:
+            return
+        tween.elapsed = tween.duration
+        tween.on_update(tween.value)
+        if tween.on_done:
+            tween.on_done()
+
+    def cancel(self, key: str):
+        """Bricht eine Animation ab, ohne Endwert und on_done."""
+        self._tweens.pop(key, None)
+
+    def update(self, now_ms: float) -> bool:
+        """Rückt alle Animationen bis `now_ms` vor; gibt True zurück, wenn sich etwas bewegt hat."""
+        if not self._tweens:
+            self._last = None
+            self._accumulator = 0.0
+            return False
+        if self._last is None:
+            self._last = now_ms
+        self._accumulator += now_ms - self._last
+        self._last = now_ms
+        steps = int(self._accumulator // self.step_ms)
+        if not steps:
+            return False
+        self._accumulator -= steps * self.step_ms
+        # Nach einem langen Stillstand (z.B. Ausschank-Bildschirm) nicht alles auf einmal nachholen
+        delta = min(steps, self.max_steps) * self.step_ms
+        finished = []
+        for tween in list(self._tweens.values()):
+            tween.elapsed += delta
+            tween.on_update(tween.value)
+            if tween.elapsed >= tween.duration:
+                finished.append(tween)
+        for tween in finished:
+            # on_done eines vorherigen Tweens kann diesen schon abgeschlossen oder ersetzt haben
+            if self._tweens.get(tween.key) is not tween:
+                continue
+            del self._tweens[tween.key]
+            if tween.on_done:
+                tween.on_done()
+        return True